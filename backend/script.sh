@@ -20,4 +20,6 @@ done
 >&2 echo 'PostgreSQL is available.'
 
 python manage.py migrate
-gunicorn core.wsgi:app --bind 0.0.0.0:5000 -k gevent
\ No newline at end of file
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+gunicorn core.wsgi:app --config gunicorn_config.py --bind 0.0.0.0:5000 -k gevent
\ No newline at end of file
@@ -1,9 +1,10 @@
 from marshmallow import Schema, fields, validate
 
+from apps.serialization import CompiledSchema
 from core.config import CONFIG
 
 
-class UserSchema(Schema):
+class UserSchema(CompiledSchema):
     """Schema for user validation."""
 
     email = fields.Email(required=True, validate=[validate.Length(max=250)])
@@ -18,32 +19,52 @@ class ChangePasswordSchema(Schema):
     new_password = fields.String(required=True, validate=[validate.Length(min=8, max=100)], load_only=True)
 
 
-class TokenSchema(Schema):
+class TokenSchema(CompiledSchema):
     """Schema for token issuance validation."""
 
     access_token = fields.String(dump_only=True)
     refresh_token = fields.String(dump_only=True)
 
 
-class RoleSchema(Schema):
+class RoleSchema(CompiledSchema):
     """Schema for role validation."""
 
     name = fields.String(required=True, validate=[validate.Length(max=80)])
     description = fields.String(validate=[validate.Length(max=255)])
 
 
-class SessionSchema(Schema):
+class RoleUsersSchema(Schema):
+    """Schema for validation of the users whose role is changed in bulk."""
+
+    users = fields.List(fields.String(), load_only=True)
+
+
+class RoleUserResultSchema(CompiledSchema):
+    """Schema for the outcome of a bulk role change for a user."""
+
+    user_pk = fields.String(dump_only=True)
+    status = fields.String(dump_only=True)
+
+
+class SessionSchema(CompiledSchema):
     """Schema for session validation."""
 
     event_date = fields.DateTime(format=CONFIG.flask.date_format, dump_only=True)
     user_agent = fields.String(dump_only=True)
 
 
+class LogoutSchema(Schema):
+    """Schema for logout parameters validation."""
+
+    everywhere = fields.Boolean(load_default=False, load_only=True)
+
+
 class PageSchema(Schema):
     """Schema for page validation."""
 
     page = fields.Integer(data_key='page_number', validate=[validate.Range(min=1)], load_only=True)
-    per_page = fields.Integer(data_key='page_size', validate=[validate.Range(max=100)], load_only=True)
+    per_page = fields.Integer(data_key='page_size', validate=[validate.Range(min=1, max=100)], load_only=True)
+    cursor = fields.String(load_only=True)
 
 
 class OAuthSchema(Schema):
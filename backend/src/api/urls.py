@@ -1,6 +1,7 @@
-from api.v1.roles import RoleByNameView, RoleView, roles
+from api.v1.keys import JWKSView, keys
+from api.v1.roles import RoleByNameView, RoleUsersView, RoleView, roles
 from api.v1.sessions import SessionByOAuth, SessionView, sessions
-from api.v1.users import SubscribeView, UserView, users
+from api.v1.users import SubscribeView, UserSessionsView, UserView, users
 from apps.api import path
 
 urlpatterns = [
@@ -8,6 +9,9 @@ urlpatterns = [
     path('/sessions/<string:provider_name>', sessions, SessionByOAuth),
     path('/roles', roles, RoleView),
     path('/roles/<string:role_name>', roles, RoleByNameView),
+    path('/roles/<string:role_name>/users', roles, RoleUsersView),
     path('/users', users, UserView),
     path('/users/<uuid:user_pk>/subscribe', users, SubscribeView),
+    path('/users/<uuid:user_pk>/sessions', users, UserSessionsView),
+    path('/.well-known/jwks.json', keys, JWKSView, prefix=''),
 ]
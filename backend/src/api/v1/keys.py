@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+from flask_apispec.views import MethodResource
+from werkzeug import Response
+
+from apps.keys import keyring
+from core.config import CONFIG
+
+keys = Blueprint('keys', __name__)
+
+
+class JWKSView(MethodResource):
+    """Class for representing the public keys that tokens are signed with."""
+
+    def get(self) -> Response:
+        """Get the JSON Web Key Set to verify tokens locally.
+
+        The response may be cached for the key activation delay: a new key is published
+        at least that long before tokens are signed with it.
+
+        Returns:
+            Response: JSON Web Key Set with status code 200
+        """
+        jwks = [] if CONFIG.jwt.algorithm.startswith('HS') else [key.jwk for key in keyring.keys]
+        response = jsonify({'keys': jwks})
+        response.cache_control.public = True
+        response.cache_control.max_age = CONFIG.jwt.delay
+        return response
@@ -1,22 +1,56 @@
 from http import HTTPStatus
-from typing import Dict, List, Tuple
+from typing import Iterable, List, Optional, Tuple
 
-from flask import Blueprint, make_response
+from flask import Blueprint, make_response, request
 from flask_apispec import marshal_with, use_kwargs
 from flask_apispec.views import MethodResource
 from werkzeug import Response
 from werkzeug.exceptions import BadRequest, NotFound
 
-from api.schemas import RoleSchema
+from api.schemas import RoleSchema, RoleUserResultSchema, RoleUsersSchema
+from apps.limiter import reads_limit
+from apps.principals import principals
+from apps.roles import CatalogueRole, grant_role_to_users, revoke_role_from_users, role_catalogue
 from apps.security import user_datastore as postgres
-from core.decorators import admin_required
+from core.decorators import admin_required, etag
+from models.role import Role
 
 roles = Blueprint('roles', __name__)
 
 
+def catalogue_version(**kwargs) -> str:
+    """Version of the roles for entity tags.
+
+    Args:
+        kwargs: View arguments
+
+    Returns:
+        str: Version of the role catalogue
+    """
+    return role_catalogue.version
+
+
+def role_version(role_name: str, **kwargs) -> Optional[str]:
+    """Version of a role for entity tags.
+
+    Args:
+        role_name: Name
+        kwargs: View arguments
+
+    Returns:
+        Optional[str]: Role ID, name and description or None if there is no such role
+    """
+    role = role_catalogue.get(role_name)
+    if role is None:
+        return None
+    return f'{role.pk}|{role.name}|{role.description}'
+
+
 class RoleView(MethodResource):
     """Class for role views."""
 
+    decorators = [reads_limit]
+
     @admin_required
     @use_kwargs(RoleSchema)
     def post(self, **kwargs) -> Response:
@@ -31,12 +65,14 @@ class RoleView(MethodResource):
         Returns:
             Response: Response with status code 201
         """
-        if postgres.find_role(kwargs['name']):
+        if role_catalogue.get(kwargs['name']):
             raise BadRequest('A role with this name already exists!')
         postgres.create_role(**kwargs)
         postgres.commit()
+        role_catalogue.invalidate()
         return make_response('', HTTPStatus.CREATED)
 
+    @etag(catalogue_version)
     @marshal_with(RoleSchema(many=True))
     def get(self) -> Tuple[List, int]:
         """Get a list of roles.
@@ -44,15 +80,34 @@ class RoleView(MethodResource):
         Returns:
             tuple[list, int]: List of roles and status code 200
         """
-        roles_list = postgres.role_model.query.all()
-        return roles_list, HTTPStatus.OK
+        return role_catalogue.all(), HTTPStatus.OK
 
 
 class RoleByNameView(MethodResource):
     """Class for role by name views."""
 
+    decorators = [reads_limit]
+
+    def find_role(self, role_name: str) -> Role:
+        """Load a role known to the role catalogue for modification.
+
+        Args:
+            role_name: Name
+
+        Raises:
+            NotFound: Error that there is no such role in the database
+
+        Returns:
+            Role: Role
+        """
+        cached_role = role_catalogue.get(role_name)
+        if not (cached_role and (role := postgres.db.session.get(Role, cached_role.pk))):
+            raise NotFound('Failed to find the role!')
+        return role
+
+    @etag(role_version)
     @marshal_with(RoleSchema)
-    def get(self, role_name: str) -> Tuple[Dict, int]:
+    def get(self, role_name: str) -> Tuple[CatalogueRole, int]:
         """Get a role by name.
 
         Args:
@@ -62,9 +117,9 @@ class RoleByNameView(MethodResource):
             NotFound: Error that there is no such role in the database
 
         Returns:
-            tuple[dict, int]: Role and status code 200
+            tuple[CatalogueRole, int]: Role and status code 200
         """
-        if not (role := postgres.find_role(role_name)):
+        if not (role := role_catalogue.get(role_name)):
             raise NotFound('Failed to find the role!')
         return role, HTTPStatus.OK
 
@@ -83,12 +138,13 @@ class RoleByNameView(MethodResource):
         Returns:
             Response: Response with status code 200
         """
-        if not (role := postgres.find_role(role_name)):
-            raise NotFound('Failed to find the role!')
+        role = self.find_role(role_name)
         for field, value in kwargs.items():
             setattr(role, field, value)
         postgres.put(role)
         postgres.commit()
+        role_catalogue.invalidate()
+        principals.invalidate()
         return make_response('', HTTPStatus.OK)
 
     @admin_required
@@ -104,8 +160,86 @@ class RoleByNameView(MethodResource):
         Returns:
             Response: Response with status code 204
         """
-        if not (role := postgres.find_role(role_name)):
-            raise NotFound('Failed to find the role!')
+        role = self.find_role(role_name)
         postgres.delete(role)
         postgres.commit()
+        role_catalogue.invalidate()
+        principals.invalidate()
         return make_response('', HTTPStatus.NO_CONTENT)
+
+
+class RoleUsersView(MethodResource):
+    """Class for assigning a role to many users at once and revoking it.
+
+    User IDs are passed as the `users` list of a JSON body or streamed as a `text/plain` body with one ID per line.
+    """
+
+    @admin_required
+    @use_kwargs(RoleUsersSchema)
+    @marshal_with(RoleUserResultSchema(many=True))
+    def post(self, role_name: str, **kwargs) -> Tuple[List, int]:
+        """Assign a role to users.
+
+        Args:
+            role_name: Name
+            kwargs: Request parameters
+
+        Raises:
+            NotFound: Error that there is no such role in the database
+
+        Returns:
+            tuple[list, int]: Status of each user, one of `assigned`, `unchanged`, `not_found`, `invalid`,
+                and status code 200
+        """
+        role = self.find_role(role_name)
+        return grant_role_to_users.apply(role.pk, self.user_ids(kwargs.get('users'))), HTTPStatus.OK
+
+    @admin_required
+    @use_kwargs(RoleUsersSchema)
+    @marshal_with(RoleUserResultSchema(many=True))
+    def delete(self, role_name: str, **kwargs) -> Tuple[List, int]:
+        """Revoke a role from users.
+
+        Args:
+            role_name: Name
+            kwargs: Request parameters
+
+        Raises:
+            NotFound: Error that there is no such role in the database
+
+        Returns:
+            tuple[list, int]: Status of each user, one of `revoked`, `unchanged`, `not_found`, `invalid`,
+                and status code 200
+        """
+        role = self.find_role(role_name)
+        return revoke_role_from_users.apply(role.pk, self.user_ids(kwargs.get('users'))), HTTPStatus.OK
+
+    def find_role(self, role_name: str) -> CatalogueRole:
+        """Find a role in the role catalogue.
+
+        Args:
+            role_name: Name
+
+        Raises:
+            NotFound: Error that there is no such role in the database
+
+        Returns:
+            CatalogueRole: Role
+        """
+        role = role_catalogue.get(role_name)
+        if role is None:
+            raise NotFound('Failed to find the role!')
+        return role
+
+    def user_ids(self, users: Optional[List[str]]) -> Iterable[str]:
+        """User IDs of the request.
+
+        Args:
+            users: User IDs of a JSON body, None if the IDs are streamed
+
+        Returns:
+            Iterable[str]: User IDs
+        """
+        if users is not None:
+            return users
+        return (line.decode().strip() for line in request.stream if line.strip())
@@ -1,26 +1,52 @@
 from http import HTTPStatus
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 from flask import Blueprint, current_app, make_response, request
 from flask_apispec import marshal_with, use_kwargs
 from flask_apispec.views import MethodResource
 from flask_jwt_extended import get_current_user, get_jwt, jwt_required
 from werkzeug import Response
-from werkzeug.exceptions import BadRequest, Unauthorized
+from werkzeug.exceptions import BadRequest, HTTPException, Unauthorized
 
 from api import schemas
+from apps.blocklist import blocklist
 from apps.jwt import generate_tokens
-from apps.jwt import jwt_redis_blocklist as redis
+from apps.limiter import login_limit
+from apps.metrics import logins
 from apps.oauth import OAuthSignIn
+from apps.principals import Principal, principals
 from apps.security import user_datastore as postgres
-from core.config import CONFIG
+from apps.utils import decode_cursor, encode_cursor
 
 sessions = Blueprint('sessions', __name__)
 
 
+def find_provider(provider_name: str) -> OAuthSignIn:
+    """Find the provider set up for the application.
+
+    Args:
+        provider_name: OAuth provider name.
+
+    Raises:
+        BadRequest: Error indicating that the provider is not supported or there are connection data missing.
+
+    Returns:
+        OAuthSignIn: Provider
+    """
+    providers: Dict[str, Optional[OAuthSignIn]] = current_app.config['OAUTH_PROVIDERS']
+    if provider_name not in providers:
+        raise BadRequest(f'Provider {provider_name} is not supported!')
+    if not (provider := providers[provider_name]):
+        raise BadRequest(f'Technical issues when connecting to the provider {provider_name}!')
+    return provider
+
+
 class SessionView(MethodResource):
     """Class for representing user sessions."""
 
+    decorators = [login_limit]
+    page_size = 20
+
     @use_kwargs(schemas.UserSchema)
     @marshal_with(schemas.TokenSchema)
     def post(self, **kwargs) -> Tuple[Dict, int]:
@@ -36,26 +62,61 @@ class SessionView(MethodResource):
             tuple[dict, int]: Tokens and status code 201
         """
         if not (user := postgres.authenticate_user(**kwargs)):
+            logins.labels('password', 'failure').inc()
             raise Unauthorized('Failed to authenticate the user!')
         postgres.create_session(user, request.user_agent)
         postgres.commit()
+        logins.labels('password', 'success').inc()
         return generate_tokens(user), HTTPStatus.CREATED
 
     @jwt_required()
     @use_kwargs(schemas.PageSchema, location='query')
     @marshal_with(schemas.SessionSchema(many=True))
-    def get(self, **kwargs) -> Tuple[List, int]:
+    def get(self, **kwargs) -> Tuple:
         """Retrieve a user's login history.
 
+        Pages are selected by number, or, if the `cursor` parameter is passed, by the cursor returned in
+        the `X-Next-Cursor` header of the previous page. An empty cursor selects the first page.
+
         Args:
             kwargs: Query string parameters
 
+        Raises:
+            BadRequest: Error that the cursor is malformed
+
         Returns:
-            tuple[list, int]: Login history and status code 200
+            tuple: Login history, status code 200 and the cursor of the next page if there is one
         """
         user = get_current_user()
-        auth_history = user.sessions.paginate(error_out=False, **kwargs)
-        return auth_history.items, HTTPStatus.OK
+        cursor = kwargs.pop('cursor', None)
+        if cursor is None:
+            auth_history = user.sessions.paginate(error_out=False, **kwargs)
+            return auth_history.items, HTTPStatus.OK
+        return self.page_after(user, cursor, kwargs.get('per_page', self.page_size))
+
+    def page_after(self, user: Principal, cursor: str, page_size: int) -> Tuple:
+        """Select a page of a user's login history by the cursor of the previous page.
+
+        Args:
+            user: User
+            cursor: Cursor of the previous page, empty for the first page
+            page_size: Number of sessions on the page
+
+        Raises:
+            BadRequest: Error that the cursor is malformed
+
+        Returns:
+            tuple: Login history, status code 200 and the cursor of the next page if there is one
+        """
+        try:
+            position = decode_cursor(cursor) if cursor else ()
+        except ValueError:
+            raise BadRequest('Invalid cursor!')
+        auth_history = user.sessions_before(*position).limit(page_size + 1).all()
+        if len(auth_history) <= page_size:
+            return auth_history, HTTPStatus.OK
+        last = auth_history[page_size - 1]
+        return auth_history[:page_size], HTTPStatus.OK, {'X-Next-Cursor': encode_cursor(last.event_date, last.pk)}
 
     @jwt_required(refresh=True)
     @marshal_with(schemas.TokenSchema)
@@ -69,14 +130,21 @@ class SessionView(MethodResource):
         return generate_tokens(user), HTTPStatus.OK
 
     @jwt_required()
-    def delete(self) -> Response:
+    @use_kwargs(schemas.LogoutSchema, location='query')
+    def delete(self, **kwargs) -> Response:
         """User logout.
 
+        Args:
+            kwargs: Query string parameters, `everywhere` revokes all tokens of the user
+
         Returns:
             Response: Response with status code 204
         """
-        revoked_token = get_jwt()['jti']
-        redis.set(revoked_token, value='', ex=CONFIG.flask.access_token_expires_by_sec)
+        revoked_token = get_jwt()
+        if kwargs['everywhere']:
+            blocklist.revoke_all(revoked_token['user_id'])
+        else:
+            blocklist.revoke(revoked_token['jti'], expires_at=revoked_token['exp'])
         return make_response('', HTTPStatus.NO_CONTENT)
 
 
@@ -95,12 +163,7 @@ class SessionByOAuth(MethodResource):
         Returns:
             Response: Response as authentication on the provider's site with a redirection status code 302.
         """
-        provider: Optional[OAuthSignIn] = current_app.config['OAUTH_PROVIDERS'].get(provider_name)
-        if not provider:
-            raise BadRequest(f'Provider {provider_name} is not supported!')
-        if not (provider.service.client_id and provider.service.client_secret):
-            raise BadRequest(f'Technical issues when connecting to the provider {provider_name}!')
-        return provider.authorize()
+        return find_provider(provider_name).authorize()
 
     @use_kwargs(schemas.OAuthSchema, location='query')
     @marshal_with(schemas.TokenSchema)
@@ -111,12 +174,26 @@ class SessionByOAuth(MethodResource):
             provider_name: OAuth provider name.
             kwargs: Query string parameters.
 
+        Raises:
+            BadRequest: Error indicating that the provider is not supported or there are connection data missing.
+            ServiceUnavailable: Error indicating that the provider is unavailable (raised by the provider client).
+            Unauthorized: Error indicating that the user of the social account could not be found or created.
+
         Returns:
             tuple[dict, int]: Tokens and status code 201
         """
-        provider: OAuthSignIn = current_app.config['OAUTH_PROVIDERS'].get(provider_name)
-        social_id = provider.callback(**kwargs)
-        user = postgres.find_or_create_user(social_id, provider.service.name)
+        provider = find_provider(provider_name)
+        try:
+            social_id = provider.callback(**kwargs)
+        except HTTPException:
+            logins.labels(provider_name, 'failure').inc()
+            raise
+        user_pk = postgres.find_or_create_social_user(social_id, provider.service.name)
+        user = principals.get(user_pk) if user_pk else None
+        if user is None:
+            logins.labels(provider_name, 'failure').inc()
+            raise Unauthorized(f'Failed to log in with {provider_name}!')
         postgres.create_session(user, request.user_agent)
         postgres.commit()
+        logins.labels(provider_name, 'success').inc()
         return generate_tokens(user), HTTPStatus.CREATED
@@ -1,34 +1,85 @@
 from http import HTTPStatus
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
 from flask import Blueprint, make_response
 from flask_apispec import marshal_with, use_kwargs
 from flask_apispec.views import MethodResource
 from flask_jwt_extended import get_current_user, get_jwt_identity, jwt_required
+from sqlalchemy import select
 from werkzeug import Response
 from werkzeug.exceptions import BadRequest, NotFound, Unauthorized
 
 from api.schemas import ChangePasswordSchema, RoleSchema, UserSchema
+from apps.blocklist import blocklist
+from apps.principals import principals
+from apps.roles import CatalogueRole, role_catalogue
 from apps.security import user_datastore as postgres
-from core.decorators import admin_required
+from core.decorators import admin_required, etag
 from core.enums import AuthRoles
-from models.role import Role
+from models.user import User
 
 users = Blueprint('users', __name__)
 
 
+def personal_version(**kwargs) -> str:
+    """Version of the personal data of the current user for entity tags.
+
+    Args:
+        kwargs: View arguments
+
+    Returns:
+        str: Modification date of the cached user and version of the role catalogue
+    """
+    user = get_current_user()
+    return f'{user.pk}|{user.updated_at}|{role_catalogue.version}'
+
+
+def roles_version(user_pk: UUID, **kwargs) -> Optional[str]:
+    """Version of the roles of a user for entity tags.
+
+    Args:
+        user_pk: User ID
+        kwargs: View arguments
+
+    Returns:
+        Optional[str]: Modification date of the user and version of the role catalogue or None if there is no such user
+    """
+    query = select(User.updated_at).where(User.pk == user_pk)
+    if not (user := postgres.db.session.execute(query).first()):
+        return None
+    return f'{user_pk}|{user.updated_at}|{role_catalogue.version}'
+
+
+def find_user(user_pk: UUID) -> User:
+    """Find a user by ID.
+
+    Args:
+        user_pk: User ID
+
+    Raises:
+        NotFound: Error that there is no such user in the database
+
+    Returns:
+        User: User
+    """
+    user = postgres.get_user(user_pk)
+    if user is None:
+        raise NotFound('Failed to find the user!')
+    return user
+
+
 class UserView(MethodResource):
     """Class for representing a user."""
 
     @property
-    def user_role(self) -> Role:
+    def user_role(self) -> CatalogueRole:
         """Initial user role upon registration.
 
         Returns:
-            Role: User role
+            CatalogueRole: User role
         """
-        return postgres.find_or_create_role(AuthRoles.USER.value)
+        return role_catalogue.get_or_create(AuthRoles.USER.value)
 
     @use_kwargs(UserSchema)
     def post(self, **kwargs) -> Response:
@@ -43,14 +94,13 @@ class UserView(MethodResource):
         Returns:
             Response: Response with status code 201
         """
-        if postgres.find_user(email=kwargs['email']):
+        if not postgres.register_user(kwargs['email'], kwargs['password'], self.user_role.pk):
             raise BadRequest('User with such email already exists!')
-        new_user = postgres.create_user(**kwargs)
-        postgres.add_role_to_user(new_user, self.user_role)
         postgres.commit()
         return make_response('', HTTPStatus.CREATED)
 
     @jwt_required()
+    @etag(personal_version)
     @marshal_with(UserSchema)
     def get(self) -> Tuple[Dict, int]:
         """Get personal data.
@@ -80,6 +130,7 @@ class UserView(MethodResource):
         user.password = kwargs['new_password']
         postgres.put(user)
         postgres.commit()
+        principals.invalidate(user.pk)
         return make_response('', HTTPStatus.OK)
 
 
@@ -87,13 +138,13 @@ class SubscribeView(MethodResource):
     """Class for representing the assignment of a subscriber role to a user by user ID."""
 
     @property
-    def subscriber_role(self) -> Role:
+    def subscriber_role(self) -> CatalogueRole:
         """Subscriber role that grants privileges to the user.
 
         Returns:
-            Role: Subscriber role
+            CatalogueRole: Subscriber role
         """
-        return postgres.find_or_create_role(AuthRoles.SUBSCRIBER.value)
+        return role_catalogue.get_or_create(AuthRoles.SUBSCRIBER.value)
 
     @admin_required
     def post(self, user_pk: UUID) -> Response:
@@ -108,13 +159,14 @@ class SubscribeView(MethodResource):
         Returns:
             Response: Response with status code 201
         """
-        if not (user := postgres.get_user(user_pk)):
-            raise NotFound('Failed to find the user!')
-        postgres.add_role_to_user(user, self.subscriber_role)
+        user = find_user(user_pk)
+        postgres.grant_role(user, self.subscriber_role.pk)
         postgres.commit()
+        principals.invalidate(user_pk)
         return make_response('', HTTPStatus.CREATED)
 
     @admin_required
+    @etag(roles_version)
     @marshal_with(RoleSchema(many=True))
     def get(self, user_pk: UUID) -> Tuple[List, int]:
         """Get user roles.
@@ -128,8 +180,7 @@ class SubscribeView(MethodResource):
         Returns:
             Tuple[list, int]: List of user roles and status code 200
         """
-        if not (user := postgres.get_user(user_pk)):
-            raise NotFound('Failed to find the user!')
+        user = find_user(user_pk)
         return user.roles, HTTPStatus.OK
 
     @admin_required
@@ -145,8 +196,29 @@ class SubscribeView(MethodResource):
         Returns:
             Response: Response with status code 204
         """
-        if not (user := postgres.get_user(user_pk)):
-            raise NotFound('Failed to find the user!')
-        postgres.remove_role_from_user(user, self.subscriber_role)
+        user = find_user(user_pk)
+        postgres.revoke_role(user, self.subscriber_role.pk)
         postgres.commit()
+        principals.invalidate(user_pk)
+        return make_response('', HTTPStatus.NO_CONTENT)
+
+
+class UserSessionsView(MethodResource):
+    """Class for representing the sessions of a user by user ID."""
+
+    @admin_required
+    def delete(self, user_pk: UUID) -> Response:
+        """Log a user out everywhere by revoking all of their tokens.
+
+        Args:
+            user_pk: User ID
+
+        Raises:
+            NotFound: Error that there is no such user in the database
+
+        Returns:
+            Response: Response with status code 204
+        """
+        user = find_user(user_pk)
+        blocklist.revoke_all(user.pk)
         return make_response('', HTTPStatus.NO_CONTENT)
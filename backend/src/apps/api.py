@@ -1,5 +1,7 @@
+import functools
+import threading
 from http import HTTPStatus
-from typing import Any, Tuple, Union
+from typing import Any, Callable, List, Tuple, Union
 
 from apispec import APISpec
 from apispec.ext.marshmallow import MarshmallowPlugin
@@ -9,12 +11,67 @@ from flask_apispec.views import MethodResource
 from werkzeug import exceptions as exc
 from werkzeug.wrappers import Response
 
+from api.v1.keys import keys
 from api.v1.roles import roles
 from api.v1.sessions import sessions
 from api.v1.users import users
 from core.config import CONFIG
 
-docs = FlaskApiSpec()
+
+class LazyApiSpec(FlaskApiSpec):
+    """Flask-apispec extension that builds the OpenAPI spec on the first request of the docs.
+
+    Converting the views and their schemas takes longer than installing everything else, and most workers never
+    serve the docs, so the registered views are only converted when the spec is first requested. The views are
+    deferred through the `_deferred` list of flask-apispec, which is why its version is pinned.
+    """
+
+    _deferred: List[Callable[[], None]]
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the extension.
+
+        Args:
+            args: `FlaskApiSpec` arguments
+            kwargs: `FlaskApiSpec` keyword arguments
+        """
+        self._built = 0
+        self._lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_app(self, app: Flask):
+        """Add the docs routes for the application without converting the registered views.
+
+        Args:
+            app: Flask
+        """
+        deferred = self._deferred
+        self._deferred = []
+        super().init_app(app)
+        self._deferred = deferred
+        self._built = 0
+
+    def build(self):
+        """Convert the views registered since the last build and add them to the spec."""
+        with self._lock:
+            for deferred in self._deferred[self._built:]:
+                deferred()
+            self._built = len(self._deferred)
+
+    def swagger_json(self) -> Response:
+        """Build the spec if needed and return it.
+
+        Returns:
+            Response: OpenAPI spec as JSON
+        """
+        self.build()
+        return super().swagger_json()
+
+    def _defer(self, func, *args, **kwargs):
+        self._deferred.append(functools.partial(func, *args, **kwargs))
+
+
+docs = LazyApiSpec()
 
 
 def handle_errors(error: exc.HTTPException) -> Tuple[Union[Any, Response], ...]:
@@ -35,26 +92,35 @@ def handle_errors(error: exc.HTTPException) -> Tuple[Union[Any, Response], ...]:
     return jsonify({'message': error.description}), error.code
 
 
-def path(url: str, blueprint: Blueprint, view: MethodResource):
+def path(url: str, blueprint: Blueprint, view: MethodResource, prefix: str = CONFIG.flask.url_prefix):
     """Register a URL path.
 
     Args:
         url: URL path
         blueprint: `Blueprint` object
         view: View class
+        prefix: URL prefix, the API version prefix by default
     """
     blueprint.add_url_rule(
-        rule='{api_url}{path}'.format(api_url=CONFIG.flask.url_prefix, path=url),
+        rule='{api_url}{path}'.format(api_url=prefix, path=url),
         view_func=view.as_view(view.__name__.lower()),
         strict_slashes=False,
     )
-    for error in (exc.NotFound, exc.Unauthorized, exc.Forbidden, exc.BadRequest, exc.UnprocessableEntity):
+    errors = (
+        exc.NotFound,
+        exc.Unauthorized,
+        exc.Forbidden,
+        exc.BadRequest,
+        exc.UnprocessableEntity,
+        exc.ServiceUnavailable,
+    )
+    for error in errors:
         blueprint.register_error_handler(error, handle_errors)  # type: ignore[arg-type]
     docs.register(view, blueprint=blueprint.name)
 
 
 def install(app: Flask):
-    """Install the Flask component for working with the API.
+    """Install the Flask component for working with the API, with OpenAPI docs unless `FLASK_DOCS` is empty.
 
     Args:
         app: Flask
@@ -73,4 +139,6 @@ def install(app: Flask):
     app.register_blueprint(roles)
     app.register_blueprint(users)
     app.register_blueprint(sessions)
-    docs.init_app(app)
+    app.register_blueprint(keys)
+    if CONFIG.flask.docs:
+        docs.init_app(app)
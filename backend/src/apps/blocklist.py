@@ -0,0 +1,207 @@
+import time
+from typing import List, Tuple
+from uuid import UUID
+
+from redis import Redis
+
+from apps.cache import LRUCache, bus
+from apps.jaeger import tracing
+from apps.metrics import blocklist_lookups, blocklist_seconds
+from apps.redis import redis_client
+from core.config import CONFIG
+
+
+class BlocklistReplica:
+    """Copy of the live revocations in the memory of a worker, kept in sync over pub/sub."""
+
+    def __init__(self, redis: Redis, key: str, generation_key: str, size: int):
+        """Initialize an empty copy.
+
+        Args:
+            redis: Redis client
+            key: Sorted set of the revoked tokens scored by their expiration time
+            generation_key: Key template of the token generation of a user
+            size: Maximum number of revoked tokens and of users with revoked tokens kept in memory
+        """
+        self.redis = redis
+        self.key = key
+        self.generation_key = generation_key
+        self.tokens = LRUCache(maxsize=size)
+        self.generations = LRUCache(maxsize=size)
+
+    @property
+    def complete(self) -> bool:
+        """Whether no revocation was evicted to make room for another one.
+
+        Returns:
+            bool: Whether the copy holds all live revocations it received
+        """
+        return not (self.tokens.evictions or self.generations.evictions)
+
+    def on_revoke(self, message: str) -> None:
+        """Add a token revoked by any worker.
+
+        Args:
+            message: Token ID and expiration time separated by a colon
+        """
+        jti, expires_at = message.rsplit(':', 1)
+        self.tokens.set(jti, True, ttl=int(expires_at) - time.time())
+
+    def on_raise_generation(self, message: str) -> None:
+        """Update the token generation of a user raised by any worker.
+
+        Args:
+            message: User ID, generation and its lifetime separated by colons
+        """
+        user_pk, generation, ttl = message.split(':')
+        self.generations.set(user_pk, int(generation), ttl=int(ttl))
+
+    def resync(self) -> None:
+        """Replace the copy with the revocations from Redis that have not expired yet."""
+        now = time.time()
+        self.tokens.clear()
+        for jti, expires_at in self.redis.zrangebyscore(self.key, now, '+inf', withscores=True):
+            self.tokens.set(jti.decode(), True, ttl=expires_at - now)
+        self.generations.clear()
+        self._load_generations(list(self.redis.scan_iter(match=self.generation_key.format(user_pk='*'), count=1000)))
+
+    def _load_generations(self, user_keys: List[bytes]) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for user_key in user_keys:
+            pipe.get(user_key)
+            pipe.ttl(user_key)
+        replies = pipe.execute()
+        for user_key, generation, ttl in zip(user_keys, replies[::2], replies[1::2]):
+            if generation is not None and ttl > 0:
+                self.generations.set(user_key.decode().rsplit(':', 1)[1], int(generation), ttl=ttl)
+
+
+class TokenBlocklist:
+    """Storage of revoked tokens in Redis with a local copy in every worker.
+
+    A single token is revoked by its `jti`, which is written as a key with a TTL, as before, and
+    additionally into a sorted set scored by the token expiration time. All tokens of a user are
+    revoked at once by raising the user's token generation: tokens carry the generation they were
+    issued in and are rejected if it is older than the current one. Both kinds of revocation are
+    announced over pub/sub, and workers keep the live ones in memory, so checking a token that is
+    not revoked does not need a network hop. Until the local copy is in sync, or if it overflowed,
+    lookups go to Redis.
+    """
+
+    channel = 'revoked_tokens'
+    key = 'revoked_tokens'
+    generations_channel = 'token_generations'
+    generation_key = 'token_generation:{user_pk}'
+    raise_generation = """
+        local now = redis.call('TIME')
+        local current = tonumber(redis.call('GET', KEYS[1]) or 0)
+        local generation = math.max(now[1] * 1000 + math.floor(now[2] / 1000), current + 1)
+        redis.call('SET', KEYS[1], generation, 'EX', ARGV[1])
+        redis.call('PUBLISH', ARGV[2], ARGV[3] .. ':' .. generation .. ':' .. ARGV[1])
+        return generation
+    """
+
+    def __init__(self, redis: Redis, size: int, cached: bool, lifetime: int):
+        """Initialize the blocklist and subscribe to revocations made by other workers.
+
+        Args:
+            redis: Redis client
+            size: Maximum number of revoked tokens and of users with revoked tokens kept in memory
+            cached: Whether to answer lookups from the local copy
+            lifetime: Lifetime of the longest-living token in seconds
+        """
+        self.redis = redis
+        self.cached = cached
+        self.lifetime = lifetime
+        self.replica = BlocklistReplica(redis, self.key, self.generation_key, size)
+        self._raise_generation = redis.register_script(self.raise_generation)
+        bus.subscribe(self.channel, self.replica.on_revoke, on_reset=self.replica.resync)
+        bus.subscribe(self.generations_channel, self.replica.on_raise_generation)
+
+    @property
+    def local(self) -> bool:
+        """Whether lookups can be answered from the local copy.
+
+        Returns:
+            bool: Whether the local copy is complete and in sync with Redis
+        """
+        return self.cached and bus.ready and self.replica.complete
+
+    def revoke(self, jti: str, expires_at: int) -> None:
+        """Revoke a token until it expires.
+
+        Args:
+            jti: Token ID
+            expires_at: Token expiration time as a UNIX timestamp
+        """
+        now = int(time.time())
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(jti, value='', ex=max(expires_at - now, 1))
+        pipe.zadd(self.key, {jti: expires_at})
+        pipe.zremrangebyscore(self.key, '-inf', now)
+        pipe.publish(self.channel, f'{jti}:{expires_at}')
+        with tracing.span('blocklist.revoke'):
+            pipe.execute()
+        self.replica.tokens.set(jti, True, ttl=expires_at - now)
+
+    def revoke_all(self, user_pk: UUID) -> None:
+        """Revoke all tokens issued to a user so far.
+
+        Args:
+            user_pk: User ID
+        """
+        user_key = self.generation_key.format(user_pk=user_pk)
+        with tracing.span('blocklist.revoke_all'):
+            generation = self._raise_generation(
+                keys=[user_key],
+                args=[self.lifetime, self.generations_channel, str(user_pk)],
+            )
+        self.replica.generations.set(str(user_pk), int(generation), ttl=self.lifetime)
+
+    def generation(self, user_pk: UUID) -> int:
+        """Get the current generation of a user's tokens.
+
+        Args:
+            user_pk: User ID
+
+        Returns:
+            int: Token generation
+        """
+        if self.local:
+            return self.replica.generations.get(str(user_pk), 0)
+        with tracing.span('blocklist.generation'):
+            return int(self.redis.get(self.generation_key.format(user_pk=user_pk)) or 0)
+
+    def is_revoked(self, jwt_payload: dict) -> bool:
+        """Check whether a token is revoked by itself or together with all tokens of the user.
+
+        The time of the check and whether the local copy answered it are recorded in the metrics.
+
+        Args:
+            jwt_payload: Token payload
+
+        Returns:
+            bool: Whether the token is revoked
+        """
+        start = time.perf_counter()
+        source = 'local' if self.local else 'redis'
+        revoked, generation = self._lookup(source, jwt_payload['jti'], jwt_payload['user_id'])
+        revoked = revoked or jwt_payload.get('generation', 0) < generation
+        blocklist_seconds.labels(source).observe(time.perf_counter() - start)
+        blocklist_lookups.labels(source, 'true' if revoked else 'false').inc()
+        return revoked
+
+    def _lookup(self, source: str, jti: str, user_pk: str) -> Tuple[bool, int]:
+        if source == 'local':
+            return jti in self.replica.tokens, self.replica.generations.get(user_pk, 0)
+        with tracing.span('blocklist.lookup'):
+            token, generation = self.redis.mget(jti, self.generation_key.format(user_pk=user_pk))
+        return token is not None, int(generation or 0)
+
+
+blocklist = TokenBlocklist(
+    redis_client,
+    size=CONFIG.blocklist.size,
+    cached=CONFIG.blocklist.cache,
+    lifetime=CONFIG.flask.refresh_token_expires_by_sec,
+)
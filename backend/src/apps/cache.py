@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[Any, Optional[float]]
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entries."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Default lifetime of an entry in seconds, entries never expire if not set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._data: 'OrderedDict[Hashable, Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry and mark it as recently used.
+
+        Args:
+            key: Entry key
+            default: Value returned if there is no live entry
+
+        Returns:
+            Any: Cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._data.pop(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used one if the cache is full.
+
+        Args:
+            key: Entry key
+            value: Entry value
+            ttl: Lifetime of the entry in seconds, overrides the default one
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                _, (_, evicted_expires_at) = self._data.popitem(last=False)
+                if evicted_expires_at is None or evicted_expires_at > time.monotonic():
+                    self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """Remove an entry if present.
+
+        Args:
+            key: Entry key
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the eviction counter."""
+        with self._lock:
+            self._data.clear()
+            self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check that there is a live entry for the key.
+
+        Args:
+            key: Entry key
+
+        Returns:
+            bool: Whether the entry is cached
+        """
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self) -> int:
+        """Number of stored entries including the expired ones not yet purged.
+
+        Returns:
+            int: Number of entries
+        """
+        return len(self._data)
+
+
+class InvalidationBus:
+    """Process-wide Redis pub/sub listener that keeps local caches in sync across workers."""
+
+    reconnect_delay = 1
+    poll_timeout = 5
+
+    def __init__(self):
+        """Initialize the bus without subscriptions."""
+        self._handlers: Dict[str, Callable[[dict], None]] = {}
+        self._resets: List[Callable[[], None]] = []
+        self._ready = threading.Event()
+        self._pid: Optional[int] = None
+        self._redis: Optional[Redis] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the listener is subscribed and local caches are in sync with Redis.
+
+        The listener is restarted on first use in a forked child process.
+
+        Returns:
+            bool: Listener state
+        """
+        if self._pid != os.getpid() and self._redis is not None:
+            self.start(self._redis)
+        return self._ready.is_set()
+
+    def subscribe(self, channel: str, callback: Callable[[str], None], on_reset: Optional[Callable[[], None]] = None):
+        """Register a callback for messages of the channel.
+
+        Args:
+            channel: Channel name
+            callback: Function called with every message of the channel
+            on_reset: Function called to resynchronize local state after (re)connecting
+        """
+        self._handlers[channel] = lambda message: callback(message['data'].decode())
+        if on_reset:
+            self._resets.append(on_reset)
+
+    def publish(self, channel: str, message: str) -> None:
+        """Send a message to all workers.
+
+        Args:
+            channel: Channel name
+            message: Message
+        """
+        if self._redis is not None:
+            self._redis.publish(channel, message)
+
+    def start(self, redis: Redis) -> None:
+        """Start listening in a background thread once per process.
+
+        Args:
+            redis: Redis client
+        """
+        self._redis = redis
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._ready.clear()
+        threading.Thread(target=self._listen, name='invalidation-bus', daemon=True).start()
+
+    def _listen(self) -> None:
+        # A message that a callback failed to apply may be missing from a local cache, so the listener reconnects
+        # and the caches are resynchronized as after a disconnect
+        while True:
+            try:
+                self._consume()
+            except RedisError as error:
+                logger.warning('Invalidation bus disconnected: %s', error)
+            except Exception:
+                logger.exception('Invalidation bus failed to apply a message, reconnecting')
+            time.sleep(self.reconnect_delay)
+
+    def _consume(self) -> None:
+        try:  # noqa: WPS501 lookups go to Redis whenever the listener stops, even if its thread is killed
+            with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:  # type: ignore[union-attr]
+                pubsub.subscribe(**self._handlers)
+                for reset in self._resets:
+                    reset()
+                self._ready.set()
+                while self._ready.is_set():
+                    pubsub.get_message(timeout=self.poll_timeout)
+        finally:
+            self._ready.clear()
+
+
+bus = InvalidationBus()
@@ -0,0 +1,104 @@
+import sys
+
+from flask import current_app
+from flask_script import Command, Option
+from sqlalchemy import text
+
+from apps.db import install_migrations
+from apps.keys import keyring
+from apps.security import user_datastore as postgres
+from core.config import CONFIG
+from core.startup import StartupProfile, measure_startup
+from models.partitions import create_month_partitions, drop_month_partitions
+
+
+class MakeMigrations(Command):
+    """Command to create migrations."""
+
+    def run(self):
+        """Script to run the command."""
+        import flask_migrate
+
+        install_migrations(current_app)
+        flask_migrate.migrate()
+
+
+class Migrate(Command):
+    """Command to apply migrations."""
+
+    def run(self):
+        """Script to run the command."""
+        import flask_migrate
+
+        install_migrations(current_app)
+        flask_migrate.upgrade()
+
+
+class RotateKeys(Command):
+    """Command to create a new token signing key and delete the retired ones."""
+
+    def run(self):
+        """Script to run the command."""
+        key = keyring.rotate()
+        sys.stdout.write(f'Created key {key.kid}, it will sign tokens in {keyring.delay} seconds\n')
+        for kid in keyring.prune(max_age=CONFIG.flask.refresh_token_expires_by_sec):
+            sys.stdout.write(f'Deleted retired key {kid}\n')
+
+
+class PartitionSessions(Command):
+    """Command to create the login history partitions of the coming months and remove the expired ones."""
+
+    option_list = (
+        Option('--detach', dest='detach', action='store_true', help='Keep expired partitions as tables'),
+    )
+    lock = 0x73657373
+
+    def run(self, detach: bool):
+        """Script to run the command.
+
+        Args:
+            detach: Whether to detach expired partitions instead of dropping them
+        """
+        with postgres.db.engine.begin() as connection:
+            if not connection.execute(text('SELECT pg_try_advisory_xact_lock(:lock)'), {'lock': self.lock}).scalar():
+                sys.stdout.write('Partitions are being maintained by another process\n')
+                return
+            for name in create_month_partitions(connection, CONFIG.history.ahead):
+                sys.stdout.write(f'Created partition {name}\n')
+            for name in drop_month_partitions(connection, CONFIG.history.retention, detach=detach):
+                sys.stdout.write(f'{"Detached" if detach else "Dropped"} partition {name}\n')
+
+
+class ProfileStartup(Command):
+    """Command to show where the startup time of a worker goes."""
+
+    option_list = (
+        Option('--top', dest='top', type=int, default=15, help='Number of the slowest imports shown'),
+        Option('--depth', dest='depth', type=int, default=2, help='Deepest nesting level of the imports shown'),
+    )
+
+    def run(self, top: int, depth: int):
+        """Script to run the command.
+
+        Args:
+            top: Number of the slowest imports shown
+            depth: Deepest nesting level of the imports shown
+        """
+        profile = measure_startup()
+        self.imports(profile, top, depth)
+        sys.stdout.write(f'Installs: {profile.create_time * 1000:.1f} ms\n')
+        for name, elapsed in profile.installs.items():
+            sys.stdout.write(f'  {name}: {elapsed * 1000:.1f} ms\n')
+        sys.stdout.write(f'Total: {profile.total * 1000:.1f} ms, budget {CONFIG.flask.startup * 1000:.0f} ms\n')
+
+    def imports(self, profile: StartupProfile, top: int, depth: int):
+        """Show the slowest imports of the startup.
+
+        Args:
+            profile: Startup profile
+            top: Number of the slowest imports shown
+            depth: Deepest nesting level of the imports shown
+        """
+        sys.stdout.write(f'Imports: {profile.import_time * 1000:.1f} ms\n')
+        for name, level, own, cumulative in profile.slowest(top, level=depth):
+            sys.stdout.write(f'  {"  " * (level - 1)}{name}: {cumulative * 1000:.1f} ms, {own * 1000:.1f} ms own\n')
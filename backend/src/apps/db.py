@@ -1,11 +1,9 @@
 from flask import Flask
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 from core.config import CONFIG
 
 db = SQLAlchemy()
-migrate = Migrate()
 
 
 def install(app: Flask):
@@ -23,4 +21,16 @@ def install(app: Flask):
             db=CONFIG.postgres.db,
         ))
     db.init_app(app)
-    migrate.init_app(app, db)
+
+
+def install_migrations(app: Flask):
+    """Install the Flask component for database migrations.
+
+    Alembic is only needed by the migration commands, so it is installed by them rather than at startup.
+
+    Args:
+        app: Flask
+    """
+    from flask_migrate import Migrate
+
+    Migrate(app, db)
@@ -0,0 +1,163 @@
+import functools
+import os
+import threading
+import timeit
+from concurrent import futures
+from secrets import token_hex
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+from flask_security import utils
+from gevent import monkey, threadpool
+from passlib.registry import get_crypt_handler
+from werkzeug.exceptions import ServiceUnavailable
+
+from apps.jaeger import tracing
+from apps.metrics import password_seconds
+from core.config import CONFIG
+
+
+class HashingExecutor:
+    """Bounded pool of native threads for password hashing.
+
+    bcrypt releases the GIL but holds the gevent loop, so hashing inline stalls every other
+    request of the worker. Here hashing runs on native threads while the calling greenlet waits
+    cooperatively. Calls beyond the number of threads wait in a bounded queue, and calls that do
+    not fit in the queue are rejected at once.
+    """
+
+    def __init__(self, workers: int, queue: int):
+        """Initialize the executor, threads are started on first use in every process.
+
+        Args:
+            workers: Number of hashing threads
+            queue: Number of calls waiting for a free thread
+        """
+        self.workers = workers
+        self.queue = queue
+        self._executor: Optional[futures.Executor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self._pid: Optional[int] = None
+
+    def run(self, func: Callable, *args) -> Any:
+        """Call a function in a hashing thread within the current application context.
+
+        Args:
+            func: Function
+            args: Function arguments
+
+        Raises:
+            ServiceUnavailable: Error that all threads are busy and the queue is full
+
+        Returns:
+            Any: Function result
+        """
+        if self._pid != os.getpid():
+            self._start()
+        app = current_app._get_current_object()  # type: ignore[attr-defined]
+        if not self._slots.acquire(blocking=False):  # type: ignore[union-attr]
+            raise ServiceUnavailable('Too many concurrent password checks, try again later!')
+        try:  # noqa: WPS501 the slot is released even if the waiting greenlet is killed
+            return self._executor.submit(self._call, app, func, *args).result()  # type: ignore[union-attr]
+        finally:
+            self._slots.release()  # type: ignore[union-attr]
+
+    def _start(self) -> None:
+        if monkey.is_module_patched('threading'):
+            self._executor = threadpool.ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = futures.ThreadPoolExecutor(max_workers=self.workers)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue)
+        self._pid = os.getpid()
+
+    def _call(self, app, func: Callable, *args) -> Any:
+        with app.app_context():
+            return func(*args)
+
+
+def hash_password(password: str) -> str:
+    """Hash a password off the event loop.
+
+    Args:
+        password: Password
+
+    Returns:
+        str: Password hash
+    """
+    return hashing.run(utils.hash_password, password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Check a password against its hash off the event loop.
+
+    The check is timed and traced as a whole, including the wait for a free hashing thread.
+
+    Args:
+        password: Password
+        password_hash: Password hash
+
+    Returns:
+        bool: Whether the password matches
+    """
+    with password_seconds.time(), tracing.span('password.verify'):
+        return hashing.run(utils.verify_password, password, password_hash)
+
+
+def needs_update(password_hash: str) -> bool:
+    """Check whether a password hash was made with another scheme or cost than the configured ones.
+
+    Args:
+        password_hash: Password hash
+
+    Returns:
+        bool: Whether the password should be hashed again
+    """
+    return current_app.extensions['security'].pwd_context.needs_update(password_hash)
+
+
+def context_settings(scheme: str, rounds: int, memory: int) -> Dict[str, Any]:
+    """Password context settings that hash with the given cost and flag hashes with any other cost for update.
+
+    Args:
+        scheme: Hashing scheme, `bcrypt` or `argon2`
+        rounds: Logarithmic number of rounds for bcrypt, number of iterations for argon2
+        memory: Memory cost in KiB for argon2
+
+    Returns:
+        dict: Settings for `CryptContext.update`
+    """
+    settings = {
+        f'{scheme}__default_rounds': rounds,
+        f'{scheme}__min_desired_rounds': rounds,
+        f'{scheme}__max_desired_rounds': rounds,
+    }
+    if scheme == 'argon2':
+        settings['argon2__memory_cost'] = memory
+    return settings
+
+
+def tune(scheme: str, latency: float, memory: int) -> List[Tuple[int, float]]:
+    """Measure password verification time for an increasing number of rounds until it exceeds the target.
+
+    Args:
+        scheme: Hashing scheme, `bcrypt` or `argon2`
+        latency: Target verification time in milliseconds
+        memory: Memory cost in KiB for argon2
+
+    Returns:
+        list[tuple[int, float]]: Number of rounds and verification time in milliseconds
+    """
+    hasher = get_crypt_handler(scheme)
+    if scheme == 'argon2':
+        hasher = hasher.using(memory_cost=memory)
+    password = token_hex(16)
+    measurements: List[Tuple[int, float]] = []
+    for rounds in range(max(hasher.min_rounds, 1), hasher.max_rounds + 1):
+        verify = functools.partial(hasher.verify, password, hasher.using(rounds=rounds).hash(password))
+        measurements.append((rounds, min(timeit.repeat(verify, number=1, repeat=3)) * 1000))
+        if measurements[-1][1] > latency:
+            break
+    return measurements
+
+
+hashing = HashingExecutor(workers=CONFIG.hashing.workers, queue=CONFIG.hashing.queue)
@@ -0,0 +1,137 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from flask import Flask
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from apps.db import db
+from core.config import CONFIG
+from models.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Write-behind storage of login history.
+
+    In the `sync` mode sessions are inserted by the request that creates them and committed with it.
+    In the `queue` mode they are put into a bounded in-process queue and a background thread inserts
+    them in multi-row batches, so a login does not wait for the partitioned table. Sessions still in
+    the queue are lost if the process is killed; they are flushed on a normal shutdown. When the queue
+    is full, a session is either inserted by the request itself (`sync` overflow) or dropped (`drop`).
+    """
+
+    def __init__(self, mode: str, size: int, batch: int, interval: int, overflow: str):
+        """Initialize the writer, the flusher thread is started on first use in every process.
+
+        Args:
+            mode: `sync` or `queue`
+            size: Maximum number of queued sessions
+            batch: Maximum number of sessions inserted at once
+            interval: Maximum time in milliseconds a session waits in the queue
+            overflow: What to do with a session when the queue is full, `sync` or `drop`
+        """
+        self.queued = mode == 'queue'
+        self.batch = batch
+        self.interval = interval / 1000
+        self.overflow = overflow
+        self.dropped = 0
+        self._queue: 'queue.Queue[Dict]' = queue.Queue(maxsize=size)
+        self._engine: Optional[Engine] = None
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def init_app(self, app: Flask) -> None:
+        """Remember the database engine of the application.
+
+        Args:
+            app: Flask
+        """
+        with app.app_context():
+            self._engine = db.engine
+
+    def put(self, session: Session) -> None:
+        """Queue a session for insertion.
+
+        Args:
+            session: User session with all fields set
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+        row = {column.name: getattr(session, column.key) for column in Session.__table__.columns}
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            if self.overflow == 'sync':
+                self._insert([row])
+            else:
+                self.dropped += 1
+                logger.warning('Login history queue is full, %d sessions dropped so far', self.dropped)
+
+    def flush(self, timeout: float = 5) -> None:
+        """Insert all queued sessions and wait for the batch being inserted by the background thread.
+
+        The batch of a thread that died is never marked as done, so the wait is skipped when the thread is not
+        alive and is bounded otherwise.
+
+        Args:
+            timeout: Maximum time in seconds to wait for the background thread
+        """
+        while not self._queue.empty():
+            self._write(timeout=0)
+        if self._thread is None or not self._thread.is_alive():
+            return
+        with self._queue.all_tasks_done:
+            if not self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout):
+                logger.warning('Login history writer did not finish its batch in %s seconds', timeout)
+
+    def _run(self) -> None:
+        while self.queued:
+            self._write(timeout=self.interval)
+
+    def _write(self, timeout: float) -> None:
+        rows: List[Dict] = []
+        deadline = time.monotonic() + timeout
+        while len(rows) < self.batch:
+            try:
+                rows.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        if rows:
+            self._insert(rows)
+        for _ in rows:
+            self._queue.task_done()
+
+    def _insert(self, rows: List[Dict]) -> None:
+        try:
+            with self._engine.begin() as connection:  # type: ignore[union-attr]
+                connection.execute(Session.__table__.insert(), rows)
+        except SQLAlchemyError:
+            logger.exception('Failed to write %d sessions to the login history', len(rows))
+
+
+history = HistoryWriter(
+    mode=CONFIG.history.mode,
+    size=CONFIG.history.size,
+    batch=CONFIG.history.batch,
+    interval=CONFIG.history.interval,
+    overflow=CONFIG.history.overflow,
+)
+atexit.register(history.flush)
+
+
+def install(app: Flask):
+    """Install the component for writing the login history.
+
+    Args:
+        app: Flask
+    """
+    history.init_app(app)
@@ -0,0 +1,249 @@
+import base64
+import csv
+import functools
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import os
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, cast
+from uuid import UUID
+
+from flask import current_app
+from passlib.context import CryptContext
+from psycopg2.extensions import cursor as Cursor
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.engine import Connection
+
+from apps.hashing import context_settings
+from apps.utils import chunked
+from core.config import CONFIG
+
+# Email, plain password or password hash, and whether it is a hash
+StagedUser = Tuple[str, str, bool]
+
+CREATE_STAGING = text(text="""
+    CREATE TEMPORARY TABLE IF NOT EXISTS import_users (email text, password text) ON COMMIT DELETE ROWS
+""")
+COPY_STAGING = 'COPY import_users (email, password) FROM STDIN WITH (FORMAT csv)'
+INSERT_STAGED = text(text="""
+    WITH imported AS (
+        INSERT INTO users (pk, email, password, active, updated_at)
+        SELECT gen_random_uuid(), email, password, true, :now FROM import_users
+        ON CONFLICT (email) DO NOTHING
+        RETURNING pk
+    ), granted AS (
+        INSERT INTO roles_users (user_pk, role_pk)
+        SELECT imported.pk, role_pk FROM imported, unnest(:role_pks) AS role_pk
+        ON CONFLICT DO NOTHING
+    )
+    SELECT count(*) FROM imported
+""").bindparams(bindparam('role_pks', type_=ARRAY(PostgresUUID(as_uuid=True))))
+
+
+def read_users(lines: Iterator[str], file_format: str) -> Iterator[Dict[str, Any]]:
+    """Parse user records from CSV with a header row or from newline-delimited JSON.
+
+    Records have an `email` and either a plain `password` or a `password_hash` made with the configured salt.
+    Malformed JSON lines are returned as empty records, JSON values are returned as they are.
+
+    Args:
+        lines: Lines of the file, possibly a stream
+        file_format: `csv` or `ndjson`
+
+    Yields:
+        dict[str, Any]: User record
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = {}
+        yield record if isinstance(record, dict) else {}
+
+
+def hash_passwords(passwords: List[str], salt: str, scheme: str, settings: Dict[str, Any]) -> List[str]:
+    """Hash passwords the same way as `hash_password` but without an application, for example in worker processes.
+
+    Like Flask-Security, passwords are signed with the salt before hashing.
+
+    Args:
+        passwords: Passwords
+        salt: Salt, `FLASK_PASSWORD_SALT`
+        scheme: Hashing scheme
+        settings: Settings of the password context made by `context_settings`
+
+    Returns:
+        list[str]: Password hashes
+    """
+    context = CryptContext(schemes=[scheme], **settings)
+    return [
+        context.hash(base64.b64encode(hmac.new(salt.encode(), password.encode(), hashlib.sha512).digest()).decode())
+        for password in passwords
+    ]
+
+
+def password_hasher(rounds: Optional[int] = None) -> Callable[[List[str]], List[str]]:
+    """Make a picklable function hashing passwords with the configured scheme and salt.
+
+    Args:
+        rounds: Hashing cost, the configured one if not set
+
+    Returns:
+        Callable: Function hashing a list of passwords
+    """
+    settings = context_settings(CONFIG.hashing.scheme, rounds or CONFIG.hashing.rounds, CONFIG.hashing.memory)
+    return functools.partial(
+        hash_passwords, salt=CONFIG.flask.password_salt, scheme=CONFIG.hashing.scheme, settings=settings,
+    )
+
+
+class Checkpoint:
+    """Number of input records already imported, kept in a file to resume an interrupted import."""
+
+    def __init__(self, path: Optional[str]):
+        """Read the checkpoint.
+
+        Args:
+            path: File path, the checkpoint is not kept if not set
+        """
+        self.path = path
+        self.offset = 0
+        if path and os.path.exists(path):
+            with open(path) as checkpoint:
+                self.offset = int(checkpoint.read() or 0)
+
+    def save(self, offset: int) -> None:
+        """Replace the checkpoint atomically.
+
+        Args:
+            offset: Number of input records imported
+        """
+        self.offset = offset
+        if not self.path:
+            return
+        with open(f'{self.path}.tmp', 'w') as checkpoint:
+            checkpoint.write(str(offset))
+        os.replace(f'{self.path}.tmp', self.path)
+
+
+class UserImporter:
+    """Loads batches of users with `COPY` into a staging table and inserts them into `users` set-wise.
+
+    Users whose email is already taken are skipped, so a batch loaded again after an interruption changes nothing.
+    """
+
+    hashing_chunk = 64
+
+    def __init__(
+        self, connection: Connection, hasher: Callable[[List[str]], List[str]], pool: Executor, role_pks: List[UUID],
+    ):
+        """Create the staging table.
+
+        Args:
+            connection: Database connection used for the whole import
+            hasher: Picklable function hashing a list of passwords, made by `password_hasher`
+            pool: Executor that runs the hasher, usually a process pool
+            role_pks: IDs of the roles assigned to imported users
+        """
+        self.connection = connection
+        self.hasher = hasher
+        self.pool = pool
+        self.role_pks = role_pks
+        self.pwd_context = current_app.extensions['security'].pwd_context
+        with connection.begin():
+            connection.execute(CREATE_STAGING)
+
+    def run(self, records: Iterator[Dict[str, Any]], progress: Checkpoint, batch: int) -> Iterator[List[int]]:
+        """Load records in batches and save the progress after every batch.
+
+        Args:
+            records: User records following the ones already imported
+            progress: Checkpoint of the import
+            batch: Number of records loaded per transaction
+
+        Yields:
+            list[int]: Running totals of imported, skipped and rejected users
+        """
+        totals = [0, 0, 0]
+        for records_batch in chunked(records, batch):
+            totals = [total + count for total, count in zip(totals, self.load(records_batch))]
+            progress.save(progress.offset + len(records_batch))
+            yield totals
+
+    def load(self, records: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        """Hash the plain passwords of a batch in parallel and insert its users in one transaction.
+
+        Args:
+            records: User records
+
+        Returns:
+            tuple[int, int, int]: Number of imported users, of users skipped because the email is taken
+                and of rejected records without an email or a password
+        """
+        users = [user for user in map(self.parse, records) if user]
+        imported = self.copy(self.hash(users))
+        return imported, len(users) - imported, len(records) - len(users)
+
+    def parse(self, record: Dict[str, Any]) -> Optional[StagedUser]:
+        """Validate a user record.
+
+        Args:
+            record: User record
+
+        Returns:
+            Optional[StagedUser]: User or None if the record has no email or no password, a password hash
+                of an unknown scheme, both a password and a hash, or a field that is not a string
+        """
+        email, password, password_hash = (record.get(field) or '' for field in ('email', 'password', 'password_hash'))
+        if not all(isinstance(field, str) for field in (email, password, password_hash)):
+            return None
+        email = email.strip()
+        if email and password_hash and self.pwd_context.identify(password_hash, required=False):
+            return email, password_hash, True
+        if email and password and not password_hash:
+            return email, password, False
+        return None
+
+    def hash(self, users: List[StagedUser]) -> List[Tuple[str, str]]:
+        """Hash the plain passwords in the process pool.
+
+        Args:
+            users: Users with plain passwords or password hashes
+
+        Returns:
+            list[tuple[str, str]]: Emails and password hashes
+        """
+        plain = [password for _, password, hashed in users if not hashed]
+        hashes = itertools.chain.from_iterable(self.pool.map(self.hasher, chunked(plain, self.hashing_chunk)))
+        return [(email, password if hashed else next(hashes)) for email, password, hashed in users]
+
+    def copy(self, users: List[Tuple[str, str]]) -> int:
+        """Copy users into the staging table and insert the new ones into `users` in one transaction.
+
+        Args:
+            users: Emails and password hashes
+
+        Returns:
+            int: Number of imported users
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(users)
+        buffer.seek(0)
+        with self.connection.begin():
+            cursor = cast(Cursor, self.connection.connection.cursor())
+            cursor.copy_expert(COPY_STAGING, buffer)
+            imported = self.connection.execute(
+                INSERT_STAGED, {'now': datetime.utcnow(), 'role_pks': self.role_pks},
+            ).scalar()
+        return int(imported or 0)
@@ -1,42 +1,203 @@
-from opentelemetry import trace
-from opentelemetry.exporter.jaeger.thrift import JaegerExporter
-from opentelemetry.instrumentation.flask import FlaskInstrumentor
-from opentelemetry.sdk.resources import SERVICE_NAME, Resource
-from opentelemetry.sdk.trace import TracerProvider, export
+import contextlib
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, Optional
 
-from core.config import CONFIG
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
+from core.config import CONFIG, JaegerConfig
 
-def configure_tracer(host: str, port: int):
-    """Configure the tracer.
+if TYPE_CHECKING:
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider, export
 
-    Args:
-        host (str): The host.
-        port (int): The port.
+
+class QuerySpans:
+    """SQLAlchemy listeners that make a span of every query of every engine within sampled requests."""
+
+    def __init__(self, tracer: 'trace.Tracer', sampled: Callable[[], bool], failed: 'trace.Status'):
+        """Initialize the listeners, they are not registered yet.
+
+        Args:
+            tracer: Tracer the spans are made with
+            sampled: Function telling whether the current request is sampled
+            failed: Status of the spans of failed queries
+        """
+        self.tracer = tracer
+        self.sampled = sampled
+        self.failed = failed
+
+    def listen(self) -> None:
+        """Register the listeners for all engines."""
+        event.listen(Engine, 'before_cursor_execute', self.start, named=True)
+        event.listen(Engine, 'after_cursor_execute', self.end, named=True)
+        event.listen(Engine, 'handle_error', self.fail)
+
+    def remove(self) -> None:
+        """Unregister the listeners."""
+        event.remove(Engine, 'before_cursor_execute', self.start)
+        event.remove(Engine, 'after_cursor_execute', self.end)
+        event.remove(Engine, 'handle_error', self.fail)
+
+    def start(self, **execution) -> None:
+        """Start the span of a query and keep it in the execution context.
+
+        Args:
+            execution: Arguments of the `before_cursor_execute` event
+        """
+        if not self.sampled():
+            return
+        statement = execution['statement']
+        operation = statement.split(None, 1)[0].upper() if statement.strip() else 'QUERY'
+        conn = execution['conn']
+        database = conn.engine.url.database
+        execution['context'].trace_span = self.tracer.start_span(
+            f'{operation} {database}' if database else operation,
+            attributes={'db.system': conn.dialect.name, 'db.name': database or '', 'db.statement': statement},
+        )
+
+    def end(self, **execution) -> None:
+        """End the span of a query.
+
+        Args:
+            execution: Arguments of the `after_cursor_execute` event
+        """
+        query_span = getattr(execution['context'], 'trace_span', None)
+        if query_span is not None:
+            query_span.end()
+
+    def fail(self, exception_context) -> None:
+        """End the span of a query with the error it failed with.
+
+        Args:
+            exception_context: Context of the error
+        """
+        query_span = getattr(exception_context.execution_context, 'trace_span', None)
+        if query_span is not None:
+            query_span.record_exception(exception_context.original_exception)
+            query_span.set_status(self.failed)
+            query_span.end()
+
+
+class Tracing:
+    """Spans of the work done within a request: queries, Redis calls, password checks and provider calls.
+
+    Until tracing is configured `span` returns a shared no-op context manager, so that call sites cost a single
+    attribute check and OpenTelemetry is not even imported. Once it is, requests are sampled by their trace ID,
+    or follow the decision of the caller if it passes one. Within requests that are not sampled no spans are
+    made at all, not even non-recording ones.
     """
-    trace.set_tracer_provider(
-        TracerProvider(
+
+    untraced = contextlib.nullcontext()
+
+    def __init__(self):
+        """Initialize tracing as disabled."""
+        self.tracer: Optional['trace.Tracer'] = None
+        self._current_span: Optional[Callable[[], 'trace.Span']] = None
+        self._queries: Optional[QuerySpans] = None
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> ContextManager[Optional['trace.Span']]:
+        """Start a span as a child of the current one.
+
+        Args:
+            name: Span name
+            attributes: Span attributes
+
+        Returns:
+            ContextManager: Context manager that yields the span, or None if tracing is disabled
+        """
+        if self.tracer is None or not self.sampled():
+            return self.untraced
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+    def configure(self, config: JaegerConfig, console: bool = False) -> None:
+        """Set up the tracer provider of the process and start tracing, once per process.
+
+        Args:
+            config: Tracing settings
+            console: Whether to print the spans as well
+        """
+        if self.tracer is not None:
+            return
+        from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+        from opentelemetry.sdk.trace import TracerProvider, export
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        provider = TracerProvider(
             resource=Resource.create({SERVICE_NAME: CONFIG.flask.project_name}),
-        ),
-    )
-    trace.get_tracer_provider().add_span_processor(  # type: ignore[attr-defined]
-        export.BatchSpanProcessor(
-            span_exporter=JaegerExporter(agent_host_name=host, agent_port=port),
-        ),
-    )
-    trace.get_tracer_provider().add_span_processor(  # type: ignore[attr-defined]
-        export.BatchSpanProcessor(
-            span_exporter=export.ConsoleSpanExporter(),
-        ),
-    )
+            sampler=ParentBased(TraceIdRatioBased(config.ratio)),
+        )
+        provider.add_span_processor(export.BatchSpanProcessor(span_exporter=make_exporter(config)))
+        if console:
+            provider.add_span_processor(export.SimpleSpanProcessor(export.ConsoleSpanExporter()))
+        self.start(provider, register=True)
+
+    def start(self, provider: 'TracerProvider', register: bool = False) -> None:
+        """Start making spans with a tracer of the provider, including spans of the queries of all engines.
+
+        Args:
+            provider: Tracer provider
+            register: Whether to make the provider the global one, which the Flask instrumentation uses
+        """
+        from opentelemetry import trace
+
+        if register:
+            trace.set_tracer_provider(provider)
+        self.tracer = provider.get_tracer(__name__)
+        self._current_span = trace.get_current_span
+        self._queries = QuerySpans(self.tracer, self.sampled, trace.Status(trace.StatusCode.ERROR))
+        self._queries.listen()
+
+    def stop(self) -> None:
+        """Stop making spans."""
+        if self._queries is not None:
+            self._queries.remove()
+        self.tracer = None
+        self._queries = None
+
+    def sampled(self) -> bool:
+        """Check whether spans are made within the current request.
+
+        Children of a request that is not sampled would be dropped by the sampler anyway.
+
+        Returns:
+            bool: Whether the current span is recorded or there is none yet
+        """
+        current = self._current_span()  # type: ignore[misc]
+        return current.is_recording() or not current.get_span_context().is_valid
+
+
+def make_exporter(config: JaegerConfig) -> 'export.SpanExporter':
+    """Create the exporter that sends spans to the collector.
+
+    Args:
+        config: Tracing settings
+
+    Returns:
+        SpanExporter: OTLP exporter over gRPC if `JAEGER_EXPORTER` is `otlp`, Jaeger agent exporter otherwise
+    """
+    if config.exporter == 'otlp':
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=config.endpoint, insecure=True)
+    from opentelemetry.exporter.jaeger.thrift import JaegerExporter
+
+    return JaegerExporter(agent_host_name=config.host, agent_port=config.port)
+
+
+tracing = Tracing()
 
 
 def install(app):
     """Install the Flask component for monitoring using distributed request tracing.
 
+    OpenTelemetry is imported only when tracing is enabled, so that it does not slow down the startup otherwise.
+    `JAEGER_RATIO` of the requests are traced, and spans are printed to the console as well with `JAEGER_CONSOLE`.
+
     Args:
         app: Flask
     """
     if CONFIG.jaeger.enabled:
-        configure_tracer(host=CONFIG.jaeger.host, port=CONFIG.jaeger.port)
+        from opentelemetry.instrumentation.flask import FlaskInstrumentor
+
+        tracing.configure(CONFIG.jaeger, console=CONFIG.jaeger.console)
         FlaskInstrumentor().instrument_app(app)
@@ -1,8 +1,15 @@
-from flask import Flask
+from typing import Union
+from uuid import UUID
+
+from flask import Flask, g
 from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token
-from redis import Redis
 
-from apps.security import user_datastore as postgres
+from apps.blocklist import blocklist
+from apps.cache import bus
+from apps.keys import keyring
+from apps.metrics import tokens_issued
+from apps.principals import Principal, principals
+from apps.redis import redis_client
 from core.config import CONFIG
 from models.user import User
 
@@ -10,17 +17,19 @@ from models.user import User
 class AccessToken:
     """Token for accessing resources."""
 
-    def __init__(self, user: User):
+    def __init__(self, user: Union[User, Principal], generation: int = 0):
         """Generate a token for the user during initialization.
 
         Args:
             user: User
+            generation: Generation of the user's tokens
         """
         self.access_token = create_access_token(
             identity=user.email,
             additional_claims={
                 'roles': [role.name for role in user.roles],
                 'user_id': user.pk,
+                'generation': generation,
             },
         )
 
@@ -28,22 +37,24 @@ class AccessToken:
 class RefreshToken:
     """Token for obtaining new tokens in exchange for old ones."""
 
-    def __init__(self, user: User):
+    def __init__(self, user: Union[User, Principal], generation: int = 0):
         """Generate a token for the user during initialization.
 
         Args:
             user: User
+            generation: Generation of the user's tokens
         """
         self.refresh_token = create_refresh_token(
             identity=user.email,
             additional_claims={
                 'roles': [role.name for role in user.roles],
                 'user_id': user.pk,
+                'generation': generation,
             },
         )
 
 
-def generate_tokens(user: User) -> dict:
+def generate_tokens(user: Union[User, Principal]) -> dict:
     """Generate a pair of user keys.
 
     Args:
@@ -52,11 +63,56 @@ def generate_tokens(user: User) -> dict:
     Returns:
         dict: Access key and refresh key
     """
-    return {**AccessToken(user).__dict__, **RefreshToken(user).__dict__}
+    generation = blocklist.generation(user.pk)
+    tokens = {**AccessToken(user, generation).__dict__, **RefreshToken(user, generation).__dict__}
+    tokens_issued.labels('access').inc()
+    tokens_issued.labels('refresh').inc()
+    return tokens
+
+
+def add_key_id(identity) -> dict:
+    """Choose the signing key for a new token and put its ID in the token header.
+
+    Args:
+        identity: Token identity
+
+    Returns:
+        dict: Additional token headers
+    """
+    g.signing_key = keyring.signing_key
+    return {'kid': g.signing_key.kid}
+
+
+def get_encode_key(identity):
+    """Get the private key chosen for a new token by `add_key_id`.
+
+    Args:
+        identity: Token identity
+
+    Returns:
+        Private key
+    """
+    return g.pop('signing_key', keyring.signing_key).private_key
+
+
+def get_decode_key(jwt_header: dict, jwt_payload: dict):
+    """Get the key to verify a token with by the key ID from its header.
+
+    Tokens signed with the Flask secret key before the switch to asymmetric signing have no key ID.
+
+    Args:
+        jwt_header: Token header
+        jwt_payload: Unverified token payload
+
+    Returns:
+        Public key or the secret key
+    """
+    if jwt_header['alg'].startswith('HS'):
+        return CONFIG.flask.secret_key
+    return keyring.get(jwt_header.get('kid')).public_key
 
 
 jwt = JWTManager()
-jwt_redis_blocklist = Redis(host=CONFIG.redis.host, port=CONFIG.redis.port)
 
 
 def install(app: Flask):
@@ -67,15 +123,25 @@ def install(app: Flask):
     """
     app.config['SECRET_KEY'] = CONFIG.flask.secret_key
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = CONFIG.flask.access_token_expires_by_sec
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = CONFIG.flask.refresh_token_expires_by_sec
+    app.config['JWT_ALGORITHM'] = CONFIG.jwt.algorithm
+    app.config['JWT_DECODE_ALGORITHMS'] = [CONFIG.jwt.algorithm]
+    if CONFIG.jwt.legacy and CONFIG.jwt.algorithm != 'HS256':
+        app.config['JWT_DECODE_ALGORITHMS'].append('HS256')
     jwt.init_app(app)
+    bus.start(redis_client)
+    if not CONFIG.jwt.algorithm.startswith('HS'):
+        # Key files are only listed here, they are loaded when the first token is signed or verified
+        if not any(keyring.directory.glob('*.pem')):
+            keyring.rotate()
+        jwt.additional_headers_loader(add_key_id)
+        jwt.encode_key_loader(get_encode_key)
+        jwt.decode_key_loader(get_decode_key)
 
     @jwt.token_in_blocklist_loader
     def check_if_token_is_revoked(jwt_header, jwt_payload: dict):
-        jti = jwt_payload['jti']
-        token_in_redis = jwt_redis_blocklist.get(jti)
-        return token_in_redis is not None
+        return blocklist.is_revoked(jwt_payload)
 
     @jwt.user_lookup_loader
     def user_lookup_callback(jwt_header, jwt_data):
-        email = jwt_data['sub']
-        return postgres.find_user(email=email)
+        return principals.get(UUID(jwt_data['user_id']))
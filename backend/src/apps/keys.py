@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from secrets import token_hex
+from typing import Any, Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import InvalidTokenError
+
+from core.config import CONFIG
+
+
+def generate_private_key(algorithm: str) -> Any:
+    """Generate a private key suitable for the signing algorithm.
+
+    Args:
+        algorithm: JWS algorithm name
+
+    Raises:
+        ValueError: Error that the algorithm is not asymmetric or not supported
+
+    Returns:
+        Any: Private key
+    """
+    if algorithm.startswith(('RS', 'PS')):
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    curves = {'ES256': ec.SECP256R1(), 'ES384': ec.SECP384R1(), 'ES512': ec.SECP521R1()}
+    curve = curves.get(algorithm)
+    if curve is not None:
+        return ec.generate_private_key(curve)
+    if algorithm == 'EdDSA':
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f'Algorithm {algorithm} is not supported for asymmetric signing!')
+
+
+class SigningKey:
+    """Private key identified by a key ID (`kid`) that starts with its creation time."""
+
+    def __init__(self, kid: str, private_key: Any, algorithm: str):
+        """Initialize the key.
+
+        Args:
+            kid: Key ID
+            private_key: Private key
+            algorithm: JWS algorithm name
+        """
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self.algorithm = algorithm
+        self.created = int(kid.split('-', 1)[0])
+
+    @property
+    def jwk(self) -> Dict[str, str]:
+        """Public part of the key as a JSON Web Key.
+
+        Returns:
+            dict: JSON Web Key
+        """
+        jwk = json.loads(get_default_algorithms()[self.algorithm].to_jwk(self.public_key))
+        return {**jwk, 'kid': self.kid, 'alg': self.algorithm, 'use': 'sig'}
+
+    def save(self, directory: Path) -> None:
+        """Write the private key to a PEM file in the directory that only the owner can read.
+
+        The file is renamed into place once written, so that workers never load a partial key.
+
+        Args:
+            directory: Directory with the keys
+        """
+        pem = self.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+        path = directory / f'{self.kid}.pem'
+        descriptor = os.open(path.with_suffix('.tmp'), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, 'wb') as key_file:
+            key_file.write(pem)
+        os.rename(path.with_suffix('.tmp'), path)
+
+
+class KeyRing:
+    """Signing keys stored as PEM files in a directory shared by all workers.
+
+    Every key in the directory is accepted for verification and published in the JWKS. New tokens
+    are signed with the newest key that is older than the activation delay, so that services which
+    cache the JWKS learn about a key before they meet tokens signed with it.
+    """
+
+    def __init__(self, directory: str, algorithm: str, delay: int):
+        """Initialize an empty key ring.
+
+        Args:
+            directory: Directory with the keys
+            algorithm: JWS algorithm name
+            delay: Seconds between the creation of a key and its use for signing
+        """
+        self.directory = Path(directory)
+        self.algorithm = algorithm
+        self.delay = delay
+        self._keys: Dict[str, SigningKey] = {}
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def keys(self) -> List[SigningKey]:
+        """Keys from the directory, oldest first.
+
+        Returns:
+            list[SigningKey]: Keys
+        """
+        self._reload()
+        return sorted(self._keys.values(), key=lambda key: key.kid)
+
+    @property
+    def signing_key(self) -> SigningKey:
+        """Key that new tokens are signed with.
+
+        Returns:
+            SigningKey: The newest active key, or the newest key if none is active yet
+        """
+        keys = self.keys
+        active = [key for key in keys if key.created <= time.time() - self.delay]
+        return (active or keys)[-1]
+
+    def get(self, kid: Optional[str]) -> SigningKey:
+        """Get a key to verify a token with.
+
+        Args:
+            kid: Key ID from the token header
+
+        Raises:
+            InvalidTokenError: Error that the token is signed with an unknown key
+
+        Returns:
+            SigningKey: Key
+        """
+        self._reload()
+        if kid not in self._keys:
+            raise InvalidTokenError('Token is signed with an unknown key')
+        return self._keys[kid]  # type: ignore[index]
+
+    def rotate(self) -> SigningKey:
+        """Create a new key that becomes the signing key after the activation delay.
+
+        Returns:
+            SigningKey: New key
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        kid = '{created}-{suffix}'.format(created=int(time.time()), suffix=token_hex(4))
+        key = SigningKey(kid, generate_private_key(self.algorithm), self.algorithm)
+        key.save(self.directory)
+        return key
+
+    def prune(self, max_age: int) -> List[str]:
+        """Delete keys that were replaced before the tokens signed with them could have expired.
+
+        A key stops signing once its successor becomes active, so it is kept for `max_age` after that.
+
+        Args:
+            max_age: Lifetime of the longest-living token in seconds
+
+        Returns:
+            list[str]: IDs of the deleted keys
+        """
+        keys = self.keys
+        pruned = []
+        for key, successor in zip(keys, keys[1:]):
+            if successor.created + self.delay + max_age < time.time():
+                (self.directory / f'{key.kid}.pem').unlink()
+                pruned.append(key.kid)
+        return pruned
+
+    def _reload(self) -> None:
+        try:
+            mtime = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            keys = {}
+            for path in self.directory.glob('*.pem'):
+                private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+                keys[path.stem] = SigningKey(path.stem, private_key, self.algorithm)
+            self._keys = keys
+            self._mtime = mtime
+
+
+keyring = KeyRing(directory=CONFIG.jwt.keys, algorithm=CONFIG.jwt.algorithm, delay=CONFIG.jwt.delay)
@@ -1,16 +1,346 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask, g, request
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from jwt import PyJWTError
+from limits import RateLimitItem, WindowStats
+from limits.strategies import RateLimiter
+from redis import Redis
+from redis.exceptions import RedisError
+
+from apps.redis import redis_client
+from core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def client_address() -> str:
+    """Address of the client that NGINX received the request from.
+
+    NGINX appends the address of its peer to `X-Forwarded-For`, so the address is taken that many entries from
+    the end as there are trusted proxies, the entries before it are set by the client and can be forged.
+
+    Returns:
+        str: IP address
+    """
+    forwarded = [address.strip() for address in request.headers.get('X-Forwarded-For', '').split(',')]
+    forwarded = [address for address in forwarded if address]
+    if CONFIG.limiter.proxies and len(forwarded) >= CONFIG.limiter.proxies:
+        return forwarded[-CONFIG.limiter.proxies]
+    return request.remote_addr or '127.0.0.1'
+
+
+def request_key() -> str:
+    """Key that requests are limited by: the user for requests with a valid token and the client address otherwise.
+
+    Returns:
+        str: `user:<user_id>` or `ip:<address>`
+    """
+    if 'rate_limit_key' in g:
+        return g.rate_limit_key
+    g.rate_limit_key = f'ip:{client_address()}'
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme == 'Bearer' and token:
+        try:
+            g.rate_limit_key = 'user:{user_id}'.format(user_id=decode_token(token)['user_id'])
+        except (JWTExtendedException, PyJWTError, KeyError) as error:
+            logger.debug('Request is limited by the client address, its token is not valid: %s', error)
+    return g.rate_limit_key
+
+
+class Lease:
+    """Quota leased by the worker from the shared bucket of a key."""
+
+    __slots__ = ('limit', 'tokens', 'expires_at')
+
+    def __init__(self, limit: RateLimitItem, tokens: int, expires_at: float):
+        """Initialize the lease.
+
+        Args:
+            limit: Limit that defines the bucket the tokens are returned to
+            tokens: Number of requests that may be admitted without asking Redis
+            expires_at: Monotonic time after which the remaining tokens are returned
+        """
+        self.limit = limit
+        self.tokens = tokens
+        self.expires_at = expires_at
+
+
+class WorkerLeases:
+    """Leases held by the worker, the thread returning unused tokens is started on first use in every process."""
+
+    def __init__(self, ttl: float, give_back: Callable[[Dict[str, Lease]], None]):
+        """Initialize an empty set of leases.
+
+        Args:
+            ttl: Time in seconds after which unused leased tokens are returned
+            give_back: Function returning the unused tokens of leases by their keys to Redis
+        """
+        self.ttl = ttl
+        self.give_back = give_back
+        self.leases: Dict[str, Lease] = {}
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def spend(self, key: str, cost: int) -> Optional[int]:
+        """Take tokens from the lease of the key, the lease is dropped if it is expired or runs short.
+
+        Args:
+            key: Limited key
+            cost: Number of tokens the request takes
+
+        Returns:
+            Optional[int]: None if the request is admitted, otherwise the unused tokens of the dropped lease
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.leases.clear()
+            threading.Thread(target=self._return_unused, name='limiter-leases', daemon=True).start()
+        with self._lock:
+            lease = self.leases.get(key)
+            if lease and lease.expires_at > time.monotonic() and lease.tokens >= cost:
+                lease.tokens -= cost
+                return None
+            return self.leases.pop(key).tokens if lease else 0
+
+    def grant(self, key: str, limit: RateLimitItem, tokens: int) -> None:
+        """Lease tokens taken from the bucket of the key until the lease TTL or the limit period runs out.
+
+        Args:
+            key: Limited key
+            limit: Limit
+            tokens: Number of tokens
+        """
+        lease = Lease(limit, tokens, time.monotonic() + min(self.ttl, limit.get_expiry()))
+        with self._lock:
+            self.leases[key] = lease
+
+    def available(self, key: str) -> int:
+        """Number of tokens left in the lease of the key.
+
+        Args:
+            key: Limited key
+
+        Returns:
+            int: Number of tokens, 0 if the lease is expired
+        """
+        lease = self.leases.get(key)
+        return lease.tokens if lease and lease.expires_at > time.monotonic() else 0
+
+    def forget(self, key: Optional[str] = None) -> None:
+        """Drop the lease of a key or all leases without returning them, for example after the buckets are reset.
+
+        Args:
+            key: Limited key, all leases are dropped if not passed
+        """
+        with self._lock:
+            if key is None:
+                self.leases.clear()
+            else:
+                self.leases.pop(key, None)
+
+    def release(self, everything: bool = False) -> None:
+        """Return the unused tokens of expired leases to Redis.
 
-rate_limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=['10/second'],
-    strategy='moving-window',
+        Args:
+            everything: Whether to return the tokens of leases that have not expired yet as well
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = {
+                key: self.leases.pop(key)
+                for key, lease in list(self.leases.items())
+                if everything or lease.expires_at <= now
+            }
+        self.give_back(expired)
+
+    def _return_unused(self) -> None:
+        while True:
+            time.sleep(self.ttl)
+            try:
+                self.release()
+            except RedisError as error:
+                logger.warning('Unused rate limit tokens are not returned: %s', error)
+
+
+class LeasedRateLimiter(RateLimiter):
+    """Two-tier token bucket limiter: shared buckets in Redis and leases of their tokens in every worker.
+
+    Every limited key has a token bucket in Redis that holds up to the limit amount and refills over the limit
+    period. A worker takes tokens from it in chunks and admits requests from the leased tokens without a network
+    hop, so only refills of the lease go to Redis. Tokens not used within `lease_ttl` are returned to the bucket
+    by a background thread. A chunk is at most a `share`-th of the limit, so that workers serving the same key
+    do not starve each other.
+    """
+
+    share = 4
+    prefix = 'LIMITS:'
+    take = """
+        local capacity, period = tonumber(ARGV[1]), tonumber(ARGV[2])
+        local now = redis.call('TIME')
+        now = now[1] * 1000 + math.floor(now[2] / 1000)
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+        local tokens = tonumber(bucket[1]) or capacity
+        local elapsed = now - (tonumber(bucket[2]) or now)
+        tokens = math.min(capacity, tokens + tonumber(ARGV[3]) + elapsed * capacity / period)
+        local taken = math.min(tonumber(ARGV[4]), math.floor(tokens))
+        tokens = tokens - taken
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', now)
+        redis.call('PEXPIRE', KEYS[1], period)
+        return {taken, tostring(tokens)}
+    """
+
+    def __init__(self, redis: Redis, lease: int, lease_ttl: float):
+        """Initialize the limiter.
+
+        Args:
+            redis: Redis client
+            lease: Maximum number of tokens leased at once
+            lease_ttl: Time in seconds after which unused leased tokens are returned
+        """
+        self.redis = redis
+        self.lease = lease
+        self.held = WorkerLeases(lease_ttl, self._give_back)
+        self._take = redis.register_script(self.take)
+
+    def hit(self, limit: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        """Admit a request from the leased tokens of the key, leasing more from Redis when they run out.
+
+        Args:
+            limit: Limit
+            identifiers: Key parts
+            cost: Number of tokens the request takes
+
+        Returns:
+            bool: Whether the request is admitted
+        """
+        key = limit.key_for(*identifiers)
+        unused = self.held.spend(key, cost)
+        if unused is None:
+            return True
+        chunk = max(cost, min(self.lease, limit.amount // self.share))
+        taken = int(self._take_tokens(limit, key, unused, chunk)[0])
+        if taken < cost:
+            if taken:
+                self._take_tokens(limit, key, taken, 0)
+            return False
+        self.held.grant(key, limit, taken - cost)
+        return True
+
+    def test(self, limit: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        """Check that a request would be admitted without taking tokens.
+
+        Args:
+            limit: Limit
+            identifiers: Key parts
+            cost: Number of tokens the request would take
+
+        Returns:
+            bool: Whether the request would be admitted
+        """
+        return self.get_window_stats(limit, *identifiers).remaining >= cost
+
+    def get_window_stats(self, limit: RateLimitItem, *identifiers: str) -> WindowStats:
+        """Number of tokens available to the key in Redis and in the lease of this worker.
+
+        Args:
+            limit: Limit
+            identifiers: Key parts
+
+        Returns:
+            WindowStats: Time when the bucket is full again as a UNIX timestamp and the number of tokens
+        """
+        key = limit.key_for(*identifiers)
+        shared = float(self._take_tokens(limit, key, 0, 0)[1])
+        missing = limit.amount - shared
+        reset_time = int(time.time() + missing * limit.get_expiry() / limit.amount)
+        return WindowStats(reset_time, int(shared) + self.held.available(key))
+
+    def clear(self, limit: RateLimitItem, *identifiers: str) -> None:
+        """Fill the bucket of the key and drop the lease of this worker.
+
+        Args:
+            limit: Limit
+            identifiers: Key parts
+        """
+        key = limit.key_for(*identifiers)
+        self.held.forget(key)
+        self.redis.delete(f'{self.prefix}{key}')
+
+    def _give_back(self, leases: Dict[str, Lease]) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for key, lease in leases.items():
+            if lease.tokens:
+                self._take_tokens(lease.limit, key, lease.tokens, 0, client=pipe)
+        if len(pipe):
+            pipe.execute()
+
+    def _take_tokens(
+        self, limit: RateLimitItem, key: str, unused: int, wanted: int, client: Optional[Redis] = None,
+    ) -> Any:
+        arguments = [limit.amount, limit.get_expiry() * 1000, unused, wanted]
+        return self._take(keys=[f'{self.prefix}{key}'], args=arguments, client=client)
+
+
+class LeasingLimiter(Limiter):
+    """Flask-Limiter extension that leases quota from Redis in chunks when `lease` is set."""
+
+    def __init__(self, *args, lease: int = 0, lease_ttl: float = 1, **kwargs):
+        """Initialize the extension.
+
+        Args:
+            args: `Limiter` arguments
+            lease: Maximum number of tokens leased at once, the configured strategy is used if 0
+            lease_ttl: Time in seconds after which unused leased tokens are returned
+            kwargs: `Limiter` keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+        self.lease = lease
+        self.lease_ttl = lease_ttl
+
+    def init_app(self, app: Flask) -> None:
+        """Initialize the extension for the application and replace the strategy with leasing if it is enabled.
+
+        Args:
+            app: Flask
+        """
+        super().init_app(app)
+        if self.lease:
+            self._limiter = LeasedRateLimiter(redis_client, self.lease, self.lease_ttl)
+
+    def reset(self) -> None:
+        """Reset the counters in Redis and the leases of this worker."""
+        super().reset()
+        if isinstance(self._limiter, LeasedRateLimiter):
+            self._limiter.held.forget()
+
+
+rate_limiter = LeasingLimiter(
+    key_func=request_key,
+    default_limits=[CONFIG.limiter.default],
+    strategy=CONFIG.limiter.strategy,
+    storage_uri='redis://',
+    storage_options={'connection_pool': redis_client.connection_pool},
+    lease=CONFIG.limiter.lease,
+    lease_ttl=CONFIG.limiter.hold,
 )
+login_limit = rate_limiter.limit(CONFIG.limiter.login, methods=['POST'])
+reads_limit = rate_limiter.limit(CONFIG.limiter.reads, methods=['GET'])
 
 
 def install(app):
     """Install the Flask component for limiting the number of requests to the server.
 
+    Counters are kept in Redis and shared by all workers. The default sliding window counter strategy
+    keeps two counters per key instead of an entry per request like the moving window. With `LIMITER_LEASE`
+    set, workers admit requests from quota leased from Redis in chunks instead.
+
     Args:
         app: Flask
     """
@@ -0,0 +1,37 @@
+import logging
+
+from flask import Flask, g, request
+
+from core.config import CONFIG
+
+
+class RequestIdFilter(logging.Filter):
+    """A class for an additional log message filter to add request ID information to log messages."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add log information to log messages.
+
+        Args:
+            record: The record being processed.
+
+        Returns:
+            bool: A non-zero value to log the record.
+        """
+        record.request_id = request.headers.get('X-Request-Id', g.request_id)
+        return True
+
+
+def install(app: Flask, name: str):
+    """Set up the application logger, shipping the records to Logstash if it is enabled.
+
+    Args:
+        app: Flask
+        name: Logger name
+    """
+    app.logger = logging.getLogger(name)
+    app.logger.setLevel(logging.INFO)
+    app.logger.addFilter(RequestIdFilter())
+    if CONFIG.logstash.enabled:
+        from logstash import LogstashHandler
+
+        app.logger.addHandler(LogstashHandler(CONFIG.logstash.host, CONFIG.logstash.port, version=1))
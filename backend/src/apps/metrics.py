@@ -0,0 +1,131 @@
+import os
+import time
+
+from flask import Flask, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import Pool, QueuePool
+
+from apps.db import db
+from apps.limiter import rate_limiter
+from core.config import CONFIG
+
+PROVIDER_LABELS = ('provider',)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+request_seconds = Histogram('auth_request_seconds', 'Time to handle a request', ['method', 'endpoint', 'status'])
+rate_limited = Counter('auth_rate_limited', 'Requests rejected by the rate limiter', ['endpoint'])
+logins = Counter('auth_logins', 'Logins by method, password or OAuth provider, and result', ['method', 'result'])
+tokens_issued = Counter('auth_tokens_issued', 'Issued tokens', ['type'])
+password_seconds = Histogram(
+    'auth_password_verify_seconds', 'Time to check a password, including the wait for a hashing thread',
+)
+blocklist_seconds = Histogram(
+    'auth_blocklist_lookup_seconds', 'Time to check whether a token is revoked', ['source'], buckets=FAST_BUCKETS,
+)
+blocklist_lookups = Counter(
+    'auth_blocklist_lookups', 'Token revocation checks answered by the local copy or by Redis', ['source', 'revoked'],
+)
+provider_requests = Counter('auth_provider_requests', 'Attempted requests to OAuth providers', PROVIDER_LABELS)
+provider_failures = Counter(
+    'auth_provider_failures', 'Requests to OAuth providers that failed or ended with a server error', PROVIDER_LABELS,
+)
+provider_retries = Counter('auth_provider_retries', 'Retried requests to OAuth providers', PROVIDER_LABELS)
+provider_rejected = Counter(
+    'auth_provider_rejected', 'Requests to OAuth providers rejected by the open circuit breaker', PROVIDER_LABELS,
+)
+provider_seconds = Histogram('auth_provider_request_seconds', 'Time of an OAuth provider request', PROVIDER_LABELS)
+pool_checked_out = Gauge(
+    'auth_db_pool_checked_out', 'Database connections in use', multiprocess_mode='livesum',
+)
+pool_overflow = Gauge(
+    'auth_db_pool_overflow', 'Database connections open beyond the pool size', multiprocess_mode='livesum',
+)
+
+
+def start_timer() -> None:
+    """Remember when the request started."""
+    g.request_start = time.perf_counter()
+
+
+def observe_request(response: Response) -> Response:
+    """Record the duration of the request and whether it was rejected by the rate limiter.
+
+    Args:
+        response: Response
+
+    Returns:
+        Response: The same response
+    """
+    endpoint = request.endpoint or 'none'
+    if response.status_code == 429:
+        rate_limited.labels(endpoint).inc()
+    start = g.pop('request_start', None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        request_seconds.labels(request.method, endpoint, response.status_code).observe(elapsed)
+    return response
+
+
+def watch_pool(pool: Pool) -> None:
+    """Keep the gauges of the connections in use and of the overflow connections up to date.
+
+    The overflow is sampled when a connection is checked out, which is when it can grow.
+
+    Args:
+        pool: Connection pool of the engine
+    """
+    if not isinstance(pool, QueuePool):
+        return
+
+    def checkout(*args):
+        pool_checked_out.inc()
+        pool_overflow.set(max(pool.overflow(), 0))
+
+    def checkin(*args):
+        pool_checked_out.dec()
+
+    event.listen(pool, 'checkout', checkout)
+    event.listen(pool, 'checkin', checkin)
+
+
+@rate_limiter.exempt
+def metrics() -> Response:
+    """Metrics in the Prometheus text format, summed over all workers if `PROMETHEUS_MULTIPROC_DIR` is set.
+
+    Returns:
+        Response: Metrics
+    """
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def install(app: Flask):
+    """Install the Flask component exposing metrics at `/metrics`, unless `METRICS_ENABLED` is false.
+
+    Metrics are kept in memory, and with `PROMETHEUS_MULTIPROC_DIR` set, in files of that directory shared by
+    the gunicorn workers. The request hooks are installed before the rate limiter, so that rejected requests are
+    timed as well.
+
+    Args:
+        app: Flask
+    """
+    if not CONFIG.metrics.enabled:
+        return
+    app.before_request(start_timer)
+    app.after_request(observe_request)
+    app.add_url_rule('/metrics', view_func=metrics)
+    with app.app_context():
+        watch_pool(db.engine.pool)
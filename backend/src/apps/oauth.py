@@ -1,18 +1,27 @@
 import abc
+from typing import TYPE_CHECKING, Dict, Optional
 
 from flask import Flask, redirect, url_for
-from rauth import OAuth2Service
 from werkzeug import Response
+from werkzeug.exceptions import Unauthorized
 
-from apps.utils import decode_json
 from core.config import CONFIG
 from core.enums import OAuthProviders
 
+if TYPE_CHECKING:
+    from rauth import OAuth2Service
+
+    from apps.providers import ProviderClient
+
 
 class OAuthSignIn(abc.ABC):
-    """Abstract class for implementing OAuth providers."""
+    """Abstract class for implementing OAuth providers.
+
+    `rauth` builds the authorization URL, the requests to the provider are made by its shared `ProviderClient`.
+    """
 
-    service: OAuth2Service = None
+    service: 'OAuth2Service' = None
+    client: 'ProviderClient'
 
     @abc.abstractmethod
     def callback(self, code: str) -> str:
@@ -42,17 +51,39 @@ class OAuthSignIn(abc.ABC):
             redirect_uri=self.callback_url,
         ))
 
+    def request_token(self, **data) -> dict:
+        """Exchange an authorization code for an access token.
+
+        Args:
+            data: Token request parameters
+
+        Raises:
+            Unauthorized: Error that the provider refused to issue a token
+
+        Returns:
+            dict: Token response of the provider
+        """
+        data.update(client_id=self.service.client_id, client_secret=self.service.client_secret)
+        response = self.client.request('POST', self.service.access_token_url, data=data)
+        if not response.ok:
+            raise Unauthorized(f'Failed to authenticate the user with the provider {self.service.name}!')
+        return response.json()
+
 
 class YandexSignIn(OAuthSignIn):
     """Class for implementing the Yandex provider that uses OAuth2."""
 
-    def __init__(self, client_id: str, client_secret: str):
+    def __init__(self, client_id: str, client_secret: str, client: 'ProviderClient'):
         """Initialize with the client_id and client_secret assigned to the application in Yandex.
 
         Args:
             client_id (str): Application identifier
             client_secret (str): Secret code
+            client (ProviderClient): HTTP client of the provider
         """
+        from rauth import OAuth2Service
+
+        self.client = client
         self.service = OAuth2Service(
             name='yandex',
             client_id=client_id,
@@ -71,25 +102,28 @@ class YandexSignIn(OAuthSignIn):
         Returns:
             str: The user's ID on Yandex.
         """
-        data = {
-            'code': code,
-            'grant_type': 'authorization_code',
-        }
-        oauth_session = self.service.get_auth_session(data=data, decoder=decode_json)
-        response = oauth_session.get('info').json()
-        return response['id']
+        token = self.request_token(code=code, grant_type='authorization_code')
+        query = {'access_token': token['access_token']}
+        response = self.client.request('GET', f'{self.service.base_url}info', params=query)
+        if not response.ok:
+            raise Unauthorized('Failed to authenticate the user with the provider yandex!')
+        return response.json()['id']
 
 
 class VkSignIn(OAuthSignIn):
     """Class for implementing the VK provider that uses OAuth2."""
 
-    def __init__(self, client_id: str, client_secret: str):
+    def __init__(self, client_id: str, client_secret: str, client: 'ProviderClient'):
         """Initialize with the application's client_id and client_secret assigned in VK.
 
         Args:
             client_id: Application identifier
             client_secret: Secret code
+            client: HTTP client of the provider
         """
+        from rauth import OAuth2Service
+
+        self.client = client
         self.service = OAuth2Service(
             name='vk',
             client_id=client_id,
@@ -108,28 +142,27 @@ class VkSignIn(OAuthSignIn):
         Returns:
             str: User ID on VK
         """
-        data = {
-            'code': code,
-            'grant_type': 'authorization_code',
-            'redirect_uri': self.callback_url,
-        }
-        response = self.service.get_raw_access_token(data=data).json()
-        return response['user_id']
+        token = self.request_token(code=code, grant_type='authorization_code', redirect_uri=self.callback_url)
+        return token['user_id']
 
 
 def install(app: Flask):
     """Set up Flask application configuration for OAuth providers.
 
+    Only the providers the application is registered with are set up, the others are kept as None. `rauth` and
+    the HTTP clients are imported only then, so that they do not slow down the startup otherwise.
+
     Args:
         app: Flask
     """
-    app.config['OAUTH_PROVIDERS'] = {
-        OAuthProviders.YANDEX.value: YandexSignIn(
-            client_id=CONFIG.yandex.id,
-            client_secret=CONFIG.yandex.secret,
-        ),
-        OAuthProviders.VK.value: VkSignIn(
-            client_id=CONFIG.vk.id,
-            client_secret=CONFIG.vk.secret,
-        ),
+    sign_ins = {
+        OAuthProviders.YANDEX.value: (YandexSignIn, CONFIG.yandex),
+        OAuthProviders.VK.value: (VkSignIn, CONFIG.vk),
     }
+    providers: Dict[str, Optional[OAuthSignIn]] = dict.fromkeys(sign_ins)
+    for name, (sign_in, config) in sign_ins.items():
+        if config.id and config.secret:
+            from apps.providers import clients
+
+            providers[name] = sign_in(client_id=config.id, client_secret=config.secret, client=clients[name])
+    app.config['OAUTH_PROVIDERS'] = providers
@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from flask_sqlalchemy.query import Query
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
+
+from apps.cache import LRUCache, bus
+from apps.db import db
+from core.config import CONFIG
+from models.session import Session
+from models.user import User
+
+
+class PrincipalRole:
+    """Detached copy of a user role."""
+
+    def __init__(self, name: str, description: Optional[str]):
+        """Copy the role fields.
+
+        Args:
+            name: Role name
+            description: Role description
+        """
+        self.name = name
+        self.description = description
+
+    def __repr__(self) -> str:
+        """
+        Representation of the role as its name, the same as for the `Role` model.
+
+        Returns:
+            str: Role name
+        """
+        return self.name.title()
+
+
+class Principal:
+    """Detached copy of an authenticated user that is safe to share between requests."""
+
+    def __init__(self, user: User):
+        """Copy the fields of the user that are needed to serve authenticated requests.
+
+        Args:
+            user: User
+        """
+        self.pk: UUID = user.pk
+        self.email: str = user.email
+        self.updated_at: Optional[datetime] = user.updated_at
+        self.roles: List[PrincipalRole] = [PrincipalRole(role.name, role.description) for role in user.roles]
+
+    @property
+    def sessions(self) -> Query:
+        """Login history of the user, newest first.
+
+        Returns:
+            Query: Query of user sessions
+        """
+        return Session.query.filter(Session.user_pk == self.pk).order_by(Session.event_date.desc())
+
+    def sessions_before(self, event_date: Optional[datetime] = None, pk: Optional[UUID] = None) -> Query:
+        """Login history of the user older than the given session, newest first, for keyset pagination.
+
+        The plain date condition lets PostgreSQL skip the monthly partitions of later sessions.
+
+        Args:
+            event_date: Date of the last session of the previous page
+            pk: ID of the last session of the previous page
+
+        Returns:
+            Query: Query of user sessions
+        """
+        query = Session.query.filter(Session.user_pk == self.pk)
+        if event_date and pk:
+            query = query.filter(
+                Session.event_date <= event_date,
+                tuple_(Session.event_date, Session.pk) < tuple_(event_date, pk),
+            )
+        return query.order_by(Session.event_date.desc(), Session.pk.desc())
+
+
+class PrincipalCache:
+    """Per-worker cache of authenticated users with invalidation across all workers."""
+
+    channel = 'principals'
+    everyone = '*'
+
+    def __init__(self, size: int, ttl: int):
+        """Initialize an empty cache and subscribe to invalidations made by other workers.
+
+        Args:
+            size: Maximum number of cached users
+            ttl: Lifetime of a cached user in seconds
+        """
+        self.principals = LRUCache(maxsize=size, ttl=ttl)
+        bus.subscribe(self.channel, self._on_invalidate, on_reset=self.principals.clear)
+
+    def get(self, user_pk: UUID) -> Optional[Principal]:
+        """Get a user from the cache or load them with their roles from the database.
+
+        The cache is bypassed while invalidations from other workers may be missed.
+
+        Args:
+            user_pk: User ID
+
+        Returns:
+            Optional[Principal]: User or None if there is no such user
+        """
+        principal = self.principals.get(user_pk) if bus.ready else None
+        if principal:
+            return principal
+        user = db.session.get(User, user_pk, options=[joinedload(User.roles)])
+        if not user:
+            return None
+        principal = Principal(user)
+        self.principals.set(user_pk, principal)
+        return principal
+
+    def invalidate(self, user_pk: Optional[UUID] = None) -> None:
+        """Drop a user, or all users if not specified, from the caches of all workers.
+
+        Args:
+            user_pk: User ID
+        """
+        self._on_invalidate(self.everyone if user_pk is None else str(user_pk))
+        bus.publish(self.channel, self.everyone if user_pk is None else str(user_pk))
+
+    def _on_invalidate(self, message: str) -> None:
+        if message == self.everyone:
+            self.principals.clear()
+        else:
+            self.principals.pop(UUID(message))
+
+
+principals = PrincipalCache(size=CONFIG.principals.size, ttl=CONFIG.principals.ttl)
@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from werkzeug.exceptions import ServiceUnavailable
+
+from apps.jaeger import tracing
+from apps.metrics import provider_failures, provider_rejected, provider_requests, provider_retries, provider_seconds
+from core.config import CONFIG, OAuthConfig
+from core.enums import OAuthProviders
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Switch that stops calls to a provider after consecutive failures.
+
+    After `failures` failures in a row the circuit opens and calls are rejected at once. When `cooldown`
+    seconds pass, a single trial call is let through: its success closes the circuit, and its failure opens it
+    for another cooldown.
+    """
+
+    def __init__(self, failures: int, cooldown: float):
+        """Initialize a closed circuit.
+
+        Args:
+            failures: Number of consecutive failures that open the circuit
+            cooldown: Time in seconds before a trial call is let through an open circuit
+        """
+        self.failures = failures
+        self.cooldown = cooldown
+        self._failed = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """State of the circuit.
+
+        Returns:
+            str: `closed`, `open` or `half-open` while a trial call is made
+        """
+        if self._opened_at is None:
+            return 'closed'
+        return 'half-open' if self._trial else 'open'
+
+    def allow(self) -> bool:
+        """Check whether a call may be made.
+
+        Returns:
+            bool: Whether the circuit is closed or the call is the trial one
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._trial = True
+            return True
+
+    def succeed(self) -> None:
+        """Record a successful call and close the circuit."""
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._trial = False
+
+    def fail(self) -> None:
+        """Record a failed call and open the circuit if there are too many of them or the trial call failed."""
+        with self._lock:
+            self._failed += 1
+            if self._trial or self._failed >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class RetryBudget:
+    """Limit of retries relative to the number of requests.
+
+    Every request adds `ratio` to the balance and every retry takes one from it. The balance starts at and
+    is capped by `reserve`, so that a few retries are possible at low traffic, but an outage never multiplies
+    the load on a provider by more than `1 + ratio`.
+    """
+
+    def __init__(self, ratio: float, reserve: int):
+        """Initialize a full budget.
+
+        Args:
+            ratio: Share of requests that may be retried
+            reserve: Maximum number of retries in a row
+        """
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Record a request."""
+        with self._lock:
+            self._balance = min(self._balance + self.ratio, self.reserve)
+
+    def withdraw(self) -> bool:
+        """Take a retry from the budget.
+
+        Returns:
+            bool: Whether the retry is allowed
+        """
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class ProviderClient:
+    """HTTP client of an OAuth provider with a pool of keep-alive connections, timeouts, retries and a circuit breaker.
+
+    Connect timeouts are retried for any request, as it never reached the provider, and other errors and server
+    errors for idempotent ones, as long as the retry budget allows. Requests that still fail open the circuit
+    breaker, and while it is open requests are rejected at once with status code 503 instead of tying up workers.
+    Every attempt is traced as a span.
+    """
+
+    def __init__(self, name: str, config: OAuthConfig):
+        """Initialize the client, connections are opened on first use.
+
+        Args:
+            name: Provider name
+            config: Provider settings
+        """
+        self.name = name
+        self.timeout = (config.connect, config.read)
+        self.breaker = CircuitBreaker(failures=config.failures, cooldown=config.cooldown)
+        self.budget = RetryBudget(ratio=config.budget, reserve=config.retries)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.pool)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Make a request to the provider.
+
+        The circuit breaker records the outcome of every admitted request, even if it ends with an unexpected error,
+        so that a failed trial call cannot leave the circuit half-open.
+
+        Args:
+            method: HTTP method
+            url: URL
+            kwargs: `requests` arguments
+
+        Raises:
+            ServiceUnavailable: Error that the provider is unavailable or the circuit is open
+
+        Returns:
+            requests.Response: Response with a status code below 500
+        """
+        if not self.breaker.allow():
+            provider_rejected.labels(self.name).inc()
+            raise ServiceUnavailable(f'Provider {self.name} is unavailable, try again later!')
+        response = None
+        try:  # noqa: WPS501 the outcome is recorded even if the call is interrupted, for example by a timeout
+            response = self._retry(method, url, kwargs)
+        finally:
+            if response is None:
+                self.breaker.fail()
+            else:
+                self.breaker.succeed()
+        if response is None:
+            raise ServiceUnavailable(f'Provider {self.name} is unavailable, try again later!')
+        return response
+
+    def _retry(self, method: str, url: str, kwargs: dict) -> Optional[requests.Response]:
+        self.budget.deposit()
+        idempotent = method.upper() in {'GET', 'HEAD', 'OPTIONS'}
+        while True:
+            response, failure, retriable = self._attempt(method, url, kwargs, idempotent)
+            if response is not None:
+                return response
+            provider_failures.labels(self.name).inc()
+            if not (retriable and self.budget.withdraw()):
+                logger.warning('Request to provider %s failed: %s', self.name, failure)
+                return None
+            provider_retries.labels(self.name).inc()
+
+    def _attempt(
+        self, method: str, url: str, kwargs: dict, idempotent: bool,
+    ) -> Tuple[Optional[requests.Response], str, bool]:
+        provider_requests.labels(self.name).inc()
+        timer = provider_seconds.labels(self.name).time()
+        try:
+            with timer, tracing.span(f'oauth.{self.name}', {'http.method': method, 'http.url': url}) as span:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                if span is not None:
+                    span.set_attribute('http.status_code', response.status_code)
+        except requests.RequestException as error:
+            return None, repr(error), idempotent or isinstance(error, requests.ConnectTimeout)
+        if response.status_code >= 500:
+            return None, f'status code {response.status_code}', idempotent
+        return response, '', False
+
+
+clients: Dict[str, ProviderClient] = {
+    OAuthProviders.YANDEX.value: ProviderClient(OAuthProviders.YANDEX.value, CONFIG.yandex),
+    OAuthProviders.VK.value: ProviderClient(OAuthProviders.VK.value, CONFIG.vk),
+}
@@ -0,0 +1,15 @@
+import os
+
+from redis import Redis
+
+from core.config import CONFIG
+
+redis_client = Redis(connection_pool=CONFIG.redis.connection_pool())
+
+
+def reset_after_fork() -> None:
+    """Drop the connections inherited from the parent process, so that they are never shared."""
+    redis_client.connection_pool.reset()
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
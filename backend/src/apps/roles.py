@@ -0,0 +1,254 @@
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Boolean, bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.sql.expression import TextualSelect
+
+from apps.cache import bus
+from apps.db import db
+from apps.principals import principals
+from apps.utils import chunked
+from models.role import Role
+
+ROLE_OF_USERS_PARAMETERS = (
+    bindparam('user_pks', type_=ARRAY(PostgresUUID(as_uuid=True))),
+    bindparam('role_pk', type_=PostgresUUID(as_uuid=True)),
+)
+GRANT_ROLE_TO_USERS = text(text="""
+    WITH requested AS (
+        SELECT DISTINCT unnest(:user_pks) AS user_pk
+    ), found AS (
+        SELECT users.pk FROM users JOIN requested ON users.pk = requested.user_pk
+    ), changed AS (
+        INSERT INTO roles_users (user_pk, role_pk) SELECT pk, :role_pk FROM found
+        ON CONFLICT DO NOTHING
+        RETURNING user_pk
+    ), touched AS (
+        UPDATE users SET updated_at = :now FROM changed WHERE users.pk = changed.user_pk
+    )
+    SELECT found.pk, changed.user_pk IS NOT NULL AS changed FROM found LEFT JOIN changed ON found.pk = changed.user_pk
+""").bindparams(*ROLE_OF_USERS_PARAMETERS).columns(pk=PostgresUUID(as_uuid=True), changed=Boolean)
+REVOKE_ROLE_FROM_USERS = text(text="""
+    WITH requested AS (
+        SELECT DISTINCT unnest(:user_pks) AS user_pk
+    ), found AS (
+        SELECT users.pk FROM users JOIN requested ON users.pk = requested.user_pk
+    ), changed AS (
+        DELETE FROM roles_users USING found
+        WHERE roles_users.user_pk = found.pk AND roles_users.role_pk = :role_pk
+        RETURNING roles_users.user_pk
+    ), touched AS (
+        UPDATE users SET updated_at = :now FROM changed WHERE users.pk = changed.user_pk
+    )
+    SELECT found.pk, changed.user_pk IS NOT NULL AS changed FROM found LEFT JOIN changed ON found.pk = changed.user_pk
+""").bindparams(*ROLE_OF_USERS_PARAMETERS).columns(pk=PostgresUUID(as_uuid=True), changed=Boolean)
+
+
+class CatalogueRole:
+    """Detached copy of a role."""
+
+    def __init__(self, role: Role):
+        """Copy the role fields.
+
+        Args:
+            role: Role
+        """
+        self.pk: UUID = role.pk
+        self.name: str = role.name
+        self.description: Optional[str] = role.description
+
+    def __repr__(self) -> str:
+        """
+        Representation of the role as its name, the same as for the `Role` model.
+
+        Returns:
+            str: Role name
+        """
+        return self.name.title()
+
+
+class RoleCache:
+    """Per-worker copy of all roles, dropped in all workers when any of them announces a change."""
+
+    channel = 'roles'
+
+    def __init__(self):
+        """Initialize an empty copy and subscribe to invalidations made by other workers."""
+        self._roles: Optional[Dict[str, CatalogueRole]] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        bus.subscribe(self.channel, self._on_invalidate, on_reset=self.clear)
+
+    def clear(self) -> None:
+        """Drop the roles from the copy of this worker."""
+        with self._lock:
+            self._generation += 1
+            self._roles = None
+
+    def invalidate(self) -> None:
+        """Drop the roles from the copies of all workers, call after committing role changes."""
+        self.clear()
+        bus.publish(self.channel, '*')
+
+    def _cached(self) -> Optional[Dict[str, CatalogueRole]]:
+        return self._roles if bus.ready else None
+
+    def _load(self) -> Dict[str, CatalogueRole]:
+        generation = self._generation
+        roles = {role.name: CatalogueRole(role) for role in db.session.scalars(select(Role))}
+        with self._lock:
+            if generation == self._generation:
+                self._roles = roles
+        return roles
+
+    def _find(self, name: str) -> Optional[CatalogueRole]:
+        generation = self._generation
+        role = db.session.scalars(select(Role).where(Role.name == name)).first()
+        if role is None:
+            return None
+        found = CatalogueRole(role)
+        with self._lock:
+            if generation == self._generation and self._roles is not None:
+                self._roles = {**self._roles, name: found}
+        return found
+
+    def _on_invalidate(self, message: str) -> None:
+        self.clear()
+
+
+class RoleCatalogue(RoleCache):
+    """Per-worker catalogue of all roles with invalidation across all workers.
+
+    Roles are loaded at once on first use. A role missing from the copy is looked up by name and added to the copy,
+    so roles created by other workers or commands are picked up without invalidation and the whole table is not
+    reloaded on every request for an unknown role; changes and deletions must be announced.
+    """
+
+    def all(self) -> List[CatalogueRole]:
+        """Get all roles.
+
+        Returns:
+            list[CatalogueRole]: Roles ordered by name
+        """
+        roles = self._cached()
+        if roles is None:
+            roles = self._load()
+        return sorted(roles.values(), key=lambda role: role.name)
+
+    @property
+    def version(self) -> str:
+        """Digest of all roles that changes whenever any of them is created, changed or deleted.
+
+        The digest depends only on the roles themselves, so it is the same in all workers.
+
+        Returns:
+            str: Version of the catalogue
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for role in self.all():
+            digest.update(f'{role.pk}\0{role.name}\0{role.description}\0'.encode())
+        return digest.hexdigest()
+
+    def get(self, name: str) -> Optional[CatalogueRole]:
+        """Get a role by name.
+
+        Args:
+            name: Role name
+
+        Returns:
+            Optional[CatalogueRole]: Role or None if there is no such role
+        """
+        roles = self._cached()
+        if roles is None:
+            roles = self._load()
+        return roles.get(name) or self._find(name)
+
+    def get_or_create(self, name: str) -> CatalogueRole:
+        """Get a role by name or add it to the database session if there is no such role.
+
+        Args:
+            name: Role name
+
+        Returns:
+            CatalogueRole: Role
+        """
+        role = self.get(name)
+        if role is not None:
+            return role
+        new_role = Role(name=name)
+        db.session.add(new_role)
+        db.session.flush()
+        self.clear()
+        return CatalogueRole(new_role)
+
+
+class RoleOfUsers:
+    """Assignment or revocation of a role for many users at once.
+
+    User IDs are processed in chunks, each chunk is changed with a single statement and committed. The modification
+    date of every changed user is updated, as when the role of a single user is changed.
+    """
+
+    chunk_size = 1000
+
+    def __init__(self, statement: TextualSelect, done: str):
+        """Initialize the change.
+
+        Args:
+            statement: Statement that changes the role of the found users and reports whether each of them changed
+            done: Status of changed users
+        """
+        self.statement = statement
+        self.done = done
+
+    def apply(self, role_pk: UUID, user_ids: Iterable[str]) -> List[Dict[str, str]]:
+        """Change the role of users chunk by chunk.
+
+        Args:
+            role_pk: Role ID
+            user_ids: User IDs, possibly malformed
+
+        Returns:
+            list[dict[str, str]]: Status of each user in the order of the passed IDs, one of the status of changed
+                users, `unchanged`, `not_found` and `invalid`
+        """
+        return [
+            status
+            for chunk in chunked(user_ids, self.chunk_size)
+            for status in self._apply_chunk(role_pk, chunk)
+        ]
+
+    def _apply_chunk(self, role_pk: UUID, user_ids: List[str]) -> List[Dict[str, str]]:
+        user_pks = {user_id: self._parse(user_id) for user_id in user_ids}
+        changed = dict(db.session.execute(self.statement, {
+            'user_pks': list(set(filter(None, user_pks.values()))),
+            'role_pk': role_pk,
+            'now': datetime.utcnow(),
+        }).all())
+        db.session.commit()
+        if any(changed.values()):
+            principals.invalidate()
+        return [{'user_pk': user_id, 'status': self._status(user_pks[user_id], changed)} for user_id in user_ids]
+
+    def _parse(self, user_id: str) -> Optional[UUID]:
+        try:
+            return UUID(user_id)
+        except ValueError:
+            return None
+
+    def _status(self, user_pk: Optional[UUID], changed: Dict[UUID, bool]) -> str:
+        if user_pk is None:
+            return 'invalid'
+        if user_pk not in changed:
+            return 'not_found'
+        return self.done if changed[user_pk] else 'unchanged'
+
+
+role_catalogue = RoleCatalogue()
+grant_role_to_users = RoleOfUsers(GRANT_ROLE_TO_USERS, 'assigned')
+revoke_role_from_users = RoleOfUsers(REVOKE_ROLE_FROM_USERS, 'revoked')
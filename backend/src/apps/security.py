@@ -1,17 +1,41 @@
-from typing import Optional
+import uuid
+from datetime import datetime
+from typing import Optional, Union
 
 from flask import Flask
 from flask_security import Security, SQLAlchemyUserDatastore
-from flask_security.utils import verify_password
-from sqlalchemy import and_
+from sqlalchemy import bindparam, delete, literal, select, text, update
+from sqlalchemy.dialects.postgresql import UUID, insert
 from werkzeug.user_agent import UserAgent
 
 from apps.db import db
-from apps.utils import generate_random_email, generate_random_string
+from apps.hashing import context_settings, hash_password, needs_update, verify_password
+from apps.history import history
+from apps.principals import Principal
+from apps.utils import generate_random_email
 from core.config import CONFIG
-from models.role import Role
+from models.role import Role, roles_users
 from models.session import Session
-from models.user import SocialAccount, User
+from models.user import User
+
+UUID_TYPE = UUID(as_uuid=True)
+FIND_OR_CREATE_SOCIAL_USER = text(text="""
+    WITH account AS (
+        INSERT INTO social_account (pk, user_pk, social_id, social_name)
+        VALUES (:account_pk, :user_pk, :social_id, :social_name)
+        ON CONFLICT ON CONSTRAINT social_pk DO NOTHING
+        RETURNING user_pk
+    ), created AS (
+        INSERT INTO users (pk, email, password, active, updated_at)
+        SELECT user_pk, :email, NULL, true, :now FROM account
+    )
+    SELECT user_pk FROM account
+    UNION ALL
+    SELECT user_pk FROM social_account WHERE social_id = :social_id AND social_name = :social_name
+""").bindparams(
+    bindparam('account_pk', type_=UUID_TYPE),
+    bindparam('user_pk', type_=UUID_TYPE),
+).columns(user_pk=UUID_TYPE)
 
 
 class CustomUserDatastore(SQLAlchemyUserDatastore):
@@ -20,6 +44,9 @@ class CustomUserDatastore(SQLAlchemyUserDatastore):
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate and return a user if the provided data is correct.
 
+        The password is hashed again if its hash was made with another scheme or cost than the configured ones.
+        Users created by social login have no password and are never authenticated by one.
+
         Args:
             email: Email
             password: Password
@@ -28,11 +55,39 @@ class CustomUserDatastore(SQLAlchemyUserDatastore):
             Optional[User]: Authenticated user or None if verification fails.
         """
         user = self.find_user(email=email)
-        return user if user and verify_password(password, user.password) else None
+        if not (user and user.password and verify_password(password, user.password)):
+            return None
+        if needs_update(user.password):
+            user.password = password
+            self.put(user)
+        return user
+
+    def register_user(self, email: str, password: str, role_pk: uuid.UUID) -> Optional[uuid.UUID]:
+        """Create a user with a role in a single statement unless the email is already taken.
+
+        Concurrent registrations with the same email do not fail, all but one of them find the email taken.
 
-    def create_session(self, user: User, user_agent: UserAgent) -> Session:
+        Args:
+            email: Email
+            password: Password
+            role_pk: Role ID
+
+        Returns:
+            Optional[UUID]: ID of the new user or None if the email is taken
+        """
+        created = insert(User).values(
+            email=email, password=hash_password(password), active=True,
+        ).on_conflict_do_nothing(index_elements=[User.email]).returning(User.pk).cte('created')
+        statement = insert(roles_users).from_select(
+            ['user_pk', 'role_pk'], select(created.c.pk, literal(role_pk, type_=UUID_TYPE)),
+        ).returning(roles_users.c.user_pk)
+        return self.db.session.execute(statement).scalar()
+
+    def create_session(self, user: Union[User, Principal], user_agent: UserAgent) -> Session:
         """Create and return a new user session.
 
+        In the write-behind mode of the login history the session is queued instead of added to the database session.
+
         Args:
             user: User
             user_agent: User-Agent object
@@ -40,56 +95,75 @@ class CustomUserDatastore(SQLAlchemyUserDatastore):
         Returns:
             Session: User session
         """
-        session = Session(user_pk=user.pk, user_agent=user_agent.string, user_device_type=user_agent)
+        session = Session(
+            pk=uuid.uuid4(),
+            event_date=datetime.utcnow(),
+            user_pk=user.pk,
+            user_agent=user_agent.string,
+            user_device_type=user_agent,
+        )
+        if history.queued:
+            history.put(session)
+            return session
         return self.put(session)
 
-    def create_social_account(self, user: User, social_id: str, social_name: str) -> SocialAccount:
-        """Create a social account for the user.
+    def grant_role(self, user: User, role_pk: uuid.UUID) -> None:
+        """Assign a role to a user without loading the role or the current roles of the user.
+
+        The modification date of the user is updated, it versions the user data together with their roles.
 
         Args:
             user: User
-            social_id: User ID in a social service
-            social_name: Name of the social service
-
-        Returns:
-            SocialAccount: User's social account
+            role_pk: Role ID
         """
-        social = SocialAccount(user_pk=user.pk, social_id=social_id, social_name=social_name)
-        return self.put(social)
+        self.db.session.flush()
+        self.db.session.execute(
+            insert(roles_users).values(user_pk=user.pk, role_pk=role_pk).on_conflict_do_nothing(),
+        )
+        self.db.session.execute(update(User).where(User.pk == user.pk).values(updated_at=datetime.utcnow()))
 
-    def find_social_account(self, social_id: str, social_name: str) -> Optional[SocialAccount]:
-        """Find a social account by the given parameters.
+    def revoke_role(self, user: User, role_pk: uuid.UUID) -> None:
+        """Revoke a role from a user without loading the role or the current roles of the user.
 
-        Args:
-            social_id: User ID in a social service
-            social_name: Name of the social service
+        The modification date of the user is updated as when a role is assigned.
 
-        Returns:
-            Optional[SocialAccount]: Social account or None if not found
+        Args:
+            user: User
+            role_pk: Role ID
         """
-        query = SocialAccount.query.filter(
-            and_(SocialAccount.social_id == social_id, SocialAccount.social_name == social_name),
+        self.db.session.execute(
+            delete(roles_users).where(roles_users.c.user_pk == user.pk, roles_users.c.role_pk == role_pk),
         )
-        return query.first()
+        self.db.session.execute(update(User).where(User.pk == user.pk).values(updated_at=datetime.utcnow()))
+
+    def find_or_create_social_user(self, social_id: str, social_name: str) -> Optional[uuid.UUID]:
+        """Find or create a user based on the ID in a social service with a single statement.
 
-    def find_or_create_user(self, social_id: str, social_name: str) -> User:
-        """Find or create a user based on the ID in a social service.
+        A new user gets a random email and no password, so nothing is hashed. The statement is not committed,
+        the login session is committed together with it. Concurrent first logins with the same social ID do not
+        fail: the statement that loses the race on the `social_pk` constraint finds no row in its snapshot and
+        is run once more to read the account created by the winner.
 
         Args:
             social_id: User ID in a social service
             social_name: Name of the social service
 
         Returns:
-            User: User identified by their ID in the social service
+            Optional[UUID]: ID of the user identified by their ID in the social service or None if neither found
+                nor created
         """
-        social_account = self.find_social_account(social_id, social_name)
-        if not social_account:
-            user = self.create_user(email=generate_random_email(8), password=generate_random_string(16))
-            social_account = self.create_social_account(user, social_id, social_name)
-            user.social_accounts.append(social_account)
-            self.put(user)
-            self.commit()
-        return social_account.user
+        account = {
+            'account_pk': uuid.uuid4(),
+            'user_pk': uuid.uuid4(),
+            'social_id': social_id,
+            'social_name': social_name,
+            'email': generate_random_email(8),
+            'now': datetime.utcnow(),
+        }
+        user_pk = self.db.session.execute(FIND_OR_CREATE_SOCIAL_USER, account).scalar()
+        if user_pk is None:
+            user_pk = self.db.session.execute(FIND_OR_CREATE_SOCIAL_USER, account).scalar()
+        return user_pk
 
 
 security = Security()
@@ -103,4 +177,7 @@ def install(app: Flask):
         app: Flask
     """
     app.config['SECURITY_PASSWORD_SALT'] = CONFIG.flask.password_salt
-    security.init_app(app, user_datastore)
+    app.config['SECURITY_PASSWORD_HASH'] = CONFIG.hashing.scheme
+    app.config['SECURITY_PASSWORD_SCHEMES'] = ['bcrypt', 'argon2']
+    state = security.init_app(app, user_datastore)
+    state.pwd_context.update(**context_settings(CONFIG.hashing.scheme, CONFIG.hashing.rounds, CONFIG.hashing.memory))
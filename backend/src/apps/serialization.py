@@ -0,0 +1,216 @@
+import operator
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import orjson
+from flask import Flask, Request
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import Schema, fields
+from webargs import core
+from webargs.flaskparser import FlaskParser, is_json_request
+
+from core.config import CONFIG
+
+Convert = Callable[[Any], Any]
+
+# Formats marshmallow serializes with its own functions rather than with `strftime`
+DATE_FORMATS = frozenset((None, 'iso', 'iso8601', 'rfc', 'rfc822', 'timestamp', 'timestamp_ms'))
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes and decodes with orjson.
+
+    Types orjson does not know, and dates to keep them in the HTTP format, are converted by the default provider.
+    Keys are not sorted.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any, **kwargs) -> str:  # noqa: WPS110 the name is kept from the overridden method
+        """Serialize data as JSON.
+
+        Args:
+            obj: Data
+            kwargs: Ignored `json.dumps` arguments
+
+        Returns:
+            str: JSON
+        """
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs) -> Any:  # noqa: WPS111 the name is kept from the overridden method
+        """Deserialize data from JSON.
+
+        Args:
+            s: JSON
+            kwargs: Ignored `json.loads` arguments
+
+        Returns:
+            Any: Data
+        """
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize data as a JSON response without an intermediate string.
+
+        Args:
+            args: Data as a single argument or a list of values
+            kwargs: Data as a dict
+
+        Returns:
+            Response: Response with the `application/json` mimetype
+        """
+        data = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(data, default=self.default, option=self.options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+class ORJSONParser(FlaskParser):
+    """Request parser that decodes JSON bodies with orjson."""
+
+    def _raw_load_json(self, req: Request) -> Any:
+        if not is_json_request(req):
+            return core.missing
+        return orjson.loads(req.get_data(cache=True))
+
+
+class DumpPlan:
+    """Keys, getters and converters of the dumped fields of a schema, for dicts and for objects."""
+
+    def __init__(self, plan: List[Tuple[str, str, Convert]]):
+        """Make the getters of the fields.
+
+        Args:
+            plan: Key in the dumped data, attribute and converter of every field
+        """
+        self.by_key = [(key, operator.itemgetter(attribute), convert) for key, attribute, convert in plan]
+        self.by_attribute = [(key, operator.attrgetter(attribute), convert) for key, attribute, convert in plan]
+
+    def __call__(self, data: Any) -> Dict[str, Any]:
+        """Serialize a dict or an object.
+
+        Args:
+            data: Dict or object
+
+        Returns:
+            dict: Serialized data
+        """
+        getters = self.by_key if isinstance(data, Mapping) else self.by_attribute
+        return {key: convert(getter(data)) for key, getter, convert in getters}
+
+    @classmethod
+    def compile(cls, schema: Schema) -> Optional['DumpPlan']:
+        """Make the plan of a schema.
+
+        Args:
+            schema: Marshmallow schema
+
+        Returns:
+            Optional[DumpPlan]: Plan or None if the schema has to be dumped by marshmallow
+        """
+        if schema._hooks or not schema.dump_fields:  # type: ignore[attr-defined]
+            return None
+        try:
+            plan = [
+                (field.data_key or name, field.attribute or name, compile_field(field))
+                for name, field in schema.dump_fields.items()
+            ]
+        except TypeError:
+            return None
+        if any('.' in attribute for _, attribute, _ in plan):
+            return None
+        return cls(plan)
+
+
+class CompiledSchema(Schema):
+    """Schema that dumps through a plan made once for its fields.
+
+    Marshmallow looks up, serializes and validates every field of every object on each dump. Here the fields
+    are turned into a list of getters and converters on the first dump, and cached for the schema class and
+    the set of dumped fields. Schemas with hooks or fields that have no converter, and objects that lack a
+    field, are dumped by marshmallow. Loading and the OpenAPI docs are not affected.
+    """
+
+    _dumps: Dict[Tuple[str, ...], Optional[DumpPlan]]
+
+    def __init_subclass__(cls, **kwargs):
+        """Give every schema class its own cache of dump plans.
+
+        Args:
+            kwargs: Class arguments
+        """
+        super().__init_subclass__(**kwargs)
+        cls._dumps = {}
+
+    def dump(self, data: Any, *, many: Optional[bool] = None) -> Any:
+        """Serialize an object or a list of objects.
+
+        Args:
+            data: Object, dict or a list of them
+            many: Whether to serialize a list of objects, as set for the schema if not passed
+
+        Returns:
+            Any: Serialized data
+        """
+        many = self.many if many is None else bool(many)
+        fields_key = tuple(self.dump_fields)
+        if fields_key not in self._dumps:
+            self._dumps[fields_key] = DumpPlan.compile(self)
+        dump = self._dumps[fields_key]
+        if dump is None:
+            return super().dump(data, many=many)
+        try:
+            return [dump(element) for element in data] if many else dump(data)
+        except (AttributeError, KeyError):
+            return super().dump(data, many=many)
+
+
+def scalar_converter(field: fields.Field) -> Convert:
+    """Make a function serializing a value other than None the same way as a scalar field does.
+
+    Args:
+        field: Marshmallow field
+
+    Raises:
+        TypeError: Error that the field has no compiled form
+
+    Returns:
+        Convert: Function
+    """
+    if isinstance(field, fields.DateTime) and field.format not in DATE_FORMATS:
+        return operator.methodcaller('strftime', field.format)
+    if isinstance(field, fields.Integer) and not field.as_string:
+        return int
+    if isinstance(field, fields.String):
+        return str
+    raise TypeError(f'{type(field).__name__} has no compiled form')
+
+
+def compile_field(field: fields.Field) -> Convert:
+    """Make a function serializing a value the same way as a field does.
+
+    Args:
+        field: Marshmallow field
+
+    Raises:
+        TypeError: Error that the field has no compiled form
+
+    Returns:
+        Convert: Function
+    """
+    if isinstance(field, fields.List):
+        inner = compile_field(field.inner)
+        return lambda value: None if value is None else [inner(element) for element in value]
+    convert = scalar_converter(field)
+    return lambda value: None if value is None else convert(value)
+
+
+def install(app: Flask):
+    """Install the Flask component for fast JSON encoding and decoding, unless `FLASK_SERIALIZER` is `stdlib`.
+
+    Args:
+        app: Flask
+    """
+    if CONFIG.flask.serializer == 'orjson':
+        app.json = ORJSONProvider(app)
+        app.config['APISPEC_WEBARGS_PARSER'] = ORJSONParser()
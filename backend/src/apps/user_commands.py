@@ -0,0 +1,133 @@
+import fileinput
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from flask_script import Command, Option, prompt
+from passlib.registry import get_crypt_handler
+
+from apps.hashing import tune
+from apps.importer import Checkpoint, UserImporter, password_hasher, read_users
+from apps.roles import role_catalogue
+from apps.security import user_datastore as postgres
+from core.config import CONFIG
+from core.enums import AuthRoles
+
+
+class CreateSuperUser(Command):
+    """Command to create a superuser."""
+
+    def run(self):
+        """Script to run the command."""
+        admin = postgres.create_user(
+            email=prompt('Enter email'),
+            password=prompt('Enter password'),
+        )
+        role = postgres.find_or_create_role(CONFIG.roles.ADMIN.value)
+        postgres.add_role_to_user(admin, role)
+        postgres.commit()
+
+
+class TuneHashing(Command):
+    """Command to find the strongest password hashing cost that fits a target verification time."""
+
+    option_list = (
+        Option('--latency', dest='latency', type=float, default=250, help='Target verification time in ms'),
+    )
+
+    def run(self, latency: float):
+        """Script to run the command.
+
+        Args:
+            latency: Target verification time in milliseconds
+        """
+        for scheme in ('bcrypt', 'argon2'):
+            if get_crypt_handler(scheme).has_backend():
+                self.tune(scheme, latency)
+            else:
+                sys.stdout.write(f'{scheme}: no backend installed, skipped\n')
+
+    def tune(self, scheme: str, latency: float):
+        """Measure the verification time of every cost of a scheme and suggest the strongest fitting one.
+
+        Args:
+            scheme: Hashing scheme
+            latency: Target verification time in milliseconds
+        """
+        measurements = tune(scheme, latency, CONFIG.hashing.memory)
+        for rounds, elapsed in measurements:
+            sys.stdout.write(f'{scheme}: rounds={rounds} verify={elapsed:.1f} ms\n')
+        fitting = [measurement for measurement in measurements if measurement[1] <= latency]
+        if fitting:
+            strongest = fitting[-1][0]
+            sys.stdout.write(f'HASHING_SCHEME={scheme} HASHING_ROUNDS={strongest}\n')
+        else:
+            sys.stdout.write(f'{scheme}: even the lowest cost is slower than {latency} ms\n')
+
+
+class ImportUsers(Command):
+    """Command to import users in bulk from CSV or newline-delimited JSON."""
+
+    option_list = (
+        Option('source', help='File with users, `-` reads the standard input'),
+        Option('--format', dest='file_format', choices=('csv', 'ndjson'), help='By file extension if not set'),
+        Option('--checkpoint', dest='checkpoint', help='File to resume from, `<source>.checkpoint` by default'),
+        Option('--batch', dest='batch', type=int, default=10_000, help='Number of users loaded per transaction'),
+        Option('--workers', dest='workers', type=int, default=os.cpu_count(), help='Number of hashing processes'),
+        Option('--rounds', dest='rounds', type=int, help='Hashing cost, raised to the configured one on login'),
+        Option('--role', dest='roles', action='append', help='Role assigned to the users, `user` by default'),
+    )
+
+    formats = {'.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+    def run(self, source: str, file_format: Optional[str], checkpoint: Optional[str], **options):
+        """Script to run the command.
+
+        Args:
+            source: File with users or `-` for the standard input
+            file_format: `csv` or `ndjson`, by the file extension if not set
+            checkpoint: Checkpoint file, `<source>.checkpoint` by default unless reading the standard input
+            options: Batch size, number of hashing processes, hashing cost and names of the assigned roles
+        """
+        if not checkpoint and source != '-':
+            checkpoint = f'{source}.checkpoint'
+        progress = Checkpoint(checkpoint)
+        if progress.offset:
+            sys.stdout.write(f'Resuming after {progress.offset} records\n')
+        role_pks = [role_catalogue.get_or_create(name).pk for name in options['roles'] or [AuthRoles.USER.value]]
+        postgres.commit()
+        with fileinput.input(files=(source,)) as lines:
+            records = read_users(lines, file_format or self.formats.get(os.path.splitext(source)[1], 'csv'))
+            self.load(itertools.islice(records, progress.offset, None), progress, role_pks, options)
+
+    def load(
+        self, records: Iterator[Dict[str, Any]], progress: Checkpoint, role_pks: List[UUID], options: Dict[str, Any],
+    ):
+        """Load the records in batches and report the progress after every batch.
+
+        Args:
+            records: User records following the ones already imported
+            progress: Checkpoint of the import
+            role_pks: IDs of the roles assigned to the users
+            options: Batch size, number of hashing processes and hashing cost
+        """
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool, postgres.db.engine.connect() as connection:
+            importer = UserImporter(connection, password_hasher(options['rounds']), pool, role_pks)
+            for totals in importer.run(records, progress, options['batch']):
+                self.report(totals, time.perf_counter() - start)
+
+    def report(self, totals: List[int], elapsed: float):
+        """Show the running totals of the import.
+
+        Args:
+            totals: Number of imported, skipped and rejected users
+            elapsed: Time since the start of the import in seconds
+        """
+        imported, skipped, rejected = totals
+        sys.stdout.write(f'Imported {imported}, skipped {skipped} existing, rejected {rejected}, ')
+        sys.stdout.write(f'{imported / elapsed:.0f} users/s\n')
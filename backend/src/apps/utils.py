@@ -1,6 +1,12 @@
-import json
+import base64
+import itertools
 import string
+from datetime import datetime
 from secrets import choice
+from typing import Iterable, Iterator, List, Tuple, TypeVar
+from uuid import UUID
+
+Element = TypeVar('Element')
 
 
 def generate_random_string(length: int) -> str:
@@ -30,13 +36,50 @@ def generate_random_email(length: int, domain: str = 'yandex') -> str:
     return '{random_str}@{domain}.com'.format(random_str=random_str, domain=domain)
 
 
-def decode_json(payload: bytes) -> object:
-    """Decode JSON content into an object.
+def encode_cursor(event_date: datetime, pk: UUID) -> str:
+    """Encode the position of a record in a list sorted by date into an opaque cursor.
 
     Args:
-        payload: JSON content in bytes.
+        event_date: Record date
+        pk: Record ID
 
     Returns:
-        object: An object.
+        str: Cursor
+    """
+    position = '{date}|{pk}'.format(date=event_date.isoformat(), pk=pk)
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor made by `encode_cursor`.
+
+    Args:
+        cursor: Cursor
+
+    Raises:
+        ValueError: Error that the cursor is malformed
+
+    Returns:
+        tuple[datetime, UUID]: Record date and ID
+    """
+    try:
+        position = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except ValueError as error:
+        raise ValueError('Malformed cursor') from error
+    event_date, _, pk = position.partition('|')
+    return datetime.fromisoformat(event_date), UUID(pk)
+
+
+def chunked(elements: Iterable[Element], size: int) -> Iterator[List[Element]]:
+    """Split elements into lists of the given size, the last one may be shorter.
+
+    Args:
+        elements: Elements, possibly a lazy stream
+        size: Size of the lists
+
+    Yields:
+        list: Next elements
     """
-    return json.loads(payload.decode('utf-8'))
+    iterator = iter(elements)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
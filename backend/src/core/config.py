@@ -1,6 +1,12 @@
+import json
 from functools import lru_cache
+from typing import Any, Dict
 
-from pydantic import BaseSettings, Field
+from pydantic import BaseSettings, Field, validator
+from redis.backoff import ExponentialBackoff
+from redis.connection import BlockingConnectionPool
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
 
 
 class PostgresConfig(BaseSettings):
@@ -18,6 +24,104 @@ class RedisConfig(BaseSettings):
 
     host: str = '127.0.0.1'
     port: int = 6379
+    socket: str = ''
+    pool: int = 50
+    wait: float = 5
+    timeout: float = 1
+    connect: float = 1
+    heartbeat: int = 30
+    retries: int = 2
+
+    def connection_pool(self) -> BlockingConnectionPool:
+        """Create a pool of connections to Redis, over a unix socket if one is configured.
+
+        The pool is bounded: when all connections are busy, callers wait up to `wait` seconds
+        for a free one instead of opening new connections.
+
+        Returns:
+            BlockingConnectionPool: Connection pool
+        """
+        options: Dict[str, Any] = {
+            'socket_timeout': self.timeout,
+            'health_check_interval': self.heartbeat,
+            'retry': Retry(ExponentialBackoff(cap=self.timeout), self.retries),
+            'retry_on_error': [ConnectionError, TimeoutError],
+        }
+        if self.socket:
+            return BlockingConnectionPool.from_url(
+                f'unix://{self.socket}', max_connections=self.pool, timeout=self.wait, **options,
+            )
+        return BlockingConnectionPool(
+            max_connections=self.pool,
+            timeout=self.wait,
+            host=self.host,
+            port=self.port,
+            socket_connect_timeout=self.connect,
+            socket_keepalive=True,
+            **options,
+        )
+
+
+class BlocklistConfig(BaseSettings):
+    """A class with revoked token storage settings."""
+
+    cache: bool = True
+    size: int = 100_000
+
+
+class PrincipalConfig(BaseSettings):
+    """A class with authenticated user cache settings."""
+
+    size: int = 10_000
+    ttl: int = 60
+
+
+class HashingConfig(BaseSettings):
+    """A class with password hashing executor settings."""
+
+    workers: int = 4
+    queue: int = 32
+    scheme: str = 'bcrypt'
+    rounds: int = 12
+    memory: int = 64 * 1024
+
+
+class HistoryConfig(BaseSettings):
+    """A class with login history writing settings."""
+
+    mode: str = 'sync'
+    size: int = 10_000
+    batch: int = 500
+    interval: int = 200
+    overflow: str = 'sync'
+    ahead: int = 3
+    retention: int = 12
+
+
+class AgentsConfig(BaseSettings):
+    """A class with User-Agent classification settings."""
+
+    size: int = 4096
+    clients: Dict[str, str] = {}
+
+    @validator('clients', pre=True)
+    def parse_clients(cls, clients: Any) -> Any:
+        """Parse a JSON object of User-Agent prefixes and device types read from the environment."""
+        if isinstance(clients, str):
+            return json.loads(clients or '{}')
+        return clients
+
+
+class LimiterConfig(BaseSettings):
+    """A class with request rate limiting settings, limits are separated by semicolons."""
+
+    strategy: str = 'sliding-window-counter'
+    default: str = '10/second'
+    login: str = '5/second;30/minute'
+    reads: str = '50/second'
+    lease: int = 0
+    hold: float = 1
+    proxies: int = 1
 
 
 class FlaskConfig(BaseSettings):
@@ -29,9 +133,21 @@ class FlaskConfig(BaseSettings):
     project_name: str = 'Online Cinema Authorization Service'
     url_prefix: str = '/api/v1'
     access_token_expires_by_sec: int = 60 * 60
+    refresh_token_expires_by_sec: int = 30 * 24 * 60 * 60
     secret_key: str = 'secret_key'
     password_salt: str = ''
     date_format: str = '%d/%m/%Y %H:%M:%S'
+    serializer: str = 'orjson'
+    startup: float = 1
+
+
+class JWTConfig(BaseSettings):
+    """A class with token signing settings."""
+
+    algorithm: str = 'RS256'
+    keys: str = 'keys'
+    delay: int = 5 * 60
+    legacy: bool = False
 
 
 class OAuthConfig(BaseSettings):
@@ -39,6 +155,19 @@ class OAuthConfig(BaseSettings):
 
     id: str = ''
     secret: str = ''
+    connect: float = 2
+    read: float = 5
+    pool: int = 10
+    retries: int = 3
+    budget: float = 0.1
+    failures: int = 5
+    cooldown: float = 30
+
+
+class MetricsConfig(BaseSettings):
+    """A class with Prometheus metrics settings."""
+
+    enabled: bool = True
 
 
 class JaegerConfig(BaseSettings):
@@ -47,6 +176,10 @@ class JaegerConfig(BaseSettings):
     host: str = '127.0.0.1'
     port: int = 6831
     enabled: bool = False
+    exporter: str = 'jaeger'
+    endpoint: str = 'http://127.0.0.1:4317'
+    ratio: float = 0.1
+    console: bool = False
 
 
 class LogstashConfig(BaseSettings):
@@ -54,16 +187,25 @@ class LogstashConfig(BaseSettings):
 
     host: str = '127.0.0.1'
     port: int = 5044
+    enabled: bool = True
 
 
 class MainSettings(BaseSettings):
     """A class with main project settings."""
 
     flask: FlaskConfig = Field(default_factory=FlaskConfig)
+    jwt: JWTConfig = Field(default_factory=JWTConfig)
     redis: RedisConfig = Field(default_factory=RedisConfig)
+    blocklist: BlocklistConfig = Field(default_factory=BlocklistConfig)
+    principals: PrincipalConfig = Field(default_factory=PrincipalConfig)
+    hashing: HashingConfig = Field(default_factory=HashingConfig)
+    history: HistoryConfig = Field(default_factory=HistoryConfig)
+    agents: AgentsConfig = Field(default_factory=AgentsConfig)
+    limiter: LimiterConfig = Field(default_factory=LimiterConfig)
     postgres: PostgresConfig = Field(default_factory=PostgresConfig)
     yandex: OAuthConfig = Field(default_factory=OAuthConfig)
     vk: OAuthConfig = Field(default_factory=OAuthConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
     jaeger: JaegerConfig = Field(default_factory=JaegerConfig)
     logstash: LogstashConfig = Field(default_factory=LogstashConfig)
 
@@ -1,6 +1,9 @@
+import hashlib
 from functools import wraps
-from typing import Callable
+from http import HTTPStatus
+from typing import Callable, Optional
 
+from flask import make_response, request
 from flask_jwt_extended import get_jwt, verify_jwt_in_request
 from werkzeug.exceptions import Forbidden
 
@@ -25,3 +28,35 @@ def admin_required(view: Callable) -> Callable:
             raise Forbidden('Available only to administrators')
         return view(*args, **kwargs)
     return wrapper
+
+
+def etag(version: Callable[..., Optional[str]]) -> Callable[[Callable], Callable]:
+    """
+    Decorate a view to answer conditional requests with strong entity tags.
+
+    The entity tag is derived from a version stamp of the resource that is cheaper to get than the resource
+    itself, a request with a matching `If-None-Match` header is answered with status code 304 without calling
+    the view. Place the decorator above `marshal_with` so that nothing is serialized in that case.
+
+    Args:
+        version: Function called with the view arguments that returns the version stamp of the resource,
+            or None to call the view unconditionally, for example when the resource does not exist.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            stamp = version(**kwargs)
+            if stamp is None:
+                return view(*args, **kwargs)
+            tag = hashlib.blake2b(stamp.encode(), digest_size=16).hexdigest()
+            if request.if_none_match.contains_weak(tag):
+                response = make_response('', HTTPStatus.NOT_MODIFIED)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(tag)
+            return response
+        return wrapper
+    return decorator
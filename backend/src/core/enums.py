@@ -14,3 +14,12 @@ class OAuthProviders(Enum):
 
     YANDEX = 'yandex'
     VK = 'vk'
+
+
+class DeviceTypes(Enum):
+    """A class enumerating user device types that partition the login history."""
+
+    PC = 'pc'
+    TABLET = 'tablet'
+    MOBILE = 'mobile'
+    OTHER = 'other'
@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+PROFILE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from manage import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create': created - imported, 'installs': app.extensions['startup']}))
+"""
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+Import = Tuple[str, int, float, float]
+
+
+class StartupProfile:
+    """Time a fresh process takes to import the application and create it."""
+
+    def __init__(self, imports: List[Import], installs: Dict[str, float], times: Dict):
+        """Initialize the profile.
+
+        Args:
+            imports: Imported modules in the order they finished importing, as name, nesting level, own time and
+                time including the imports of the module, in seconds
+            installs: Time every component took to install, in seconds
+            times: Time of the imports and of `create_app`, in seconds
+        """
+        self.imports = imports
+        self.installs = installs
+        self.import_time = times['import']
+        self.create_time = times['create']
+
+    @property
+    def total(self) -> float:
+        """Time from the first import of the application until it is created.
+
+        Returns:
+            float: Time in seconds
+        """
+        return self.import_time + self.create_time
+
+    @property
+    def modules(self) -> List[str]:
+        """Names of the imported modules.
+
+        Returns:
+            list[str]: Module names
+        """
+        return [module[0] for module in self.imports]
+
+    def slowest(self, count: int, level: int = 1) -> List[Import]:
+        """Slowest imports, including the imports of the modules they import.
+
+        Args:
+            count: Number of imports
+            level: Deepest nesting level of the imports, 1 for the ones made by the application itself
+
+        Returns:
+            list[tuple]: Imports as in `imports`
+        """
+        imports = [module for module in self.imports if module[1] <= level]
+        return sorted(imports, key=lambda module: module[3], reverse=True)[:count]
+
+
+def parse_import(line: str) -> Optional[Import]:
+    """Parse a line of the `-X importtime` report.
+
+    Args:
+        line: Report line
+
+    Returns:
+        Optional[Import]: Import as in `StartupProfile.imports`, None if the line is not an import
+    """
+    match = IMPORT_TIME.match(line)
+    if match is None:
+        return None
+    own, cumulative, indent, name = match.groups()
+    return name, len(indent) // 2, int(own) / 1e6, int(cumulative) / 1e6
+
+
+def application_imports(report: str) -> List[Import]:
+    """Imports of the application from the `-X importtime` report.
+
+    The modules imported with the interpreter finish importing before the application is imported, they are left out.
+
+    Args:
+        report: Report of the process
+
+    Returns:
+        list[Import]: Imports as in `StartupProfile.imports`
+    """
+    imports = [module for module in map(parse_import, report.splitlines()) if module]
+    application = next((number for number, module in enumerate(imports) if module[0] == 'manage'), 0)
+    roots = [number for number, module in enumerate(imports[:application]) if module[1] == 0]
+    return imports[roots[-1] + 1 if roots else 0:]
+
+
+def measure_startup() -> StartupProfile:
+    """Start the application in a new Python process with `-X importtime` and collect its timings.
+
+    A new process is needed, as the modules of the application are already imported in the current one.
+
+    Returns:
+        StartupProfile: Timings
+    """
+    environment = {**os.environ, 'PYTHONPATH': os.pathsep.join(path for path in sys.path if path)}
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+        capture_output=True, check=True, env=environment, text=True,
+    )
+    times = json.loads(completed.stdout.splitlines()[-1])
+    return StartupProfile(application_imports(completed.stderr), times.pop('installs'), times)
@@ -0,0 +1,14 @@
+import os
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of an exited worker from the metrics shared by the workers.
+
+    Args:
+        server: Gunicorn arbiter
+        worker: Exited worker
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,85 +1,49 @@
-import logging
+import importlib
+import time
+from typing import Dict
 
-import flask_migrate
-from flask import Flask, g, request
-from flask_script import Command, Manager, prompt
-from logstash import LogstashHandler
+from flask import Flask
 
-from apps import api, db, jaeger, jwt, limiter, oauth, security
-from apps.security import user_datastore as postgres
-from core.config import CONFIG
+from apps import logs
 
-
-class RequestIdFilter(logging.Filter):
-    """A class for an additional log message filter to add request ID information to log messages."""
-
-    def filter(self, record: logging.LogRecord) -> bool:
-        """Add log information to log messages.
-
-        Args:
-            record: The record being processed.
-
-        Returns:
-            bool: A non-zero value to log the record.
-        """
-        record.request_id = request.headers.get('X-Request-Id', g.request_id)
-        return True
+COMPONENTS = (
+    'apps.db', 'apps.history', 'apps.jwt', 'apps.security', 'apps.serialization',
+    'apps.api', 'apps.oauth', 'apps.metrics', 'apps.limiter', 'apps.jaeger',
+)
 
 
 def create_app() -> Flask:
     """Initialize the application.
 
+    The time every component takes to import and install is kept in `app.extensions['startup']`, in seconds.
+
     Returns:
         Flask: The application instance.
     """
     app = Flask(__name__)
-    app.logger = logging.getLogger(__name__)
-    app.logger.setLevel(logging.INFO)
-    app.logger.addFilter(RequestIdFilter())
-    app.logger.addHandler(LogstashHandler(CONFIG.logstash.host, CONFIG.logstash.port, version=1))
-    db.install(app)
-    jwt.install(app)
-    security.install(app)
-    api.install(app)
-    oauth.install(app)
-    limiter.install(app)
-    jaeger.install(app)
+    logs.install(app, __name__)
+    installs: Dict[str, float] = {}
+    for name in COMPONENTS:
+        start = time.perf_counter()
+        importlib.import_module(name).install(app)
+        installs[name] = time.perf_counter() - start
+    app.extensions['startup'] = installs
     return app
 
 
-class MakeMigrations(Command):
-    """Command to create migrations."""
-
-    def run(self):
-        """Script to run the command."""
-        flask_migrate.migrate()
-
-
-class Migrate(Command):
-    """Command to apply migrations."""
-
-    def run(self):
-        """Script to run the command."""
-        flask_migrate.upgrade()
-
-
-class CreateSuperUser(Command):
-    """Command to create a superuser."""
-
-    def run(self):
-        """Script to run the command."""
-        admin = postgres.create_user(
-            email=prompt('Enter email'),
-            password=prompt('Enter password'),
-        )
-        role = postgres.find_or_create_role(CONFIG.roles.ADMIN.value)
-        postgres.add_role_to_user(admin, role)
-        postgres.commit()
+if __name__ == '__main__':
+    from flask_script import Manager
 
+    from apps.commands import MakeMigrations, Migrate, PartitionSessions, ProfileStartup, RotateKeys
+    from apps.user_commands import CreateSuperUser, ImportUsers, TuneHashing
 
-if __name__ == '__main__':
     manager = Manager(app=create_app())
     manager.add_command('makemigrations', MakeMigrations())
     manager.add_command('migrate', Migrate())
     manager.add_command('createsuperuser', CreateSuperUser())
+    manager.add_command('rotatekeys', RotateKeys())
+    manager.add_command('tunehashing', TuneHashing())
+    manager.add_command('partitions', PartitionSessions())
+    manager.add_command('importusers', ImportUsers())
+    manager.add_command('startupprofile', ProfileStartup())
     manager.run()
@@ -0,0 +1,27 @@
+"""Index the login history for keyset pagination
+
+Revision ID: 3f9b2c7d1a4e
+Revises: 6e67d1cb57cf
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3f9b2c7d1a4e'
+down_revision = '6e67d1cb57cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_sessions_user_pk_event_date',
+        'sessions',
+        ['user_pk', sa.text('event_date DESC'), sa.text('pk DESC')],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_sessions_user_pk_event_date', table_name='sessions')
@@ -0,0 +1,66 @@
+"""Sub-partition the login history by month
+
+Revision ID: 8c4e1d6a2b7f
+Revises: 3f9b2c7d1a4e
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+from core.config import CONFIG
+from core.enums import DeviceTypes
+from models.partitions import add_months, create_device_partition, create_month_partitions
+
+# revision identifiers, used by Alembic.
+revision = '8c4e1d6a2b7f'
+down_revision = '3f9b2c7d1a4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The date becomes part of the primary key, which must include every partition key.
+    # Existing device partitions are kept as is and attached as the first range of the new ones.
+    # Their copies of the (pk, user_device_type) unique constraint are dropped along with the parent one.
+    connection = op.get_bind()
+    op.execute("UPDATE sessions SET event_date = 'epoch' WHERE event_date IS NULL")
+    for device in DeviceTypes:
+        name = f'sessions_{device.value}'
+        constraints = connection.execute(sa.text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:name AS regclass) AND contype IN ('p', 'u')",
+        ), {'name': name}).scalars().all()
+        op.execute(f'ALTER TABLE sessions DETACH PARTITION {name}')
+        op.execute(f'ALTER TABLE {name} RENAME TO {name}_legacy')
+        for constraint in constraints:
+            op.execute(f'ALTER TABLE {name}_legacy DROP CONSTRAINT {constraint}')
+        op.execute(f'ALTER TABLE {name}_legacy ALTER COLUMN event_date SET NOT NULL')
+        op.execute(f'ALTER TABLE {name}_legacy ADD PRIMARY KEY (pk, user_device_type, event_date)')
+    op.execute('ALTER TABLE sessions DROP CONSTRAINT IF EXISTS sessions_pk_user_device_type_key')
+    op.execute('ALTER TABLE sessions DROP CONSTRAINT sessions_pkey')
+    op.alter_column('sessions', 'event_date', nullable=False)
+    op.create_primary_key('sessions_pkey', 'sessions', ['pk', 'user_device_type', 'event_date'])
+    bound = add_months(datetime.utcnow(), 1)
+    for device in DeviceTypes:
+        name = f'sessions_{device.value}'
+        create_device_partition(connection, device)
+        op.execute(f"ALTER TABLE {name} ATTACH PARTITION {name}_legacy FOR VALUES FROM (MINVALUE) TO ('{bound}')")
+    create_month_partitions(connection, CONFIG.history.ahead)
+
+
+def downgrade():
+    for device in DeviceTypes:
+        name = f'sessions_{device.value}'
+        op.execute(f'ALTER TABLE sessions DETACH PARTITION {name}')
+        op.execute(f'ALTER TABLE {name} RENAME TO {name}_monthly')
+    op.drop_constraint('sessions_pkey', 'sessions')
+    op.create_primary_key('sessions_pkey', 'sessions', ['pk', 'user_device_type'])
+    op.create_unique_constraint('sessions_pk_user_device_type_key', 'sessions', ['pk', 'user_device_type'])
+    op.alter_column('sessions', 'event_date', nullable=True)
+    for device in DeviceTypes:
+        name = f'sessions_{device.value}'
+        op.execute(f"CREATE TABLE {name} PARTITION OF sessions FOR VALUES IN ('{device.value}')")
+        op.execute(f'INSERT INTO {name} SELECT * FROM {name}_monthly')
+        op.execute(f'DROP TABLE {name}_monthly')
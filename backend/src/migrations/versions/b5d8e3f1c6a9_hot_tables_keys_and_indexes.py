@@ -0,0 +1,32 @@
+"""Add the missing keys and indexes of the hot tables
+
+Revision ID: b5d8e3f1c6a9
+Revises: 8c4e1d6a2b7f
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b5d8e3f1c6a9'
+down_revision = '8c4e1d6a2b7f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicate role assignments could be stored while the table had no key.
+    op.execute("""
+        DELETE FROM roles_users duplicate USING roles_users kept
+        WHERE duplicate.ctid > kept.ctid
+        AND duplicate.user_pk = kept.user_pk AND duplicate.role_pk = kept.role_pk
+    """)
+    op.create_primary_key('roles_users_pkey', 'roles_users', ['user_pk', 'role_pk'])
+    op.create_index(op.f('ix_roles_users_role_pk'), 'roles_users', ['role_pk'])
+    op.create_index(op.f('ix_social_account_user_pk'), 'social_account', ['user_pk'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_social_account_user_pk'), table_name='social_account')
+    op.drop_index(op.f('ix_roles_users_role_pk'), table_name='roles_users')
+    op.drop_constraint('roles_users_pkey', 'roles_users')
@@ -0,0 +1,24 @@
+"""Add the modification date of users
+
+Revision ID: c7e2a9d4f0b3
+Revises: b5d8e3f1c6a9
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9d4f0b3'
+down_revision = 'b5d8e3f1c6a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE users SET updated_at = now() AT TIME ZONE 'utc'")
+
+
+def downgrade():
+    op.drop_column('users', 'updated_at')
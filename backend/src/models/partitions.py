@@ -0,0 +1,171 @@
+import logging
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from core.enums import DeviceTypes
+
+logger = logging.getLogger(__name__)
+
+RANGE_BOUNDS = re.compile(r'FROM \((.+?)\) TO \((.+?)\)')
+DEVICE_PARTITIONS = tuple(f'sessions_{device.value}' for device in DeviceTypes)
+
+Bounds = Tuple[Optional[datetime], Optional[datetime]]
+Partition = Tuple[str, Optional[datetime], Optional[datetime]]
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Get the first day of the month that is a number of months away from the given one.
+
+    Args:
+        month: Any moment of the month
+        months: Number of months, negative to go back
+
+    Returns:
+        datetime: Start of the month
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def parse_bounds(bound: str) -> Optional[Bounds]:
+    """Parse the bounds of a date range partition as printed by PostgreSQL.
+
+    Args:
+        bound: Partition bound expression
+
+    Returns:
+        Optional[Bounds]: Lower and upper bound, None if unbounded, or None for the default partition
+    """
+    match = RANGE_BOUNDS.search(bound)
+    if match is None:
+        return None
+    lower, upper = (
+        None if value.endswith('VALUE') else datetime.fromisoformat(value.strip("'")) for value in match.groups()
+    )
+    return lower, upper
+
+
+def range_partitions(connection: Connection, parent: str) -> List[Partition]:
+    """List the date range partitions of a device partition, the default partition is skipped.
+
+    Args:
+        connection: Database connection
+        parent: Name of the device partition
+
+    Returns:
+        List[Partition]: Partition name and its bounds, None if unbounded
+    """
+    rows = connection.execute(statement=text(text="""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), parameters={'parent': parent})
+    partitions = [(name, parse_bounds(bound)) for name, bound in rows]
+    return [(name, *bounds) for name, bounds in partitions if bounds]
+
+
+def create_device_partition(connection: Connection, device: DeviceTypes) -> None:
+    """Create the partition of a device type, sub-partitioned by month, with a default sub-partition.
+
+    Args:
+        connection: Database connection
+        device: Device type
+    """
+    connection.execute(statement=text(text=f"""
+        CREATE TABLE "sessions_{device.value}" PARTITION OF "sessions" FOR VALUES IN ('{device.value}')
+        PARTITION BY RANGE (event_date)
+    """))
+    connection.execute(statement=text(text=f"""
+        CREATE TABLE "sessions_{device.value}_default" PARTITION OF "sessions_{device.value}" DEFAULT
+    """))
+
+
+def create_month_partition(
+    connection: Connection, parent: str, lower: datetime, partitions: List[Partition],
+) -> Optional[str]:
+    """Create the partition of a month unless the month is already covered or has rows in the default partition.
+
+    Args:
+        connection: Database connection
+        parent: Name of the device partition
+        lower: Start of the month
+        partitions: Existing date range partitions of the device partition
+
+    Returns:
+        Optional[str]: Name of the created partition or None if it was skipped
+    """
+    upper = add_months(lower, 1)
+    if any((low is None or low < upper) and (up is None or lower < up) for _, low, up in partitions):
+        return None
+    stray = connection.execute(statement=text(text=f"""
+        SELECT 1 FROM "{parent}_default" WHERE event_date >= :lower AND event_date < :upper LIMIT 1
+    """), parameters={'lower': lower, 'upper': upper})
+    if stray.first():
+        logger.warning('Partition of %s for %s is not created, its rows are in the default one', parent, lower)
+        return None
+    name = '{parent}_{month}'.format(parent=parent, month=lower.strftime('%Y_%m'))
+    connection.execute(statement=text(text=f"""
+        CREATE TABLE "{name}" PARTITION OF "{parent}" FOR VALUES FROM ('{lower}') TO ('{upper}')
+    """))
+    return name
+
+
+def create_month_partitions(connection: Connection, ahead: int, now: Optional[datetime] = None) -> List[str]:
+    """Create monthly partitions of every device partition from the current month on.
+
+    Months already covered by a partition are skipped, as well as months that already have rows in the default
+    partition: such a partition could only be created by moving the rows out of the default one.
+
+    Args:
+        connection: Database connection
+        ahead: Number of months to create after the current one
+        now: Current time, UTC now by default
+
+    Returns:
+        List[str]: Names of the created partitions
+    """
+    start = add_months(now or datetime.utcnow(), 0)
+    created: List[str] = []
+    for parent in DEVICE_PARTITIONS:
+        partitions = range_partitions(connection, parent)
+        created.extend(filter(None, (
+            create_month_partition(connection, parent, add_months(start, month), partitions)
+            for month in range(ahead + 1)
+        )))
+    return created
+
+
+def drop_month_partitions(
+    connection: Connection, retention: int, detach: bool = False, now: Optional[datetime] = None,
+) -> List[str]:
+    """Remove the partitions of every device partition that only hold sessions older than the retention period.
+
+    Args:
+        connection: Database connection
+        retention: Number of full months to keep before the current one, nothing is removed if not positive
+        detach: Whether to keep the partitions as standalone tables instead of dropping them
+        now: Current time, UTC now by default
+
+    Returns:
+        List[str]: Names of the removed partitions
+    """
+    if retention <= 0:
+        return []
+    cutoff = add_months(now or datetime.utcnow(), -retention)
+    expired = {
+        name: parent
+        for parent in DEVICE_PARTITIONS
+        for name, _, upper in range_partitions(connection, parent)
+        if upper and upper <= cutoff
+    }
+    for name, parent in expired.items():
+        connection.execute(statement=text(text=f'ALTER TABLE "{parent}" DETACH PARTITION "{name}"'))
+        if not detach:
+            connection.execute(statement=text(text=f'DROP TABLE "{name}"'))
+    return list(expired)
@@ -46,5 +46,7 @@ roles_users = db.Table(
         UUID(as_uuid=True),
         db.ForeignKey('roles.pk', ondelete='CASCADE'),
         nullable=False,
+        index=True,
     ),
+    db.PrimaryKeyConstraint('user_pk', 'role_pk'),
 )
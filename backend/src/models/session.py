@@ -1,14 +1,59 @@
 import uuid
 from datetime import datetime
+from functools import lru_cache
 
-from sqlalchemy import Table, text
+from sqlalchemy import Table, event, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.engine import Connection
 from sqlalchemy.orm import validates
-from user_agents import parse as parse_user_agent
 from werkzeug.user_agent import UserAgent
 
 from apps.db import db
+from core.config import CONFIG
+from core.enums import DeviceTypes
+from models.partitions import create_device_partition, create_month_partitions
+
+
+def device_type(user_agent: str) -> str:
+    """Determine the user's device type by the User-Agent string.
+
+    User-Agents of our own clients are matched by their configured prefixes, the rest are parsed.
+
+    Args:
+        user_agent: User-Agent string
+
+    Returns:
+        str: User's device type
+    """
+    for prefix, device in CONFIG.agents.clients.items():
+        if user_agent.startswith(prefix):
+            return DeviceTypes(device).value
+    return parse_device_type(user_agent)
+
+
+@lru_cache(maxsize=CONFIG.agents.size)
+def parse_device_type(user_agent: str) -> str:
+    """Parse the User-Agent string and determine the user's device type.
+
+    Results are memoized, `parse_device_type.cache_info()` reports the hits and misses. The parser and its
+    regular expressions are loaded on the first call rather than at startup.
+
+    Args:
+        user_agent: User-Agent string
+
+    Returns:
+        str: User's device type
+    """
+    from user_agents import parse as parse_user_agent  # noqa: WPS433
+
+    parsed = parse_user_agent(user_agent)
+    if parsed.is_pc:
+        return DeviceTypes.PC.value
+    if parsed.is_tablet:
+        return DeviceTypes.TABLET.value
+    if parsed.is_mobile:
+        return DeviceTypes.MOBILE.value
+    return DeviceTypes.OTHER.value
 
 
 class Session(db.Model):  # type: ignore[name-defined]
@@ -23,6 +68,7 @@ class Session(db.Model):  # type: ignore[name-defined]
     )
     event_date = db.Column(
         db.DateTime,
+        primary_key=True,
         default=datetime.utcnow,
     )
     user_pk = db.Column(
@@ -33,6 +79,11 @@ class Session(db.Model):  # type: ignore[name-defined]
     user_agent = db.Column(db.String)
     user_device_type = db.Column(db.Text, primary_key=True)
 
+    __table_args__ = (
+        db.Index('ix_sessions_user_pk_event_date', user_pk, event_date.desc(), pk.desc()),
+        {'postgresql_partition_by': 'LIST (user_device_type)'},
+    )
+
     @validates('user_device_type')
     def validate_user_device_type(self, key: str, value: UserAgent) -> str:
         """Parse the User-agent data and determine the user's device type.
@@ -44,15 +95,7 @@ class Session(db.Model):  # type: ignore[name-defined]
         Returns:
             str: User's device type
         """
-        device = None
-        user_agent = parse_user_agent(value.string)
-        if user_agent.is_pc:
-            device = 'pc'
-        elif user_agent.is_tablet:
-            device = 'tablet'
-        elif user_agent.is_mobile:
-            device = 'mobile'
-        return device or 'other'
+        return device_type(value.string)
 
 
 def create_partition(target: Table, connection: Connection, **kwargs) -> None:
@@ -75,3 +118,19 @@ def create_partition(target: Table, connection: Connection, **kwargs) -> None:
     connection.execute(statement=text(text="""
         CREATE TABLE IF NOT EXISTS "sessions_other" PARTITION OF "sessions" FOR VALUES IN ('other')
     """))
+
+
+def create_partitions(target: Table, connection: Connection, **kwargs) -> None:
+    """Partition the 'sessions' table by the user's device and then by month.
+
+    Args:
+        target: Target table
+        connection: Database connection
+        kwargs: Optional keyword arguments
+    """
+    for device in DeviceTypes:
+        create_device_partition(connection, device)
+    create_month_partitions(connection, CONFIG.history.ahead)
+
+
+event.listen(Session.__table__, 'after_create', create_partitions)
@@ -1,10 +1,11 @@
 import uuid
+from datetime import datetime
 
-from flask_security.utils import hash_password
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import validates
 
 from apps.db import db
+from apps.hashing import hash_password
 from models.role import roles_users
 
 
@@ -29,6 +30,11 @@ class User(db.Model):  # type: ignore[name-defined]
     active = db.Column(
         db.Boolean(),
     )
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
     roles = db.relationship(
         'Role',
         secondary=roles_users,
@@ -70,6 +76,7 @@ class SocialAccount(db.Model):  # type: ignore[name-defined]
         UUID(as_uuid=True),
         db.ForeignKey('users.pk', ondelete='CASCADE'),
         nullable=False,
+        index=True,
     )
     user = db.relationship(
         User,
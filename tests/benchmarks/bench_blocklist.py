@@ -0,0 +1,44 @@
+"""Latency of a protected endpoint with and without the local revocation cache.
+
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_blocklist
+"""
+import time
+
+from apps.blocklist import blocklist
+from apps.cache import bus
+from apps.security import user_datastore as postgres
+from core.config import CONFIG
+from tests import conftest as test
+from tests.benchmarks.utils import measure, report, setup_app
+
+REPEAT = 2000
+
+
+def main():
+    app = setup_app()
+    client = app.test_client()
+    postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    postgres.commit()
+    body = {'email': test.USER_EMAIL, 'password': test.USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+
+    def protected_request():
+        client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers)
+
+    def blocklist_lookup():
+        blocklist.is_revoked({'jti': 'not-revoked', 'user_id': 'not-revoked', 'generation': 0})
+
+    while not bus.ready:
+        time.sleep(0.1)
+    for cached in (False, True):
+        blocklist.cached = cached
+        label = 'cache' if cached else 'redis'
+        report(f'GET /users ({label})', measure(protected_request, REPEAT))
+        report(f'blocklist lookup ({label})', measure(blocklist_lookup, REPEAT))
+
+
+if __name__ == '__main__':
+    main()
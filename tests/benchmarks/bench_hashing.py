@@ -0,0 +1,74 @@
+"""Latency of a protected endpoint during a login storm, with password hashing inline and in threads.
+
+Latency includes the time the request waits for the event loop to schedule it again.
+
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_hashing
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import time  # noqa: E402
+
+import gevent  # noqa: E402
+from gevent.pool import Pool  # noqa: E402
+
+from apps.hashing import hashing  # noqa: E402
+from apps.security import user_datastore as postgres  # noqa: E402
+from core.config import CONFIG  # noqa: E402
+from tests import conftest as test  # noqa: E402
+from tests.benchmarks.utils import report, setup_app  # noqa: E402
+
+SECONDS = 10
+LOGINS = 16
+
+
+def main():
+    app = setup_app()
+    client = app.test_client()
+    postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    postgres.commit()
+    body = {'email': test.USER_EMAIL, 'password': test.USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+    statuses = {}
+
+    def login():
+        with app.app_context():
+            status = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).status_code
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def storm(pool: Pool):
+        while True:
+            pool.spawn(login)
+
+    def protected_requests():
+        samples = []
+        deadline = time.perf_counter() + SECONDS
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            gevent.sleep(0)
+            with app.app_context():
+                client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers)
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    report('GET /users (idle)', protected_requests())
+    for label, inline in (('inline', True), ('threads', False)):
+        if inline:
+            hashing.run = lambda func, *args: func(*args)
+        else:
+            del hashing.run
+        statuses.clear()
+        pool = Pool(LOGINS)
+        logins = gevent.spawn(storm, pool)
+        report(f'GET /users (login storm, {label})', protected_requests())
+        logins.kill()
+        pool.join()
+        print(f'{"":<40} login statuses {statuses}')
+
+
+if __name__ == '__main__':
+    main()
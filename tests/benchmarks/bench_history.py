@@ -0,0 +1,40 @@
+"""Time a login spends writing its session, with the login history written inline and behind.
+
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_history
+"""
+import time
+
+from werkzeug.user_agent import UserAgent
+
+from apps.history import history
+from apps.security import user_datastore as postgres
+from models.session import Session
+from tests import conftest as test
+from tests.benchmarks.utils import measure, report, setup_app
+
+REPEAT = 2000
+USER_AGENT = UserAgent('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/108.0 Safari/537.36')
+
+
+def main():
+    setup_app()
+    user = postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    postgres.commit()
+
+    def write_session():
+        postgres.create_session(user, USER_AGENT)
+        postgres.commit()
+
+    for mode in ('sync', 'queue'):
+        history.queued = mode == 'queue'
+        report(f'login history write ({mode})', measure(write_session, REPEAT))
+    start = time.perf_counter()
+    history.flush()
+    print(f'{"flush of the remaining queue":<40} {(time.perf_counter() - start) * 1000:.1f} ms')
+    print(f'{"sessions stored":<40} {Session.query.count()} of {2 * (REPEAT + 50)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Latency of login history pages by number and by cursor for a user with 1M sessions.
+
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_history_pages
+"""
+from sqlalchemy import text
+
+from apps.db import db
+from apps.security import user_datastore as postgres
+from apps.utils import encode_cursor
+from core.config import CONFIG
+from models.session import Session
+from tests import conftest as test
+from tests.benchmarks.utils import measure, report, setup_app
+
+SESSIONS = 1_000_000
+PAGE_SIZE = 20
+DEPTHS = (0, 1_000, 100_000, 900_000)
+REPEAT = 20
+
+
+def main():
+    app = setup_app()
+    client = app.test_client()
+    user = postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    postgres.commit()
+    db.session.execute(text("""
+        INSERT INTO sessions (pk, event_date, user_pk, user_agent, user_device_type)
+        SELECT gen_random_uuid(), now() - number * interval '1 second', :user_pk, 'benchmark',
+               (ARRAY['pc', 'tablet', 'mobile', 'other'])[number % 4 + 1]
+        FROM generate_series(1, :sessions) AS number
+    """), {'user_pk': user.pk, 'sessions': SESSIONS})
+    db.session.commit()
+    db.session.execute(text('ANALYZE sessions'))
+    body = {'email': test.USER_EMAIL, 'password': test.USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+
+    for depth in DEPTHS:
+        by_number = {'page_number': depth // PAGE_SIZE + 1, 'page_size': PAGE_SIZE}
+        cursor = ''
+        if depth:
+            last = Session.query.filter(Session.user_pk == user.pk).order_by(
+                Session.event_date.desc(), Session.pk.desc(),
+            ).offset(depth - 1).first()
+            cursor = encode_cursor(last.event_date, last.pk)
+        by_cursor = {'cursor': cursor, 'page_size': PAGE_SIZE}
+
+        def page_by_number():
+            client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string=by_number)
+
+        def page_by_cursor():
+            client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string=by_cursor)
+
+        report(f'page at {depth} by number', measure(page_by_number, REPEAT, warmup=2))
+        report(f'page at {depth} by cursor', measure(page_by_cursor, REPEAT, warmup=2))
+
+
+if __name__ == '__main__':
+    main()
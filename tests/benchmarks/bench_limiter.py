@@ -0,0 +1,56 @@
+"""Rate limiter overhead per request and Redis memory per key for each strategy, and the cost of a hit with leases.
+
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_limiter
+"""
+import itertools
+
+from limits import parse
+from limits.strategies import STRATEGIES
+
+from apps.limiter import LeasedRateLimiter, rate_limiter
+from apps.redis import redis_client
+from core.config import CONFIG
+from tests.benchmarks.utils import measure, report, setup_app
+
+REPEAT = 5000
+HITS = 1000
+LEASE = 50
+
+
+def main():
+    client = setup_app().test_client()
+    addresses = (f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}' for number in itertools.count())
+
+    def read_roles():
+        client.get(f'{CONFIG.flask.url_prefix}/roles', environ_base={'REMOTE_ADDR': next(addresses)})
+
+    report('GET /roles without limiter', measure(read_roles, REPEAT))
+    rate_limiter.enabled = True
+    storage = rate_limiter.limiter.storage
+    for strategy, limiter in STRATEGIES.items():
+        rate_limiter._limiter = limiter(storage)
+        report(f'GET /roles with {strategy}', measure(read_roles, REPEAT))
+
+        item = parse(f'{HITS * 10}/minute')
+        rate_limiter.reset()
+        for _ in range(HITS):
+            rate_limiter.limiter.hit(item, 'benchmark')
+        memory = sum(redis_client.memory_usage(key) for key in redis_client.keys('LIMITS:*'))
+        print(f'{f"Redis memory after {HITS} hits ({strategy})":<40} {memory} bytes')
+    rate_limiter.reset()
+
+    item = parse(f'{REPEAT * 100}/minute')
+    limiters = {strategy: limiter(storage) for strategy, limiter in STRATEGIES.items()}
+    limiters[f'leases of {LEASE}'] = LeasedRateLimiter(redis_client, lease=LEASE, lease_ttl=1)
+    for name, limiter in limiters.items():
+        commands = redis_client.info('stats')['total_commands_processed']
+        report(f'Hit one key with {name}', measure(lambda: limiter.hit(item, 'benchmark'), REPEAT))
+        commands = redis_client.info('stats')['total_commands_processed'] - commands
+        print(f'{f"Redis commands per hit ({name})":<40} {commands / (REPEAT + 50):.2f}')
+        rate_limiter.reset()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Latency per request without the metrics hooks, with metrics kept in memory and with metrics kept in the files
+shared by gunicorn workers, and the cost of a single histogram observation in each mode.
+
+Every mode runs in its own process, as prometheus_client picks the storage when it is imported. Passwords are
+hashed with the lowest bcrypt cost, so that hashing does not hide the overhead on login.
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_metrics
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from apps.hashing import context_settings
+from apps.metrics import request_seconds
+from apps.security import user_datastore as postgres
+from core.config import CONFIG
+from tests import conftest as test
+from tests.benchmarks.utils import measure, report, setup_app
+
+MODES = {
+    'no hooks': {'METRICS_ENABLED': 'false'},
+    'in memory': {'METRICS_ENABLED': 'true'},
+    'multiprocess': {'METRICS_ENABLED': 'true', 'PROMETHEUS_MULTIPROC_DIR': ''},
+}
+REPEAT = 2000
+
+
+def run(mode: str):
+    app = setup_app()
+    app.extensions['security'].pwd_context.update(**context_settings('bcrypt', 4, CONFIG.hashing.memory))
+    client = app.test_client()
+    postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    postgres.commit()
+    body = {'email': test.USER_EMAIL, 'password': test.USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+    endpoints = {
+        'POST /sessions': lambda: client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body),
+        'GET /sessions': lambda: client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers),
+        'GET /roles': lambda: client.get(f'{CONFIG.flask.url_prefix}/roles'),
+    }
+    for endpoint, request in endpoints.items():
+        report(f'{endpoint} ({mode})', measure(request, REPEAT))
+    histogram = request_seconds.labels('GET', 'benchmark', 200)
+    report(f'histogram observe ({mode})', measure(lambda: histogram.observe(0.01), REPEAT * 10))
+
+
+def main():
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+        return
+    for mode, environment in MODES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            environment = {name: value or directory for name, value in environment.items()}
+            subprocess.run(
+                [sys.executable, '-m', 'tests.benchmarks.bench_metrics', mode], env={**os.environ, **environment},
+                check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Redis connections opened under gevent load with the shared connection pool.
+
+Every request checks the token against Redis (the local revocation cache is turned off), so the
+benchmark should report as many new connections as there are concurrent greenlets at most, and
+none after the warmup.
+
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_redis_pool
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import time  # noqa: E402
+
+import gevent  # noqa: E402
+from gevent.pool import Pool  # noqa: E402
+
+from apps.blocklist import blocklist  # noqa: E402
+from apps.redis import redis_client  # noqa: E402
+from apps.security import user_datastore as postgres  # noqa: E402
+from core.config import CONFIG  # noqa: E402
+from tests import conftest as test  # noqa: E402
+from tests.benchmarks.utils import setup_app  # noqa: E402
+
+RPS = 1000
+SECONDS = 10
+CONCURRENCY = 100
+
+
+def connections_received() -> int:
+    return redis_client.info('stats')['total_connections_received']
+
+
+def main():
+    app = setup_app()
+    client = app.test_client()
+    postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    postgres.commit()
+    body = {'email': test.USER_EMAIL, 'password': test.USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+    blocklist.cached = False
+    statuses = {}
+
+    def protected_request():
+        with app.app_context():
+            status = client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers).status_code
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def load(seconds: int):
+        pool = Pool(CONCURRENCY)
+        start = time.perf_counter()
+        for sent in range(RPS * seconds):
+            delay = start + sent / RPS - time.perf_counter()
+            if delay > 0:
+                gevent.sleep(delay)
+            pool.spawn(protected_request)
+        pool.join()
+        return time.perf_counter() - start
+
+    load(seconds=3)
+    statuses.clear()
+    before = connections_received()
+    elapsed = load(seconds=SECONDS)
+    opened = connections_received() - before
+    total = sum(statuses.values())
+    print(f'requests          {total} in {elapsed:.1f} s ({total / elapsed:.0f} RPS), statuses {statuses}')
+    print(f'pool connections  {len(redis_client.connection_pool._connections)} of {CONFIG.redis.pool}')
+    print(f'new connections   {opened} (Redis total_connections_received delta)')
+
+
+if __name__ == '__main__':
+    main()
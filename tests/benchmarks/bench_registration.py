@@ -0,0 +1,49 @@
+"""Registration throughput and the number of statements per registration.
+
+Passwords are hashed with the lowest bcrypt cost to measure the database work of a registration.
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_registration
+"""
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+
+from apps.db import db
+from apps.hashing import context_settings
+from core.config import CONFIG
+from tests.benchmarks.utils import measure, report, setup_app
+
+REPEAT = 2000
+CONCURRENCY = 8
+
+
+def main():
+    app = setup_app()
+    app.extensions['security'].pwd_context.update(**context_settings('bcrypt', 4, CONFIG.hashing.memory))
+    numbers = itertools.count()
+
+    def register():
+        body = {'email': f'user{next(numbers)}@mail.com', 'password': 'benchmark'}
+        app.test_client().post(f'{CONFIG.flask.url_prefix}/users', json=body)
+
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    for _ in range(2):
+        register()
+    statements.clear()
+    register()
+    print(f'{"statements per registration":<40} {len(statements)}')
+
+    report('registration', measure(register, REPEAT))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        for _ in pool.map(lambda _: register(), range(REPEAT)):
+            pass
+    print(f'{f"registrations/s with {CONCURRENCY} threads":<40} {REPEAT / (time.perf_counter() - start):9.1f}')
+
+
+if __name__ == '__main__':
+    main()
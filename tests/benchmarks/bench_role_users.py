@@ -0,0 +1,50 @@
+"""Time to subscribe 10k users one request at a time and with the bulk role endpoint.
+
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_role_users
+"""
+import time
+
+from sqlalchemy import text
+
+from apps.db import db
+from apps.security import user_datastore as postgres
+from core.config import CONFIG
+from core.enums import AuthRoles
+from tests import conftest as test
+from tests.benchmarks.utils import setup_app
+
+USERS = 10_000
+
+
+def main():
+    client = setup_app().test_client()
+    admin = postgres.create_user(email=test.ADMIN_EMAIL, password=test.ADMIN_PASSWORD)
+    postgres.add_role_to_user(admin, postgres.find_or_create_role(AuthRoles.ADMIN.value))
+    postgres.find_or_create_role(AuthRoles.SUBSCRIBER.value)
+    postgres.commit()
+    user_pks = db.session.execute(text("""
+        INSERT INTO users (pk, email, password, active)
+        SELECT gen_random_uuid(), 'user' || number || '@mail.com', '', true FROM generate_series(1, :users) AS number
+        RETURNING pk
+    """), {'users': USERS}).scalars().all()
+    db.session.commit()
+    body = {'email': test.ADMIN_EMAIL, 'password': test.ADMIN_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+
+    start = time.perf_counter()
+    for user_pk in user_pks:
+        client.post(f'{CONFIG.flask.url_prefix}/users/{user_pk}/subscribe', headers=headers)
+    print(f'{"one request per user":<40} {time.perf_counter() - start:9.2f} s')
+    url = f'{CONFIG.flask.url_prefix}/roles/{AuthRoles.SUBSCRIBER.value}/users'
+    client.delete(url, headers=headers, json={'users': [str(user_pk) for user_pk in user_pks]})
+
+    start = time.perf_counter()
+    client.post(url, headers=headers, json={'users': [str(user_pk) for user_pk in user_pks]})
+    print(f'{"bulk request":<40} {time.perf_counter() - start:9.2f} s')
+
+
+if __name__ == '__main__':
+    main()
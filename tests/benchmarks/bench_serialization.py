@@ -0,0 +1,68 @@
+"""CPU time per request of the endpoints with the largest responses, with stdlib JSON and marshmallow dumps
+and with orjson and compiled dumps.
+
+Passwords are hashed with the lowest bcrypt cost, so that hashing does not hide serialization on login.
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_serialization
+"""
+import time
+
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import Schema
+from sqlalchemy import text
+from webargs.flaskparser import parser
+
+from apps.db import db
+from apps.hashing import context_settings
+from apps.security import user_datastore as postgres
+from apps.serialization import CompiledSchema, ORJSONParser, ORJSONProvider
+from core.config import CONFIG
+from tests import conftest as test
+from tests.benchmarks.utils import measure, report, setup_app
+
+SESSIONS = 100
+ROLES = 100
+REPEAT = 2000
+
+
+def main():
+    app = setup_app()
+    app.extensions['security'].pwd_context.update(**context_settings('bcrypt', 4, CONFIG.hashing.memory))
+    client = app.test_client()
+    user = postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    for number in range(ROLES):
+        postgres.create_role(name=f'role{number}', description=f'Benchmark role {number}')
+    postgres.commit()
+    db.session.execute(text("""
+        INSERT INTO sessions (pk, event_date, user_pk, user_agent, user_device_type)
+        SELECT gen_random_uuid(), now() - number * interval '1 second', :user_pk, 'benchmark', 'pc'
+        FROM generate_series(1, :sessions) AS number
+    """), {'user_pk': user.pk, 'sessions': SESSIONS})
+    db.session.commit()
+    body = {'email': test.USER_EMAIL, 'password': test.USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+    endpoints = {
+        'POST /sessions': lambda: client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body),
+        f'GET /sessions ({SESSIONS})': lambda: client.get(
+            f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string={'page_size': SESSIONS},
+        ),
+        f'GET /roles ({ROLES})': lambda: client.get(f'{CONFIG.flask.url_prefix}/roles'),
+    }
+    compiled_dump = CompiledSchema.dump
+    setups = {
+        'stdlib': (DefaultJSONProvider(app), parser, Schema.dump),
+        'orjson': (ORJSONProvider(app), ORJSONParser(), compiled_dump),
+    }
+    for name, (provider, request_parser, dump) in setups.items():
+        app.json = provider
+        app.config['APISPEC_WEBARGS_PARSER'] = request_parser
+        CompiledSchema.dump = dump  # type: ignore[assignment]
+        for endpoint, request in endpoints.items():
+            report(f'{endpoint} CPU ({name})', measure(request, REPEAT, clock=time.process_time))
+    CompiledSchema.dump = compiled_dump  # type: ignore[assignment]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Latency per request with tracing disabled, with tracing enabled but the requests not sampled, and with every
+request traced, including the spans of its queries, blocklist lookups and password check.
+
+Every mode runs in its own process, as the tracer provider can only be set once per process. Spans are sent by
+the batch processor to the Jaeger agent address, it does not matter whether an agent listens there. Passwords
+are hashed with the lowest bcrypt cost, so that hashing does not hide the tracing overhead on login.
+Run from the repository root with PostgreSQL and Redis available:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_tracing
+"""
+import os
+import subprocess
+import sys
+
+from apps.hashing import context_settings
+from apps.security import user_datastore as postgres
+from core.config import CONFIG
+from tests import conftest as test
+from tests.benchmarks.utils import measure, report, setup_app
+
+MODES = {
+    'disabled': {'JAEGER_ENABLED': 'false'},
+    'not sampled': {'JAEGER_ENABLED': 'true', 'JAEGER_RATIO': '0'},
+    'sampled': {'JAEGER_ENABLED': 'true', 'JAEGER_RATIO': '1'},
+}
+REPEAT = 2000
+
+
+def run(mode: str):
+    app = setup_app()
+    app.extensions['security'].pwd_context.update(**context_settings('bcrypt', 4, CONFIG.hashing.memory))
+    client = app.test_client()
+    postgres.create_user(email=test.USER_EMAIL, password=test.USER_PASSWORD)
+    postgres.commit()
+    body = {'email': test.USER_EMAIL, 'password': test.USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+    endpoints = {
+        'POST /sessions': lambda: client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body),
+        'GET /sessions': lambda: client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers),
+        'GET /roles': lambda: client.get(f'{CONFIG.flask.url_prefix}/roles'),
+    }
+    for endpoint, request in endpoints.items():
+        report(f'{endpoint} ({mode})', measure(request, REPEAT))
+
+
+def main():
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+        return
+    for mode, environment in MODES.items():
+        subprocess.run(
+            [sys.executable, '-m', 'tests.benchmarks.bench_tracing', mode], env={**os.environ, **environment},
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
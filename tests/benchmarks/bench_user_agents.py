@@ -0,0 +1,51 @@
+"""Device type classification of a realistic User-Agent corpus, parsed every time and memoized.
+
+The internal cache of `ua_parser` is cleared before every parse, as it only holds 200 strings.
+
+Run from the repository root:
+
+    PYTHONPATH=backend/src python -m tests.benchmarks.bench_user_agents
+"""
+import random
+
+from ua_parser import user_agent_parser
+
+from models.session import device_type, parse_device_type
+from tests.benchmarks.utils import measure, report
+
+REPEAT = 20000
+CORPUS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.1 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:107.0) Gecko/20100101 Firefox/107.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 16_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 13; SM-S901B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 12; Pixel 6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPad; CPU OS 16_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.1 Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 12; SM-X906C) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 10; SMART TV) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.45 Safari/537.36',
+    'okhttp/4.10.0',
+    'python-requests/2.28.1',
+)
+
+
+def main():
+    random.seed(0)
+    weights = [1 / rank for rank in range(1, len(CORPUS) + 1)]
+    traffic = iter(random.choices(CORPUS, weights=weights, k=2 * REPEAT + 100))
+
+    def parsed():
+        user_agent_parser._PARSE_CACHE.clear()
+        parse_device_type.__wrapped__(next(traffic))
+
+    def memoized():
+        device_type(next(traffic))
+
+    report('device type (parsed)', measure(parsed, REPEAT))
+    report('device type (memoized)', measure(memoized, REPEAT))
+    print(f'{"":<40} {parse_device_type.cache_info()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import atexit
+import statistics
+import time
+from typing import Callable, List
+
+from manage import create_app
+from apps.db import db
+from apps.limiter import rate_limiter
+
+
+def setup_app():
+    """Create the application with an empty database and rate limiting turned off, the database is emptied at exit."""
+    app = create_app()
+    rate_limiter.enabled = False
+    app.app_context().push()
+    db.drop_all()
+    db.create_all()
+    atexit.register(teardown_app)
+    return app
+
+
+def teardown_app():
+    """Release the connection of the benchmark, so that it does not lock the tables, and empty the database."""
+    db.session.remove()
+    db.drop_all()
+
+
+def measure(
+    func: Callable, repeat: int, warmup: int = 50, clock: Callable[[], float] = time.perf_counter,
+) -> List[float]:
+    """Call a function several times and return the duration of each call in milliseconds, by `clock`."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = clock()
+        func()
+        samples.append((clock() - start) * 1000)
+    return samples
+
+
+def report(title: str, samples: List[float]):
+    """Print p50/p99 latency of the samples."""
+    quantiles = statistics.quantiles(samples, n=100)
+    print(f'{title:<40} p50={quantiles[49]:9.4f} ms  p99={quantiles[98]:9.4f} ms  n={len(samples)}')
@@ -1,7 +1,13 @@
+import time
+
 import pytest
 
 from manage import create_app
+from apps.cache import bus
 from apps.db import db
+from apps.limiter import rate_limiter
+from apps.roles import role_catalogue
+from sqlalchemy import event
 from sqlalchemy.orm.session import close_all_sessions
 
 
@@ -13,8 +19,30 @@ def app():
     yield app
     close_all_sessions()
     db.drop_all()
+    role_catalogue.clear()
+    rate_limiter.reset()
 
 
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture
+def statements(app):
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+@pytest.fixture
+def bus_ready(app):
+    deadline = time.monotonic() + 5
+    while not bus.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert bus.ready
@@ -1,8 +1,13 @@
+from datetime import datetime
+
 import pytest
+from sqlalchemy import text
 
+from apps.db import db
 from apps.security import user_datastore as postgres
 from core.config import CONFIG
-from core.enums import AuthRoles
+from core.enums import AuthRoles, DeviceTypes, OAuthProviders
+from models.partitions import add_months
 from tests import conftest as test
 
 
@@ -58,3 +63,33 @@ def new_role():
     role = postgres.create_role(name=test.ROLE_NAME)
     postgres.commit()
     return role
+
+
+@pytest.fixture
+def population(user, admin):
+    db.session.execute(text("""
+        INSERT INTO users (pk, email, password, active)
+        SELECT gen_random_uuid(), 'user' || number || '@mail.com', '', true FROM generate_series(1, 20000) AS number
+    """))
+    db.session.execute(text("""
+        INSERT INTO roles_users (user_pk, role_pk)
+        SELECT users.pk, roles.pk FROM users, roles WHERE roles.name = :role ON CONFLICT DO NOTHING
+    """), {'role': AuthRoles.USER.value})
+    # Sessions older than the current month go to the partitions kept by the monthly partitioning migration
+    for device in DeviceTypes:
+        db.session.execute(text(f"""
+            CREATE TABLE sessions_{device.value}_legacy PARTITION OF sessions_{device.value}
+            FOR VALUES FROM (MINVALUE) TO ('{add_months(datetime.utcnow(), 0)}')
+        """))
+    db.session.execute(text("""
+        INSERT INTO sessions (pk, event_date, user_pk, user_agent, user_device_type)
+        SELECT gen_random_uuid(), now() - number * interval '1 hour', users.pk, '',
+               (ARRAY['pc', 'tablet', 'mobile', 'other'])[number % 4 + 1]
+        FROM users, generate_series(1, CASE WHEN users.pk = :user_pk THEN 2000 ELSE 5 END) AS number
+    """), {'user_pk': user.pk})
+    db.session.execute(text("""
+        INSERT INTO social_account (pk, user_pk, social_id, social_name)
+        SELECT gen_random_uuid(), pk, md5(pk::text), :social_name FROM users
+    """), {'social_name': OAuthProviders.YANDEX.value})
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
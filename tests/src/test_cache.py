@@ -0,0 +1,32 @@
+import time
+
+from apps.cache import InvalidationBus
+from apps.redis import redis_client
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_failing_callback_resynchronizes_caches(app):
+    bus = InvalidationBus()
+    bus.reconnect_delay = 0.1
+    received, resets = [], []
+
+    def callback(message):
+        received.append(message)
+        if message == 'fail':
+            raise ValueError(message)
+
+    bus.subscribe('test_bus', callback, on_reset=lambda: resets.append(True))
+    bus.start(redis_client)
+    assert wait_for(lambda: bus.ready)
+
+    redis_client.publish('test_bus', 'fail')
+    assert wait_for(lambda: len(resets) == 2 and bus.ready)
+    redis_client.publish('test_bus', 'applied')
+
+    assert wait_for(lambda: received[-1] == 'applied')
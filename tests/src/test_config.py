@@ -0,0 +1,28 @@
+from core.config import MainSettings
+
+
+def settings(monkeypatch, **environment):
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+    return MainSettings(_env_nested_delimiter='_')
+
+
+def test_redis_pool_settings(monkeypatch):
+    config = settings(
+        monkeypatch, REDIS_WAIT='3', REDIS_TIMEOUT='0.5', REDIS_CONNECT='2', REDIS_HEARTBEAT='10', REDIS_SOCKET='',
+    )
+
+    assert (config.redis.wait, config.redis.timeout, config.redis.connect) == (3, 0.5, 2)
+    assert config.redis.heartbeat == 10
+    assert config.redis.connection_pool().timeout == 3
+
+
+def test_console_spans_setting(monkeypatch):
+    assert not settings(monkeypatch).jaeger.console
+    assert settings(monkeypatch, JAEGER_CONSOLE='true').jaeger.console
+
+
+def test_agent_clients_setting(monkeypatch):
+    assert settings(monkeypatch).agents.clients == {}
+    clients = settings(monkeypatch, AGENTS_CLIENTS='{"CinemaxApp/": "mobile"}').agents.clients
+    assert clients == {'CinemaxApp/': 'mobile'}
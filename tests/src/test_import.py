@@ -0,0 +1,64 @@
+import json
+from http import HTTPStatus
+
+from flask_security.utils import hash_password
+
+from apps.user_commands import ImportUsers
+from core.config import CONFIG
+from core.enums import AuthRoles
+from models.user import User
+from tests.conftest import USER_EMAIL, USER_PASSWORD
+
+
+def import_users(source, checkpoint=None, roles=None):
+    ImportUsers().run(
+        source=str(source), file_format=None, checkpoint=checkpoint, batch=2, workers=2, rounds=4, roles=roles,
+    )
+
+
+def test_import_users_from_csv(client, user, tmp_path):
+    source = tmp_path / 'users.csv'
+    source.write_text(
+        'email,password,password_hash\n'
+        f'first@mail.com,{USER_PASSWORD},\n'
+        f'{USER_EMAIL},{USER_PASSWORD},\n'
+        'second@mail.com,,\n'
+        f'third@mail.com,,{hash_password(USER_PASSWORD)}\n',
+    )
+
+    import_users(source)
+
+    for email in ('first@mail.com', 'third@mail.com'):
+        response = client.post(f'{CONFIG.flask.url_prefix}/sessions', json={'email': email, 'password': USER_PASSWORD})
+        assert response.status_code == HTTPStatus.CREATED
+    assert User.query.count() == 3
+    assert [role.name for role in User.query.filter_by(email='first@mail.com').one().roles] == [AuthRoles.USER.value]
+
+
+def test_resume_import_from_ndjson(app, tmp_path):
+    source = tmp_path / 'users.ndjson'
+    source.write_text('\n'.join(
+        json.dumps({'email': f'user{number}@mail.com', 'password': USER_PASSWORD}) for number in range(5)
+    ))
+    checkpoint = tmp_path / 'users.checkpoint'
+    checkpoint.write_text('3')
+
+    import_users(source, checkpoint=str(checkpoint), roles=[AuthRoles.SUBSCRIBER.value])
+
+    assert sorted(user.email for user in User.query) == ['user3@mail.com', 'user4@mail.com']
+    assert checkpoint.read_text() == '5'
+    assert User.query.first().roles[0].name == AuthRoles.SUBSCRIBER.value
+
+
+def test_reject_records_with_fields_that_are_not_strings(app, tmp_path, capsys):
+    source = tmp_path / 'users.ndjson'
+    source.write_text('\n'.join(json.dumps(record) for record in (
+        {'email': 1, 'password': USER_PASSWORD},
+        {'email': USER_EMAIL, 'password': 123},
+        {'email': USER_EMAIL, 'password': USER_PASSWORD},
+    )))
+
+    import_users(source)
+
+    assert [user.email for user in User.query] == [USER_EMAIL]
+    assert 'rejected 2' in capsys.readouterr().out
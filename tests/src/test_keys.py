@@ -0,0 +1,32 @@
+from http import HTTPStatus
+
+import jwt
+from jwt import PyJWK
+
+from apps.keys import keyring
+from core.config import CONFIG
+from tests.conftest import USER_EMAIL
+
+
+def test_jwks(client, user_tokens):
+    token = user_tokens['access_token']
+
+    response = client.get('/.well-known/jwks.json')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.cache_control.max_age == CONFIG.jwt.delay
+    jwks = {key['kid']: key for key in response.get_json()['keys']}
+    public_key = PyJWK(jwks[jwt.get_unverified_header(token)['kid']]).key
+    assert jwt.decode(token, public_key, algorithms=[CONFIG.jwt.algorithm])['sub'] == USER_EMAIL
+
+
+def test_rotate_keys(client, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+
+    new_key = keyring.rotate()
+    published_kids = [key['kid'] for key in client.get('/.well-known/jwks.json').get_json()['keys']]
+    response = client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers)
+    (keyring.directory / f'{new_key.kid}.pem').unlink()
+
+    assert new_key.kid in published_kids
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+from limits import parse, parse_many
+
+from apps.limiter import LeasedRateLimiter, request_key
+from apps.redis import redis_client
+from core.config import CONFIG
+
+
+def test_login_limit(client):
+    body = {'email': 'nobody@mail.com', 'password': 'password'}
+    allowed = min(limit.amount for limit in parse_many(CONFIG.limiter.login))
+
+    status_codes = [
+        client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).status_code for _ in range(allowed + 1)
+    ]
+
+    assert status_codes == [HTTPStatus.UNAUTHORIZED] * allowed + [HTTPStatus.TOO_MANY_REQUESTS]
+
+
+def test_role_reads_limit(client):
+    requests = min(limit.amount for limit in parse_many(CONFIG.limiter.default)) + 1
+
+    status_codes = {client.get(f'{CONFIG.flask.url_prefix}/roles').status_code for _ in range(requests)}
+
+    assert status_codes == {HTTPStatus.OK}
+
+
+def test_limits_are_counters(client):
+    for _ in range(5):
+        client.get(f'{CONFIG.flask.url_prefix}/roles')
+
+    keys = redis_client.keys('LIMITS:*')
+
+    assert keys
+    assert {redis_client.type(key) for key in keys} == {b'string'}
+
+
+def test_leased_limit(app):
+    limiter = LeasedRateLimiter(redis_client, lease=10, lease_ttl=60)
+    item = parse('40/minute')
+
+    admitted = [limiter.hit(item, 'client') for _ in range(41)]
+
+    assert admitted == [True] * 40 + [False]
+
+
+def test_lease_takes_tokens_in_chunks(app):
+    limiter = LeasedRateLimiter(redis_client, lease=10, lease_ttl=60)
+    item = parse('40/minute')
+    bucket = f'{limiter.prefix}{item.key_for("client")}'
+
+    limiter.hit(item, 'client')
+    shared = float(redis_client.hget(bucket, 'tokens'))
+    limiter.hit(item, 'client')
+
+    assert shared < 31
+    assert float(redis_client.hget(bucket, 'tokens')) == shared
+
+
+def test_unused_lease_is_returned(app):
+    limiter = LeasedRateLimiter(redis_client, lease=10, lease_ttl=60)
+    item = parse('40/minute')
+    bucket = f'{limiter.prefix}{item.key_for("client")}'
+    limiter.hit(item, 'client')
+
+    limiter.held.release(everything=True)
+
+    assert float(redis_client.hget(bucket, 'tokens')) >= 39
+    assert not limiter.held.leases
+
+
+def test_limit_key_is_forwarded_client_address(app):
+    with app.test_request_context(headers={'X-Forwarded-For': '10.0.0.1, 10.0.0.2'}):
+        assert request_key() == 'ip:10.0.0.2'
+
+
+def test_limit_key_is_user(app, user, user_tokens):
+    headers = {'Authorization': f'Bearer {user_tokens["access_token"]}'}
+
+    with app.test_request_context(headers=headers):
+        assert request_key() == f'user:{user.pk}'
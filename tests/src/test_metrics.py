@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+from prometheus_client import REGISTRY
+
+from apps.db import db
+from core.config import CONFIG
+from tests.conftest import USER_PASSWORD
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def login(client, user):
+    def post(password=USER_PASSWORD):
+        body = {'email': user.email, 'password': password}
+        return client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+    return post
+
+
+def test_metrics_endpoint(client):
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content_type.startswith('text/plain')
+    assert 'auth_request_seconds_bucket' in response.get_data(as_text=True)
+
+
+def test_logins_and_tokens_are_counted(login):
+    successes = sample('auth_logins_total', method='password', result='success')
+    failures = sample('auth_logins_total', method='password', result='failure')
+    tokens = sample('auth_tokens_issued_total', type='access')
+    checks = sample('auth_password_verify_seconds_count')
+
+    login()
+    login(password='wrong')
+
+    assert sample('auth_logins_total', method='password', result='success') == successes + 1
+    assert sample('auth_logins_total', method='password', result='failure') == failures + 1
+    assert sample('auth_tokens_issued_total', type='access') == tokens + 1
+    assert sample('auth_password_verify_seconds_count') == checks + 2
+
+
+def test_requests_are_timed_by_endpoint(login):
+    labels = {'method': 'POST', 'endpoint': 'sessions.sessionview', 'status': '201'}
+    timed = sample('auth_request_seconds_count', **labels)
+
+    login()
+
+    assert sample('auth_request_seconds_count', **labels) == timed + 1
+    assert sample('auth_request_seconds_sum', **labels) > 0
+
+
+def test_blocklist_lookups_are_counted(client, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    lookups = sum(
+        sample('auth_blocklist_lookups_total', source=source, revoked='false') for source in ('local', 'redis')
+    )
+
+    client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers)
+
+    assert sum(
+        sample('auth_blocklist_lookups_total', source=source, revoked='false') for source in ('local', 'redis')
+    ) == lookups + 1
+
+
+def test_rate_limited_requests_are_counted(login):
+    rejected = sample('auth_rate_limited_total', endpoint='sessions.sessionview')
+
+    responses = [login(password='wrong') for _ in range(10)]
+
+    limited = [response for response in responses if response.status_code == HTTPStatus.TOO_MANY_REQUESTS]
+    assert limited
+    assert sample('auth_rate_limited_total', endpoint='sessions.sessionview') == rejected + len(limited)
+
+
+def test_pool_gauges(app):
+    in_use = sample('auth_db_pool_checked_out')
+
+    with db.engine.connect():
+        assert sample('auth_db_pool_checked_out') == in_use + 1
+
+    assert sample('auth_db_pool_checked_out') == in_use
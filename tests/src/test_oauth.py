@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from prometheus_client import REGISTRY
+from werkzeug.exceptions import ServiceUnavailable
+
+from apps.db import db
+from apps.oauth import VkSignIn, YandexSignIn
+from apps.providers import ProviderClient
+from apps.security import user_datastore as postgres
+from core.config import CONFIG, OAuthConfig
+from models.user import SocialAccount, User
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.answer({'access_token': 'token', 'user_id': 'vk-user'})
+
+    def do_GET(self):
+        self.answer({'id': 'yandex-user'})
+
+    def answer(self, body):
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(self.server.status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_provider():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubProviderHandler)
+    server.connections, server.hits, server.delay, server.status = 0, 0, 0, HTTPStatus.OK
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def provider_config():
+    return OAuthConfig(read=0.2, retries=1, failures=2, cooldown=60)
+
+
+def stub(provider, server):
+    url = f'http://127.0.0.1:{server.server_port}/'
+    provider.service.access_token_url = f'{url}token'
+    provider.service.base_url = url
+    return provider
+
+
+@pytest.fixture
+def yandex(app, stub_provider, provider_config):
+    provider = YandexSignIn('id', 'secret', ProviderClient('yandex', provider_config))
+    app.config['OAUTH_PROVIDERS']['yandex'] = stub(provider, stub_provider)
+    return provider
+
+
+def test_callback_reuses_connections(yandex, stub_provider):
+    social_ids = [yandex.callback('code') for _ in range(3)]
+
+    assert social_ids == ['yandex-user'] * 3
+    assert stub_provider.hits == 6
+    assert stub_provider.connections == 1
+
+
+def test_vk_callback(app, stub_provider, provider_config):
+    vk = stub(VkSignIn('id', 'secret', ProviderClient('vk', provider_config)), stub_provider)
+
+    with app.test_request_context():
+        assert vk.callback('code') == 'vk-user'
+
+
+def test_slow_token_exchange_is_not_retried(yandex, stub_provider):
+    stub_provider.delay = 0.5
+    failures = sample('auth_provider_failures_total', provider='yandex')
+    timed = sample('auth_provider_request_seconds_count', provider='yandex')
+
+    with pytest.raises(ServiceUnavailable):
+        yandex.callback('code')
+
+    assert stub_provider.hits == 1
+    assert sample('auth_provider_failures_total', provider='yandex') == failures + 1
+    assert sample('auth_provider_request_seconds_count', provider='yandex') == timed + 1
+
+
+def test_idempotent_requests_are_retried_within_budget(yandex, stub_provider):
+    stub_provider.status = HTTPStatus.SERVICE_UNAVAILABLE
+    attempts = sample('auth_provider_requests_total', provider='yandex')
+    retries = sample('auth_provider_retries_total', provider='yandex')
+
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailable):
+            yandex.client.request('GET', f'http://127.0.0.1:{stub_provider.server_port}/info')
+
+    assert stub_provider.hits == 3
+    assert sample('auth_provider_requests_total', provider='yandex') == attempts + 3
+    assert sample('auth_provider_retries_total', provider='yandex') == retries + 1
+
+
+def test_circuit_opens_after_failures(yandex, stub_provider, provider_config):
+    stub_provider.status = HTTPStatus.INTERNAL_SERVER_ERROR
+    rejected = sample('auth_provider_rejected_total', provider='yandex')
+    for _ in range(provider_config.failures):
+        with pytest.raises(ServiceUnavailable):
+            yandex.callback('code')
+
+    with pytest.raises(ServiceUnavailable):
+        yandex.callback('code')
+
+    assert stub_provider.hits == provider_config.failures
+    assert yandex.client.breaker.state == 'open'
+    assert sample('auth_provider_rejected_total', provider='yandex') == rejected + 1
+
+
+def test_circuit_closes_after_trial(yandex, stub_provider, provider_config):
+    stub_provider.status = HTTPStatus.INTERNAL_SERVER_ERROR
+    for _ in range(provider_config.failures):
+        with pytest.raises(ServiceUnavailable):
+            yandex.callback('code')
+    stub_provider.status = HTTPStatus.OK
+    yandex.client.breaker.cooldown = 0
+
+    assert yandex.callback('code') == 'yandex-user'
+    assert yandex.client.breaker.state == 'closed'
+
+
+def test_login_when_provider_is_down(client, yandex, stub_provider):
+    stub_provider.status = HTTPStatus.BAD_GATEWAY
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/sessions/yandex', query_string={'code': 'code'})
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.get_json()['message'] == 'Provider yandex is unavailable, try again later!'
+
+
+def test_social_login_creates_user_once(client, yandex, statements):
+    for _ in range(2):
+        response = client.get(f'{CONFIG.flask.url_prefix}/sessions/yandex', query_string={'code': 'code'})
+        assert response.status_code == HTTPStatus.CREATED
+
+    account = SocialAccount.query.filter_by(social_id='yandex-user', social_name='yandex').one()
+    assert account.user.password is None
+    assert account.user.sessions.count() == 2
+    assert len([statement for statement, _ in statements if 'INSERT INTO users' in statement]) == 2
+    assert postgres.authenticate_user(account.user.email, '') is None
+
+
+def test_social_login_without_user(client, yandex, monkeypatch):
+    monkeypatch.setattr(postgres, 'find_or_create_social_user', lambda social_id, social_name: None)
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/sessions/yandex', query_string={'code': 'code'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_concurrent_first_social_logins(app):
+    started, user_pks = threading.Event(), []
+
+    def login(commit_after: float):
+        with app.app_context():
+            user_pks.append(postgres.find_or_create_social_user('racer', 'vk'))
+            started.set()
+            time.sleep(commit_after)
+            postgres.commit()
+            db.session.remove()
+
+    first = threading.Thread(target=login, args=(0.3,))
+    first.start()
+    started.wait()
+    second = threading.Thread(target=login, args=(0,))
+    second.start()
+    first.join()
+    second.join()
+
+    assert len(user_pks) == 2
+    assert user_pks[0] == user_pks[1]
+    assert User.query.filter(User.pk == user_pks[0]).count() == 1
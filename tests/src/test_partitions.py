@@ -0,0 +1,50 @@
+from datetime import datetime
+from http import HTTPStatus
+
+from sqlalchemy import text
+
+from apps.db import db
+from apps.principals import Principal
+from core.config import CONFIG
+from models.partitions import add_months, create_month_partitions, drop_month_partitions
+from models.session import Session
+from tests.conftest import USER_PASSWORD
+
+
+def test_login_goes_to_month_partition(client, user):
+    body = {'email': user.email, 'password': USER_PASSWORD}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+    partition = db.session.execute(text('SELECT tableoid::regclass::text FROM sessions')).scalar()
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert partition == f'sessions_other_{datetime.utcnow():%Y_%m}'
+
+
+def test_create_month_partitions(app):
+    connection = db.session.connection()
+
+    created = create_month_partitions(connection, ahead=CONFIG.history.ahead + 1)
+
+    assert len(created) == 4
+    assert f'sessions_pc_{add_months(datetime.utcnow(), CONFIG.history.ahead + 1):%Y_%m}' in created
+
+
+def test_drop_expired_partitions(client, user):
+    body = {'email': user.email, 'password': USER_PASSWORD}
+    client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+    connection = db.session.connection()
+
+    dropped = drop_month_partitions(connection, retention=1, now=add_months(datetime.utcnow(), 2))
+
+    assert f'sessions_other_{datetime.utcnow():%Y_%m}' in dropped
+    assert Session.query.count() == 0
+
+
+def test_history_page_skips_later_partitions(client, user, user_tokens):
+    session = Session.query.one()
+    query = Principal(user).sessions_before(session.event_date, session.pk)
+
+    plan = db.session.execute(text(f'EXPLAIN {query.statement.compile(compile_kwargs={"literal_binds": True})}'))
+
+    assert f'sessions_other_{add_months(datetime.utcnow(), 1):%Y_%m}' not in '\n'.join(row[0] for row in plan)
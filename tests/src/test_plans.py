@@ -0,0 +1,117 @@
+import re
+import uuid
+from datetime import datetime
+from http import HTTPStatus
+
+from sqlalchemy import text
+
+from apps.db import db
+from apps.security import user_datastore as postgres
+from apps.utils import encode_cursor
+from core.config import CONFIG
+from core.enums import OAuthProviders
+from models.partitions import add_months
+from tests.conftest import USER_PASSWORD
+
+EXPLAINED = ('SELECT', 'DELETE', 'UPDATE', 'INSERT', 'WITH')
+HOT_TABLES = re.compile(r'Seq Scan on (users|sessions\w*|roles_users|social_account)\b')
+LARGE_TABLE_ROWS = 1000
+
+
+def sequential_scans(statements):
+    scans = {}
+    connection = db.session.connection()
+    explained = [
+        (statement, parameters) for statement, parameters in statements
+        if statement.lstrip().upper().startswith(EXPLAINED)
+    ]
+    assert explained, 'No statement to check the plan of'
+    for statement, parameters in explained:
+        plan = '\n'.join(row[0] for row in connection.exec_driver_sql(f'EXPLAIN {statement}', parameters))
+        scans.update({match.group(1): statement for match in HOT_TABLES.finditer(plan)})
+    large = connection.execute(
+        text('SELECT relname FROM pg_class WHERE relname = ANY(:tables) AND reltuples > :rows'),
+        {'tables': list(scans), 'rows': LARGE_TABLE_ROWS},
+    )
+    return [f'Seq Scan on {table} in {scans[table]}' for table in large.scalars()]
+
+
+def test_login_plans(client, user, population, statements):
+    body = {'email': user.email, 'password': USER_PASSWORD}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert not sequential_scans(statements)
+
+
+def test_personal_information_plans(client, user_tokens, population, statements):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert not sequential_scans(statements)
+
+
+def test_auth_history_plans(client, user_tokens, population, statements):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+
+    by_number = client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string={'page_number': 10})
+    by_cursor = client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string={'cursor': ''})
+    client.get(
+        f'{CONFIG.flask.url_prefix}/sessions',
+        headers=headers,
+        query_string={'cursor': by_cursor.headers['X-Next-Cursor']},
+    )
+
+    assert by_number.status_code == by_cursor.status_code == HTTPStatus.OK
+    assert not sequential_scans(statements)
+
+
+def test_legacy_history_plans(client, user_tokens, population, statements):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    before_partitioning = encode_cursor(add_months(datetime.utcnow(), 0), uuid.UUID(int=0))
+
+    response = client.get(
+        f'{CONFIG.flask.url_prefix}/sessions',
+        headers=headers,
+        query_string={'cursor': before_partitioning},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()
+    assert not sequential_scans(statements)
+
+
+def test_subscribe_plans(client, user, admin_tokens, population, statements):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/users/{user.pk}/subscribe', headers=headers)
+    client.get(f'{CONFIG.flask.url_prefix}/users/{user.pk}/subscribe', headers=headers)
+    client.delete(f'{CONFIG.flask.url_prefix}/users/{user.pk}/subscribe', headers=headers)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert not sequential_scans(statements)
+
+
+def test_social_account_plans(app, user, population, statements):
+    social_id = db.session.execute(text('SELECT md5(:pk)'), {'pk': str(user.pk)}).scalar()
+    statements.clear()
+
+    user_pk = postgres.find_or_create_social_user(social_id, OAuthProviders.YANDEX.value)
+
+    assert user_pk == user.pk
+    assert not sequential_scans(statements)
+
+
+def test_cascade_delete_plans(app, user, population, statements):
+    for table, column in (
+        ('sessions', 'user_pk'),
+        ('social_account', 'user_pk'),
+        ('roles_users', 'user_pk'),
+        ('roles_users', 'role_pk'),
+    ):
+        statements.append((f'DELETE FROM {table} WHERE {column} = %(pk)s', {'pk': user.pk}))
+
+    assert not sequential_scans(statements)
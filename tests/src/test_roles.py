@@ -1,6 +1,9 @@
+import uuid
 from http import HTTPStatus
 
-from apps.utils import generate_random_string
+from apps.roles import RoleOfUsers
+from apps.security import user_datastore as postgres
+from apps.utils import generate_random_email, generate_random_string
 from core.config import CONFIG
 from models.role import Role
 
@@ -43,6 +46,17 @@ def test_update_role(client, admin_tokens, new_role):
     assert Role.query.filter_by(name=new_role.name).one().description == body['description']
 
 
+def test_retrieve_updated_role(client, admin_tokens, new_role, bus_ready):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    body = {'description': generate_random_string(16)}
+    client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}')
+
+    client.put(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers=headers, json=body)
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}')
+
+    assert response.get_json()['description'] == body['description']
+
+
 def test_delete_role(client, admin_tokens, new_role):
     headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
 
@@ -50,3 +64,108 @@ def test_delete_role(client, admin_tokens, new_role):
 
     assert response.status_code == HTTPStatus.NO_CONTENT
     assert not Role.query.filter_by(name=new_role.name).first()
+
+
+def test_list_roles_not_modified(client, user, bus_ready, statements):
+    etag = client.get(f'{CONFIG.flask.url_prefix}/roles').headers['ETag']
+    statements.clear()
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not statements
+
+
+def test_unknown_role_does_not_reload_catalogue(client, user, bus_ready, statements):
+    client.get(f'{CONFIG.flask.url_prefix}/roles')
+    statements.clear()
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles/{generate_random_string(8)}')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert statements
+    assert all('WHERE roles.name' in statement for statement, _ in statements)
+
+
+def test_role_created_elsewhere_is_found(client, user, bus_ready):
+    client.get(f'{CONFIG.flask.url_prefix}/roles')
+    role = postgres.create_role(name=generate_random_string(8))
+    postgres.commit()
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles/{role.name}')
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_list_roles_not_modified_with_weak_etag(client, user, bus_ready):
+    etag = client.get(f'{CONFIG.flask.url_prefix}/roles').headers['ETag']
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles', headers={'If-None-Match': f'W/{etag}'})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_role_etag_changes_on_update(client, admin_tokens, new_role, bus_ready):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    etag = client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}').headers['ETag']
+    client.put(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers=headers, json={'description': 'changed'})
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()['description'] == 'changed'
+
+
+def test_conditional_get_of_deleted_role(client, admin_tokens, new_role, bus_ready):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    etag = client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}').headers['ETag']
+    client.delete(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers=headers)
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_assign_role_to_users(client, admin_tokens, user, new_role, monkeypatch):
+    monkeypatch.setattr(RoleOfUsers, 'chunk_size', 2)
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    postgres.grant_role(user, new_role.pk)
+    other = postgres.create_user(email=generate_random_email(8), password=generate_random_string(16))
+    postgres.commit()
+    missing = str(uuid.uuid4())
+    body = {'users': [str(other.pk), str(user.pk), missing, 'not-an-id', str(other.pk)]}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}/users', headers=headers, json=body)
+
+    assert response.status_code == HTTPStatus.OK
+    assert [result['status'] for result in response.get_json()] == [
+        'assigned', 'unchanged', 'not_found', 'invalid', 'unchanged',
+    ]
+    assert new_role.name in [role.name for role in other.roles]
+
+
+def test_revoke_role_from_streamed_users(client, admin_tokens, user, new_role):
+    headers = {
+        'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token']),
+        'Content-Type': 'text/plain',
+    }
+    postgres.grant_role(user, new_role.pk)
+    postgres.commit()
+    body = f'{user.pk}\n{uuid.uuid4()}\n\n'
+
+    response = client.delete(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}/users', headers=headers, data=body)
+
+    assert response.status_code == HTTPStatus.OK
+    assert [result['status'] for result in response.get_json()] == ['revoked', 'not_found']
+    assert new_role.name not in [role.name for role in user.roles]
+
+
+def test_assign_unknown_role_to_users(client, admin_tokens, user):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+
+    response = client.post(
+        f'{CONFIG.flask.url_prefix}/roles/{generate_random_string(8)}/users', headers=headers, json={'users': []},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
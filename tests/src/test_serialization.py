@@ -0,0 +1,44 @@
+from datetime import datetime
+from http import HTTPStatus
+
+from marshmallow import Schema
+
+from api.schemas import RoleSchema, SessionSchema, TokenSchema, UserSchema
+from apps.principals import Principal
+from core.config import CONFIG
+
+
+def test_compiled_dump_of_objects(app, user):
+    principal = Principal(user)
+
+    dumped = UserSchema().dump(principal)
+
+    assert dumped == Schema.dump(UserSchema(), principal)
+    assert UserSchema._dumps[tuple(UserSchema().dump_fields)] is not None
+
+
+def test_compiled_dump_of_dicts():
+    sessions = [{'event_date': datetime(2023, 1, 2, 3, 4, 5), 'user_agent': 'agent'}] * 2
+
+    assert SessionSchema(many=True).dump(sessions) == Schema.dump(SessionSchema(many=True), sessions)
+    assert TokenSchema().dump({'access_token': 'a', 'refresh_token': 'r'}) == {'access_token': 'a', 'refresh_token': 'r'}
+
+
+def test_compiled_dump_omits_missing_fields():
+    assert RoleSchema().dump({'name': 'role'}) == {'name': 'role'}
+
+
+def test_malformed_json_body(client):
+    response = client.post(
+        f'{CONFIG.flask.url_prefix}/sessions', data='{"email":', content_type='application/json',
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_openapi_docs_keep_schemas(client):
+    response = client.get(f'/{CONFIG.flask.docs}-json')
+
+    definitions = response.get_json()['definitions']
+    assert set(definitions['Session']['properties']) == {'event_date', 'user_agent'}
+    assert set(definitions['Token']['properties']) == {'access_token', 'refresh_token'}
@@ -1,7 +1,18 @@
+import threading
 from http import HTTPStatus
 
+import pytest
+from flask_jwt_extended import decode_token
+from flask_security.utils import get_hmac
+from passlib.hash import bcrypt
+
+from apps.blocklist import blocklist
+from apps.db import db
+from apps.hashing import hashing
+from apps.history import HistoryWriter, history
 from core.config import CONFIG
-from models.session import Session
+from models.user import User
+from models.session import Session, parse_device_type
 from tests.conftest import USER_PASSWORD
 
 
@@ -15,6 +26,67 @@ def test_login(client, user):
     assert response.get_json().get('refresh_token')
 
 
+def test_login_when_hashing_is_busy(client, user, monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(hashing, '_slots', slots)
+    body = {'email': user.email, 'password': USER_PASSWORD}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def test_login_rehashes_password(client, user):
+    db.session.execute(
+        User.__table__.update().values(password=bcrypt.using(rounds=4).hash(get_hmac(USER_PASSWORD))),
+    )
+    db.session.commit()
+    body = {'email': user.email, 'password': USER_PASSWORD}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert bcrypt.from_string(User.query.first().password).rounds == CONFIG.hashing.rounds
+
+
+def test_login_with_write_behind_history(client, user, monkeypatch):
+    monkeypatch.setattr(history, 'queued', True)
+    body = {'email': user.email, 'password': USER_PASSWORD}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+    history.flush()
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert Session.query.count() == 1
+
+
+def test_history_flush_skips_dead_writer():
+    writer = HistoryWriter(mode='queue', size=10, batch=10, interval=10, overflow='drop')
+    writer._thread = threading.Thread(target=writer._queue.get)
+    writer._queue.put({})
+    writer._thread.start()
+    writer._thread.join()
+    flusher = threading.Thread(target=writer.flush)
+
+    flusher.start()
+    flusher.join(timeout=1)
+
+    assert not flusher.is_alive()
+
+
+def test_login_device_type_is_memoized(client, user):
+    body = {'email': user.email, 'password': USER_PASSWORD}
+    headers = {'User-Agent': 'Mozilla/5.0 (iPad; CPU OS 16_1 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148'}
+    parse_device_type.cache_clear()
+
+    client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body, headers=headers)
+    client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body, headers=headers)
+
+    assert parse_device_type.cache_info().hits == 1
+    assert {session.user_device_type for session in Session.query} == {'tablet'}
+
+
 def test_auth_history(client, user_tokens):
     headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
 
@@ -24,6 +96,38 @@ def test_auth_history(client, user_tokens):
     assert f'{Session.query.first().event_date:{CONFIG.flask.date_format}}' == response.get_json()[0]['event_date']
 
 
+def test_auth_history_by_cursor(client, user, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    body = {'email': user.email, 'password': USER_PASSWORD}
+    for _ in range(2):
+        client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+    pages, params = [], {'cursor': '', 'page_size': 2}
+
+    while params['cursor'] is not None:
+        response = client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string=params)
+        pages.append(response.get_json())
+        params['cursor'] = response.headers.get('X-Next-Cursor')
+
+    assert [len(page) for page in pages] == [2, 1]
+
+
+def test_auth_history_by_invalid_cursor(client, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string={'cursor': 'invalid'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize('page_size', [0, -1, 101])
+def test_auth_history_by_invalid_page_size(client, user_tokens, page_size):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/sessions', headers=headers, query_string={'page_size': page_size})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 def test_update_tokens(client, user_tokens):
     headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['refresh_token'])}
 
@@ -41,3 +145,28 @@ def test_logout(client, user_tokens):
 
     assert response.status_code == HTTPStatus.NO_CONTENT
     assert client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_logout_survives_resync(client, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+
+    client.delete(f'{CONFIG.flask.url_prefix}/sessions', headers=headers)
+    blocklist.replica.resync()
+
+    assert blocklist.is_revoked(decode_token(user_tokens['access_token']))
+    assert client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_logout_everywhere(client, user, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    body = {'email': user.email, 'password': USER_PASSWORD}
+    other_tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+
+    response = client.delete(f'{CONFIG.flask.url_prefix}/sessions?everywhere=true', headers=headers)
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    for token in (other_tokens['access_token'], other_tokens['refresh_token']):
+        assert blocklist.is_revoked(decode_token(token))
+    new_tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    new_headers = {'Authorization': 'Bearer {token}'.format(token=new_tokens['access_token'])}
+    assert client.get(f'{CONFIG.flask.url_prefix}/users', headers=new_headers).status_code == HTTPStatus.OK
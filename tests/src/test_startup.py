@@ -0,0 +1,30 @@
+import pytest
+
+from core.config import CONFIG
+from core.startup import measure_startup
+
+
+@pytest.fixture(scope='module')
+def profile():
+    return measure_startup()
+
+
+def test_startup_fits_budget(profile):
+    assert profile.total <= CONFIG.flask.startup, [name for name, *_ in profile.slowest(10)]
+
+
+def test_every_component_is_timed(profile):
+    assert list(profile.installs) == [
+        'apps.db', 'apps.history', 'apps.jwt', 'apps.security', 'apps.serialization',
+        'apps.api', 'apps.oauth', 'apps.metrics', 'apps.limiter', 'apps.jaeger',
+    ]
+
+
+def test_disabled_subsystems_are_not_imported(monkeypatch):
+    monkeypatch.setenv('JAEGER_ENABLED', 'false')
+    for name in ('YANDEX_ID', 'YANDEX_SECRET', 'VK_ID', 'VK_SECRET'):
+        monkeypatch.setenv(name, '')
+
+    loaded = {name.partition('.')[0] for name in measure_startup().modules}
+
+    assert not loaded & {'alembic', 'flask_migrate', 'flask_script', 'opentelemetry', 'rauth', 'user_agents'}
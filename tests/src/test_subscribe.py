@@ -30,3 +30,17 @@ def test_delete_subscription(client, user_subscriber, admin_tokens):
 
     assert response.status_code == HTTPStatus.NO_CONTENT
     assert AuthRoles.SUBSCRIBER.value.title() not in list(map(str, user_subscriber.roles))
+
+
+def test_subscription_etag_changes(client, user, admin_tokens, bus_ready):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    url = f'{CONFIG.flask.url_prefix}/users/{user.pk}/subscribe'
+    etag = client.get(url, headers=headers).headers['ETag']
+    not_modified = client.get(url, headers={**headers, 'If-None-Match': etag})
+    client.post(url, headers=headers)
+
+    response = client.get(url, headers={**headers, 'If-None-Match': etag})
+
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.status_code == HTTPStatus.OK
+    assert AuthRoles.SUBSCRIBER.value in [role['name'] for role in response.get_json()]
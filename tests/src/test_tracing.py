@@ -0,0 +1,86 @@
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from werkzeug.exceptions import ServiceUnavailable
+
+from apps.jaeger import tracing
+from apps.providers import ProviderClient
+from core.config import OAuthConfig
+
+
+def start_tracing(ratio):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(ratio)))
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracing.start(provider)
+    return exporter
+
+
+@pytest.fixture
+def spans():
+    exporter = start_tracing(ratio=1)
+    yield exporter
+    tracing.stop()
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    yield engine
+    engine.dispose()
+
+
+def test_untraced_spans_are_shared():
+    assert tracing.span('request') is tracing.span('query')
+    with tracing.span('request') as current:
+        assert current is None
+
+
+def test_queries_are_child_spans(spans, engine):
+    with tracing.span('request'):
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+    query, request = spans.get_finished_spans()
+    assert (query.name, request.name) == ('SELECT', 'request')
+    assert query.parent.span_id == request.context.span_id
+    assert query.attributes['db.statement'] == 'SELECT 1'
+
+
+def test_failed_query_span(spans, engine):
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM missing'))
+
+    query, = spans.get_finished_spans()
+    assert query.status.status_code == StatusCode.ERROR
+    assert query.events[0].name == 'exception'
+
+
+def test_unsampled_requests_are_not_recorded(engine):
+    exporter = start_tracing(ratio=0)
+    try:
+        with tracing.span('request'):
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+    finally:
+        tracing.stop()
+
+    assert not exporter.get_finished_spans()
+
+
+def test_provider_attempts_are_spans(spans):
+    client = ProviderClient('yandex', OAuthConfig(connect=0.1, retries=0))
+
+    with pytest.raises(ServiceUnavailable):
+        client.request('GET', 'http://127.0.0.1:9/info')
+
+    attempt, = spans.get_finished_spans()
+    assert attempt.name == 'oauth.yandex'
+    assert attempt.attributes['http.method'] == 'GET'
+    assert attempt.status.status_code == StatusCode.ERROR
@@ -1,9 +1,13 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 
 from flask_security.utils import verify_password
 
+from apps.limiter import rate_limiter
 from apps.utils import generate_random_email, generate_random_string
 from core.config import CONFIG
+from core.enums import AuthRoles
 from models.user import User
 from tests.conftest import USER_EMAIL, USER_PASSWORD
 
@@ -20,6 +24,38 @@ def test_register(client):
     assert User.query.filter_by(email=data['email']).one().email == data['email']
 
 
+def test_register_concurrent_duplicates(app, user, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'enabled', False)
+    data = {
+        'email': generate_random_email(8),
+        'password': generate_random_string(16),
+    }
+
+    def register(_):
+        return app.test_client().post(f'{CONFIG.flask.url_prefix}/users', json=data).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        status_codes = list(pool.map(register, range(16)))
+
+    assert sorted(status_codes) == [HTTPStatus.CREATED] + [HTTPStatus.BAD_REQUEST] * 15
+    assert User.query.filter_by(email=data['email']).count() == 1
+
+
+def test_register_without_role_queries(client, user, bus_ready, statements):
+    client.get(f'{CONFIG.flask.url_prefix}/roles')
+    data = {
+        'email': generate_random_email(8),
+        'password': generate_random_string(16),
+    }
+    statements.clear()
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/users', json=data)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert not [statement for statement, _ in statements if re.search(r'\broles\b', statement)]
+    assert AuthRoles.USER.value in [role.name for role in User.query.filter_by(email=data['email']).one().roles]
+
+
 def test_personal_information(client, user_tokens):
     headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
 
@@ -29,6 +65,16 @@ def test_personal_information(client, user_tokens):
     assert response.get_json()['email'] == USER_EMAIL
 
 
+def test_personal_information_not_modified(client, user_tokens, bus_ready):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    etag = client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers).headers['ETag']
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/users', headers={**headers, 'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+
+
 def test_change_password(client, user_tokens):
     headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
     body = {'old_password': USER_PASSWORD, 'new_password': generate_random_string(8)}
@@ -37,3 +83,26 @@ def test_change_password(client, user_tokens):
 
     assert response.status_code == HTTPStatus.OK
     assert verify_password(body['new_password'], User.query.first().password)
+
+
+def test_personal_information_after_subscription(client, user, user_tokens, admin_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    admin_headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers)
+
+    client.post(f'{CONFIG.flask.url_prefix}/users/{user.pk}/subscribe', headers=admin_headers)
+    response = client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert AuthRoles.SUBSCRIBER.value.title() in response.get_json()['roles']
+
+
+def test_revoke_user_sessions(client, user, user_tokens, admin_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    admin_headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+
+    response = client.delete(f'{CONFIG.flask.url_prefix}/users/{user.pk}/sessions', headers=admin_headers)
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers).status_code == HTTPStatus.UNAUTHORIZED
+    assert client.get(f'{CONFIG.flask.url_prefix}/users', headers=admin_headers).status_code == HTTPStatus.OK